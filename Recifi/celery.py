@@ -19,6 +19,18 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
+    "deliver_notifications": {
+        "task": "accounts.tasks.deliver_notifications",
+        "schedule": 10.0,
+    },
+    "purge_notification_outbox": {
+        "task": "accounts.tasks.purge_notification_outbox",
+        "schedule": crontab(minute=30, hour=0),
+    },
+    "refresh_wallet_balances": {
+        "task": "accounts.tasks.refresh_wallet_balances",
+        "schedule": 12.0,
+    },
     "pulse_tracker_notifications": {
         "task": "pulse_tracker.tasks.monitor_percentage_change",
         "schedule": 60.0,
@@ -27,9 +39,17 @@ app.conf.beat_schedule = {
         "task": "trade.tasks.Recifi_wallets_24h_percentage_change",
         "schedule": crontab(minute=0),
     },
+    "reap_expired_trade_claims": {
+        "task": "trade.tasks.reap_expired_trade_claims",
+        "schedule": 60.0,
+    },
+    "Recifi_buy_detection": {
+        "task": "trade.tasks.detect_Recifi_buys",
+        "schedule": 60.0,
+    },
     "Recifi_notifications": {
         "task": "trade.tasks.Recifi_alerts",
-        "schedule": crontab(minute=10, hour="*"),
+        "schedule": crontab(minute="*/5"),
     },
     "update_historical_price_of_recifi": {
         "task": "trade.tasks.update_historical_price",
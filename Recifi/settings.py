@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 import environ
 import os
+from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
 
 
@@ -158,6 +159,29 @@ WEB3_PROVIDER_URL = env("WEB3_PROVIDER_URL")
 ETHERSCAN_URL = env("ETHERSCAN_URL")
 TRANSACTION_HASH_URL = env("TRANSACTION_HASH_URL")
 
+# Wallets whose triggered trades are executed concurrently on one price tick
+# (1 executes them inline, one after the other)
+TRADE_EXECUTION_WORKERS = env.int("TRADE_EXECUTION_WORKERS", default=8)
+
+# Seconds a claimed trade may stay in_process before the reaper settles it
+# (failed, or needs_review once its swap was signed); keep it above the
+# slowest swap
+TRADE_CLAIM_LEASE_SECONDS = env.int("TRADE_CLAIM_LEASE_SECONDS", default=300)
+
+# Wallet balance cache: balances are served until a newer block is published
+# (accounts.tasks.refresh_wallet_balances, or a lookup once the published block
+# is this old) and tracked for refresh until unread from the node this long
+BALANCE_CACHE_BLOCK_SECONDS = env.float("BALANCE_CACHE_BLOCK_SECONDS", default=12.0)
+BALANCE_CACHE_TRACK_SECONDS = env.int("BALANCE_CACHE_TRACK_SECONDS", default=3600)
+
+# Trade engine (manage.py run_trade_engine) heartbeat; the health endpoint
+# reports it down after three missed heartbeats
+TRADE_ENGINE_HEARTBEAT_SECONDS = env.float("TRADE_ENGINE_HEARTBEAT_SECONDS", default=10.0)
+
+# Trade engine price feed: "aggTrade", "bookTicker" or "kline_1m", evaluated
+# at most once per TRADE_ENGINE_COALESCE_MS with the latest price
+TRADE_ENGINE_FEED = env("TRADE_ENGINE_FEED", default="aggTrade")
+TRADE_ENGINE_COALESCE_MS = env.int("TRADE_ENGINE_COALESCE_MS", default=100)
 
 # Encryption key
 ENCRYPTION_KEY = env("ENCRYPTION_KEY")
@@ -168,6 +192,26 @@ PULSE_TRACKER_BOT_TOKEN = env("PULSE_TRACKER_BOT_TOKEN")
 BUY_SELL_BOT_TOKEN = env("BUY_SELL_BOT_TOKEN")
 
 
+# Telegram broadcast limits (Telegram allows ~30 messages/s per bot and 1/s per chat)
+TELEGRAM_BROADCAST_CONCURRENCY = env.int("TELEGRAM_BROADCAST_CONCURRENCY", default=20)
+TELEGRAM_GLOBAL_RATE = env.float("TELEGRAM_GLOBAL_RATE", default=25.0)
+TELEGRAM_PER_CHAT_INTERVAL = env.float("TELEGRAM_PER_CHAT_INTERVAL", default=1.0)
+TELEGRAM_MAX_RETRIES = env.int("TELEGRAM_MAX_RETRIES", default=3)
+TELEGRAM_REQUEST_TIMEOUT = env.float("TELEGRAM_REQUEST_TIMEOUT", default=10.0)
+TELEGRAM_RECIPIENT_CHUNK = env.int("TELEGRAM_RECIPIENT_CHUNK", default=1000)
+
+
+# Notification outbox delivery
+NOTIFICATION_OUTBOX_BATCH_SIZE = env.int("NOTIFICATION_OUTBOX_BATCH_SIZE", default=200)
+NOTIFICATION_OUTBOX_LEASE_SECONDS = env.int("NOTIFICATION_OUTBOX_LEASE_SECONDS", default=120)
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = env.int("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", default=5)
+NOTIFICATION_OUTBOX_RETRY_SECONDS = env.int("NOTIFICATION_OUTBOX_RETRY_SECONDS", default=30)
+# Days sent messages are kept before purge_notification_outbox deletes them
+NOTIFICATION_OUTBOX_RETENTION_DAYS = env.int(
+    "NOTIFICATION_OUTBOX_RETENTION_DAYS", default=7
+)
+
+
 # Celery configuration
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = "django-db"
@@ -183,6 +227,21 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 BACKEND_URL = env("BACKEND_URL")
 
 
+# Cache shared by every process: web, Celery workers, the Binance streams and
+# the trade engine. Balances, trigger book and watch index versions, metrics,
+# leaderboards and whale holdings are kept in it, so a per-process cache
+# (locmem, dummy) only works with a single process and is refused outside DEBUG.
+# e.g. CACHE_URL=rediscache://127.0.0.1:6379/1
+CACHES = {"default": env.cache("CACHE_URL")}
+if not DEBUG and CACHES["default"]["BACKEND"] in (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+):
+    raise ImproperlyConfigured(
+        "CACHE_URL must point to a cache shared by all processes, e.g. Redis."
+    )
+
+
 # Create a logs folder in BASE_DIR
 if not os.path.exists(os.path.join(BASE_DIR, "logs")):
     os.makedirs(os.path.join(BASE_DIR, "logs"))
@@ -219,19 +278,84 @@ LOGGING = {
 ETHERSCAN_API_KEY = env("ETHERSCAN_API_KEY")
 ETHERSCAN_API_URL = env("ETHERSCAN_API_URL")
 
+# Shared Etherscan quota (calls per second, bucket size and tokens kept for user calls)
+ETHERSCAN_RATE_LIMIT = env.float("ETHERSCAN_RATE_LIMIT", default=5.0)
+ETHERSCAN_BURST = env.float("ETHERSCAN_BURST", default=5.0)
+ETHERSCAN_USER_RESERVE = env.float("ETHERSCAN_USER_RESERVE", default=2.0)
+ETHERSCAN_USER_MAX_WAIT = env.float("ETHERSCAN_USER_MAX_WAIT", default=10.0)
+ETHERSCAN_BACKGROUND_MAX_WAIT = env.float("ETHERSCAN_BACKGROUND_MAX_WAIT", default=300.0)
+
 
 # Covalent API details
 COVALENT_API_KEY = env("COVALENT_API_KEY")
 
+# Shared Covalent quota (calls per second, bucket size, tokens kept for user
+# calls and the longest wait of each lane in seconds)
+COVALENT_RATE_LIMIT = env.float("COVALENT_RATE_LIMIT", default=4.0)
+COVALENT_BURST = env.float("COVALENT_BURST", default=4.0)
+COVALENT_USER_RESERVE = env.float("COVALENT_USER_RESERVE", default=1.0)
+COVALENT_USER_MAX_WAIT = env.float("COVALENT_USER_MAX_WAIT", default=10.0)
+COVALENT_BACKGROUND_MAX_WAIT = env.float("COVALENT_BACKGROUND_MAX_WAIT", default=300.0)
+
 
 # Recifi Whale Wallet
 Recifi_WHALE_WALLET = env("Recifi_WHALE_WALLET")
 
+# Recifi wallets fetched concurrently from Covalent by the hourly portfolio sweep
+RECIFI_SWEEP_WORKERS = env.int("RECIFI_SWEEP_WORKERS", default=8)
+
+# Recifi wallets per shard of the whale sweeps fanned out to the Celery
+# workers, and seconds before the first retry of a shard's failed wallets
+RECIFI_SHARD_SIZE = env.int("RECIFI_SHARD_SIZE", default=250)
+RECIFI_SHARD_RETRY_SECONDS = env.int("RECIFI_SHARD_RETRY_SECONDS", default=60)
+
+# Seconds the whale top holdings stored by the hourly sweep are served for
+RECIFI_HOLDINGS_CACHE_SECONDS = env.int("RECIFI_HOLDINGS_CACHE_SECONDS", default=7200)
+
+# Seconds the whale leaderboards built by the hourly sweep are served for
+# before a request rebuilds them
+RECIFI_LEADERBOARDS_CACHE_SECONDS = env.int(
+    "RECIFI_LEADERBOARDS_CACHE_SECONDS", default=3600
+)
+
+# Recifi whale buy detector (eth_getLogs block ranges)
+RECIFI_LOG_BLOCK_RANGE = env.int("RECIFI_LOG_BLOCK_RANGE", default=500)
+RECIFI_LOG_ADDRESS_CHUNK = env.int("RECIFI_LOG_ADDRESS_CHUNK", default=1000)
+RECIFI_LOG_CONFIRMATIONS = env.int("RECIFI_LOG_CONFIRMATIONS", default=2)
+RECIFI_LOG_BACKFILL_BLOCKS = env.int("RECIFI_LOG_BACKFILL_BLOCKS", default=300)
+# Seconds a buy detection run holds its lease, keep it above the longest run
+RECIFI_LOG_LEASE_SECONDS = env.int("RECIFI_LOG_LEASE_SECONDS", default=600)
+
+# Recifi whale consensus alerts: weighted percentage of whales that must have
+# bought a token within each window (15m, 1h, 6h, 24h) to alert
+RECIFI_CONSENSUS_THRESHOLDS = env.dict(
+    "RECIFI_CONSENSUS_THRESHOLDS",
+    cast={"value": float},
+    default={"15m": 3.0, "1h": 5.0, "6h": 10.0, "24h": 15.0},
+)
+
 # Recifi Whale Alert Bot Token
-Recifi_ALERT_BOT_TOKEN = env("Recifi_ALERT_BOT_TOKEN")
+RECIFI_ALERT_BOT_TOKEN = env("Recifi_ALERT_BOT_TOKEN")
 
 # DexTools URL
 DEXTOOLS_URL = env("DEXTOOLS_URL")
 
 # Binance API
 BINANCE_API = env("BINANCE_API")
+BINANCE_TICKER_CHUNK = env.int("BINANCE_TICKER_CHUNK", default=100)
+BINANCE_KLINES_API = env(
+    "BINANCE_KLINES_API", default="https://api.binance.com/api/v3/klines"
+)
+
+# Pulse tracker alerts: minimum seconds between two alerts for a watcher, and
+# fraction of the threshold the change must fall below before re-arming
+PULSE_TRACKER_ALERT_COOLDOWN = env.int("PULSE_TRACKER_ALERT_COOLDOWN", default=3600)
+PULSE_TRACKER_REARM_RATIO = env.float("PULSE_TRACKER_REARM_RATIO", default=0.8)
+
+# Pulse tracker stream (manage.py run_pulse_tracker_stream)
+PULSE_TRACKER_STREAM_FLUSH_SECONDS = env.float(
+    "PULSE_TRACKER_STREAM_FLUSH_SECONDS", default=5.0
+)
+PULSE_TRACKER_STREAM_RECONCILE_SECONDS = env.float(
+    "PULSE_TRACKER_STREAM_RECONCILE_SECONDS", default=60.0
+)
@@ -20,12 +20,13 @@ from django.contrib import admin
 from django.conf.urls.static import static
 from django.urls import path, include
 
-from .views import SuccessView
+from .views import MetricsView, SuccessView
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", SuccessView.as_view(), name="success"),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path("api/", include("accounts.urls")),
     path("api/", include("trade.urls")),
     path("api/", include("pulse_tracker.urls")),
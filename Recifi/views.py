@@ -1,6 +1,11 @@
 from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from base.views import HandleException
+from utils.metrics import flush_histograms, get_gauges, get_histograms
+
 
 class SuccessView(APIView):
     """
@@ -14,3 +19,20 @@ class SuccessView(APIView):
         return HttpResponse(
             "HOWDY - looks like the services are up and running fine. \m/"
         )
+
+
+class MetricsView(HandleException, APIView):
+    """
+    API view to report the gauges and the stage latency histograms recorded
+    by every process.
+    """
+
+    def get(self, request):
+        flush_histograms()
+        return Response(
+            {
+                "status": True,
+                "data": {"gauges": get_gauges(), "histograms": get_histograms()},
+            },
+            status=status.HTTP_200_OK,
+        )
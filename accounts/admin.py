@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from .models import DefaultWallet, TelegramUser, UserWallet
+from .models import (
+    ApiQuota,
+    DefaultWallet,
+    NotificationOutbox,
+    TelegramUser,
+    UserWallet,
+)
 
 # Register your models here.
 
@@ -29,3 +35,43 @@ class DefaultWalletAdmin(admin.ModelAdmin):
 
     def wallet_name(self, obj):
         return obj.user_wallet.wallet_name
+
+
+@admin.register(ApiQuota)
+class ApiQuotaAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "tokens",
+        "user_queue_depth",
+        "background_queue_depth",
+        "user_requests",
+        "background_requests",
+        "average_user_wait",
+        "average_background_wait",
+        "max_wait_seconds",
+        "refilled_at",
+    )
+
+    def average_user_wait(self, obj):
+        if not obj.user_requests:
+            return 0
+        return round(obj.user_wait_seconds / obj.user_requests, 3)
+
+    def average_background_wait(self, obj):
+        if not obj.background_requests:
+            return 0
+        return round(obj.background_wait_seconds / obj.background_requests, 3)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "bot",
+        "chat_id",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    )
+    list_filter = ("bot", "status")
@@ -0,0 +1,12 @@
+NotificationBotChoices = (
+    ("buy_sell", "Buy Sell"),
+    ("pulse_tracker", "Pulse Tracker"),
+    ("Recifi_alert", "Recifi Alert"),
+)
+
+OutboxStatusChoices = (
+    ("pending", "Pending"),
+    ("in_process", "In Process"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+)
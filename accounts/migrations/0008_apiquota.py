@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:23
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_defaultwallet_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiQuota',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('tokens', models.FloatField(default=0)),
+                ('refilled_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user_queue_depth', models.IntegerField(default=0)),
+                ('background_queue_depth', models.IntegerField(default=0)),
+                ('user_requests', models.PositiveBigIntegerField(default=0)),
+                ('background_requests', models.PositiveBigIntegerField(default=0)),
+                ('user_wait_seconds', models.FloatField(default=0)),
+                ('background_wait_seconds', models.FloatField(default=0)),
+                ('max_wait_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiquota',
+            name='background_queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='apiquota',
+            name='user_queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_apiquota_queued_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationoutbox',
+            index=models.Index(fields=['status', 'created_at'], name='accounts_no_status_663f77_idx'),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 from base.models import BaseModel
+from .enums import NotificationBotChoices, OutboxStatusChoices
 from utils.w3 import check_balance
 
 
@@ -69,3 +71,65 @@ class DefaultWallet(BaseModel):
 
     def __str__(self):
         return self.telegram_user.telegram_user_id
+
+
+class ApiQuota(BaseModel):
+    """
+    Shared token bucket for a rate limited third party API (e.g. Etherscan).
+
+    One row per API is locked with select_for_update, so web and Celery
+    processes all draw from the same quota. The queue depth and wait columns
+    are kept up to date by utils.quota and shown in the admin. Waiters
+    stamp their lane's queued_at on every attempt, so the depth left behind
+    by a waiter that died while queued expires.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField(default=0)
+    refilled_at = models.DateTimeField(default=timezone.now)
+    user_queue_depth = models.IntegerField(default=0)
+    background_queue_depth = models.IntegerField(default=0)
+    user_queued_at = models.DateTimeField(null=True, blank=True)
+    background_queued_at = models.DateTimeField(null=True, blank=True)
+    user_requests = models.PositiveBigIntegerField(default=0)
+    background_requests = models.PositiveBigIntegerField(default=0)
+    user_wait_seconds = models.FloatField(default=0)
+    background_wait_seconds = models.FloatField(default=0)
+    max_wait_seconds = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class NotificationOutbox(BaseModel):
+    """
+    Telegram message waiting to be delivered by the notification worker.
+
+    Rows are written in the same transaction as the state change they announce
+    (a closed trade, a pulse tracker alert), so request paths never call
+    Telegram themselves and no message is lost or sent for a rolled back change.
+    """
+
+    bot = models.CharField(choices=NotificationBotChoices, max_length=50)
+    chat_id = models.CharField(max_length=255)
+    payload = models.JSONField()
+    status = models.CharField(
+        choices=OutboxStatusChoices, max_length=50, default="pending"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.bot} : {self.chat_id}"
@@ -0,0 +1,151 @@
+import time
+import logging
+from celery import shared_task
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NotificationOutbox
+from utils.telegram import TelegramBroadcaster
+from utils.w3 import balance_cache
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info_logger")
+logger_error = logging.getLogger("error_logger")
+
+
+def get_bot_token(bot):
+    """
+    Returns the Telegram bot token used to deliver messages of the given bot.
+    """
+    return {
+        "buy_sell": settings.BUY_SELL_BOT_TOKEN,
+        "pulse_tracker": settings.PULSE_TRACKER_BOT_TOKEN,
+        "Recifi_alert": settings.RECIFI_ALERT_BOT_TOKEN,
+    }[bot]
+
+
+def claim_outbox_batch():
+    """
+    Claims the next batch of due messages by moving them to in_process with a
+    lease, so that concurrent workers never send the same message twice and a
+    crashed worker's batch becomes due again once the lease expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending") | Q(status="in_process"),
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[: settings.NOTIFICATION_OUTBOX_BATCH_SIZE]
+        )
+        lease = now + timedelta(seconds=settings.NOTIFICATION_OUTBOX_LEASE_SECONDS)
+        for message in batch:
+            message.status = "in_process"
+            message.next_attempt_at = lease
+        NotificationOutbox.objects.bulk_update(batch, ["status", "next_attempt_at"])
+    return batch
+
+
+def deliver_outbox_batch(batch):
+    """
+    Sends a claimed batch, grouped by bot, and records every message's outcome.
+    Failed messages are retried with exponential backoff until they run out of
+    attempts.
+    """
+    delivered = failed = 0
+    bots = {}
+    for message in batch:
+        bots.setdefault(message.bot, []).append(message)
+
+    for bot, messages in bots.items():
+        broadcaster = TelegramBroadcaster(get_bot_token(bot))
+        _, outcomes = broadcaster.send_messages(
+            [
+                (message.uuid, {**message.payload, "chat_id": message.chat_id})
+                for message in messages
+            ]
+        )
+        now = timezone.now()
+        for message in messages:
+            error = outcomes.get(message.uuid, "Not sent.")
+            message.attempts += 1
+            if error is None:
+                message.status = "sent"
+                message.sent_at = now
+                message.last_error = None
+                delivered += 1
+                continue
+            message.last_error = error
+            if message.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                message.status = "failed"
+            else:
+                message.status = "pending"
+                message.next_attempt_at = now + timedelta(
+                    seconds=settings.NOTIFICATION_OUTBOX_RETRY_SECONDS
+                    * 2 ** (message.attempts - 1)
+                )
+            failed += 1
+        NotificationOutbox.objects.bulk_update(
+            messages,
+            ["status", "attempts", "sent_at", "last_error", "next_attempt_at"],
+        )
+    return delivered, failed
+
+
+@shared_task()
+def deliver_notifications():
+    """
+    Drains the notification outbox batch by batch until nothing is due.
+    """
+    start = time.time()
+    delivered = failed = 0
+    while True:
+        batch = claim_outbox_batch()
+        if not batch:
+            break
+        batch_delivered, batch_failed = deliver_outbox_batch(batch)
+        delivered += batch_delivered
+        failed += batch_failed
+    end = time.time()
+    if delivered or failed:
+        logger_info.info(
+            f"Delivered {delivered} notifications, {failed} failed in {end - start} seconds."
+        )
+    return f"Delivered {delivered} notifications, {failed} failed in {end - start} seconds."
+
+
+@shared_task()
+def purge_notification_outbox():
+    """
+    Deletes the sent messages older than NOTIFICATION_OUTBOX_RETENTION_DAYS,
+    so the outbox only grows with the messages still due.
+    """
+    start = time.time()
+    deleted, _ = NotificationOutbox.objects.filter(
+        status="sent",
+        created_at__lt=timezone.now()
+        - timedelta(days=settings.NOTIFICATION_OUTBOX_RETENTION_DAYS),
+    ).delete()
+    end = time.time()
+    return f"Purged {deleted} sent notifications in {end - start} seconds."
+
+
+@shared_task()
+def refresh_wallet_balances():
+    """
+    Re-reads the cached wallet balances once a new block is mined, so order
+    placement and swap pre-checks are served from the cache.
+    """
+    start = time.time()
+    block, refreshed, failed = balance_cache.refresh()
+    end = time.time()
+    if refreshed or failed:
+        logger_info.info(
+            f"Refreshed {refreshed} wallet balances at block {block}, {failed} failed in {end - start} seconds."
+        )
+    return f"Refreshed {refreshed} wallet balances at block {block}, {failed} failed in {end - start} seconds."
@@ -1,3 +1,238 @@
-from django.test import TestCase
+import asyncio
+import threading
+from aiohttp import web
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from .models import ApiQuota, NotificationOutbox
+from .tasks import purge_notification_outbox
+from utils.balances import BALANCE_BLOCK_KEY, ETH_ASSET, BalanceCache
+from utils.telegram import TelegramBroadcaster
+from utils.quota import (
+    BACKGROUND_LANE,
+    QUEUE_EXPIRY_SECONDS,
+    USER_LANE,
+    QuotaTimeout,
+    SharedQuota,
+)
+
+
+class SharedQuotaTests(TestCase):
+    def setUp(self):
+        self.quota = SharedQuota(name="test", rate=1.0, burst=2.0, user_reserve=1.0)
+
+    def get_row(self):
+        return ApiQuota.objects.get(name="test")
+
+    def test_user_lane_drains_bucket(self):
+        self.quota.acquire(USER_LANE)
+        self.quota.acquire(USER_LANE)
+        row = self.get_row()
+        self.assertEqual(row.user_requests, 2)
+        self.assertLess(row.tokens, 1)
+
+    def test_background_lane_keeps_user_reserve(self):
+        self.assertEqual(self.quota._try_take(BACKGROUND_LANE, 0, False), 0)
+        self.assertGreater(self.quota._try_take(BACKGROUND_LANE, 0, False), 0)
+        self.assertEqual(self.get_row().background_queue_depth, 1)
+
+    def test_background_lane_waits_for_queued_user(self):
+        ApiQuota.objects.create(
+            name="test", tokens=2, user_queue_depth=1, user_queued_at=timezone.now()
+        )
+        self.assertGreater(self.quota._try_take(BACKGROUND_LANE, 0, False), 0)
+
+    def test_timed_out_waiter_leaves_queue(self):
+        ApiQuota.objects.create(name="test", tokens=0)
+        with self.assertRaises(QuotaTimeout):
+            self.quota.acquire(USER_LANE, timeout=0)
+        self.assertEqual(self.get_row().user_queue_depth, 0)
+
+    def test_failed_waiter_leaves_queue(self):
+        ApiQuota.objects.create(name="test", tokens=0)
+        with mock.patch("utils.quota.time.sleep", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.quota.acquire(USER_LANE)
+        self.assertEqual(self.get_row().user_queue_depth, 0)
+
+    def test_abandoned_queue_expires(self):
+        ApiQuota.objects.create(
+            name="test",
+            tokens=2,
+            user_queue_depth=3,
+            user_queued_at=timezone.now()
+            - timedelta(seconds=QUEUE_EXPIRY_SECONDS + 1),
+        )
+        self.assertEqual(self.quota._try_take(BACKGROUND_LANE, 0, False), 0)
+        self.assertEqual(self.get_row().user_queue_depth, 0)
+
+
+class BalanceCacheTests(TestCase):
+    WALLET = "0xAbC"
+
+    def setUp(self):
+        cache.clear()
+        self.block = 100
+        self.balances = {ETH_ASSET: 1.0}
+        self.fetch = mock.Mock(side_effect=lambda wallet, asset: self.balances[asset])
+        self.balance_cache = BalanceCache(self.fetch, lambda: self.block)
+
+    def test_balance_is_served_until_the_next_block(self):
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 1.0)
+        self.balances[ETH_ASSET] = 2.0
+        self.assertEqual(self.balance_cache.get(self.WALLET.lower(), ETH_ASSET), 1.0)
+        self.assertEqual(self.fetch.call_count, 1)
+
+        self.block = 101
+        self.assertEqual(self.balance_cache.refresh(), (101, 1, 0))
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 2.0)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_invalidated_balance_is_read_until_the_next_block(self):
+        self.balance_cache.get(self.WALLET, ETH_ASSET)
+        self.balance_cache.invalidate(self.WALLET, ETH_ASSET)
+        self.balances[ETH_ASSET] = 0.5
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 0.5)
+        self.balances[ETH_ASSET] = 0.4
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 0.4)
+        self.assertEqual(self.fetch.call_count, 3)
+
+        self.block = 101
+        self.balance_cache.refresh()
+        self.balances[ETH_ASSET] = 0.3
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 0.4)
+        self.assertEqual(self.fetch.call_count, 4)
+
+    def test_expired_published_block_is_read_again(self):
+        self.balance_cache.get(self.WALLET, ETH_ASSET)
+        cache.delete(BALANCE_BLOCK_KEY)
+        self.block = 101
+        self.balances[ETH_ASSET] = 2.0
+        self.assertEqual(self.balance_cache.get(self.WALLET, ETH_ASSET), 2.0)
+
+    def test_failed_refresh_is_counted(self):
+        self.balance_cache.get(self.WALLET, ETH_ASSET)
+        self.block = 101
+        self.fetch.side_effect = ValueError("rpc down")
+        self.assertEqual(self.balance_cache.refresh(), (101, 0, 1))
+
+
+@override_settings(NOTIFICATION_OUTBOX_RETENTION_DAYS=7)
+class PurgeNotificationOutboxTests(TestCase):
+    def message(self, status, days_ago):
+        message = NotificationOutbox.objects.create(
+            bot="buy_sell", chat_id="1", payload={"text": "hi"}, status=status
+        )
+        NotificationOutbox.objects.filter(uuid=message.uuid).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return message
+
+    def test_only_old_sent_messages_are_deleted(self):
+        self.message("sent", 8)
+        kept = [self.message("sent", 6), self.message("pending", 8)]
+        kept.append(self.message("failed", 8))
+        purge_notification_outbox()
+        self.assertEqual(
+            set(NotificationOutbox.objects.values_list("uuid", flat=True)),
+            {message.uuid for message in kept},
+        )
+
+
+class TelegramServer:
+    """
+    Local sendMessage endpoint answering each chat id as told by `replies`:
+    chat id -> list of (status, body, content type), the last one repeated.
+    """
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.requests = []
+
+    async def send_message(self, request):
+        chat_id = (await request.json())["chat_id"]
+        self.requests.append(chat_id)
+        replies = self.replies[chat_id]
+        status, body, content_type = (
+            replies.pop(0) if len(replies) > 1 else replies[0]
+        )
+        return web.Response(status=status, text=body, content_type=content_type)
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_post("/sendMessage", self.send_message)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/sendMessage"
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+@override_settings(TELEGRAM_REQUEST_TIMEOUT=5)
+class TelegramBroadcasterTests(TestCase):
+    OK = (200, '{"ok": true}', "application/json")
+    BAD_GATEWAY = (502, "<html>Bad Gateway</html>", "text/html")
+    THROTTLED = (
+        429,
+        '{"ok": false, "parameters": {"retry_after": 0}}',
+        "application/json",
+    )
+    BLOCKED = (
+        400,
+        '{"ok": false, "description": "chat not found"}',
+        "application/json",
+    )
+
+    def get_broadcaster(self, server):
+        broadcaster = TelegramBroadcaster(
+            "token",
+            concurrency=2,
+            global_rate=1000,
+            per_chat_interval=0,
+            max_retries=2,
+        )
+        broadcaster.url = server.url
+        return broadcaster
+
+    def test_broadcast_survives_non_json_errors(self):
+        replies = {
+            1: [self.OK],
+            2: [self.BAD_GATEWAY],
+            3: [self.THROTTLED, self.OK],
+            4: [self.BLOCKED],
+            5: [self.BAD_GATEWAY, self.OK],
+        }
+        with TelegramServer(replies) as server:
+            result = self.get_broadcaster(server).broadcast(
+                {"text": "hello"}, [[1, 2, 3], [4, 5]]
+            )
+        self.assertEqual(result["delivered"], 3)
+        self.assertEqual(result["failed"], 2)
+        self.assertEqual(result["throttled"], 1)
+        self.assertEqual(server.requests.count(2), 3)
+        self.assertEqual(server.requests.count(4), 1)
+
+    def test_send_messages_reports_each_outcome(self):
+        with TelegramServer({1: [self.OK], 2: [self.BAD_GATEWAY]}) as server:
+            summary, outcomes = self.get_broadcaster(server).send_messages(
+                [
+                    ("a", {"chat_id": 1, "text": "a"}),
+                    ("b", {"chat_id": 2, "text": "b"}),
+                ]
+            )
+        self.assertEqual(summary["delivered"], 1)
+        self.assertIsNone(outcomes["a"])
+        self.assertIn("Bad Gateway", outcomes["b"])
@@ -6,4 +6,12 @@ from .models import WatchList
 
 @admin.register(WatchList)
 class WatchListAdmin(admin.ModelAdmin):
-    list_display = ("telegram_user", "contract_address", "symbol")
+    list_display = (
+        "telegram_user",
+        "contract_address",
+        "symbol",
+        "percentage_change",
+        "window",
+        "is_alert_armed",
+        "last_alerted_at",
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PulseTrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pulse_tracker"
+
+    def ready(self):
+        import pulse_tracker.signals
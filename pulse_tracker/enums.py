@@ -0,0 +1,19 @@
+PriceChangeWindowChoices = (
+    ("5m", "5 Minutes"),
+    ("1h", "1 Hour"),
+    ("4h", "4 Hours"),
+    ("24h", "24 Hours"),
+)
+
+# Length of each window in minutes, the resolution of the price rings.
+PRICE_CHANGE_WINDOW_MINUTES = {
+    "5m": 5,
+    "1h": 60,
+    "4h": 240,
+    "24h": 1440,
+}
+
+# Window whose watchers are evaluated only by the monitor_percentage_change
+# sweep, from Binance's rolling 24hr ticker. The stream skips it, as its own
+# 24h change differs and would re-arm and re-alert on the same move.
+TICKER_WINDOW = "24h"
@@ -0,0 +1,60 @@
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+
+from pulse_tracker.watch_index import SymbolWatchers, WatchIndex
+
+
+class Command(BaseCommand):
+    help = "Benchmark the pulse tracker watch index against a linear scan of watchers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watchers", type=int, default=100000)
+        parser.add_argument("--symbols", type=int, default=500)
+        parser.add_argument("--sweeps", type=int, default=20)
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        symbols = [f"TOKEN{index}" for index in range(options["symbols"])]
+        rows = {symbol: [] for symbol in symbols}
+        for index in range(options["watchers"]):
+            rows[random.choice(symbols)].append(
+                (uuid.uuid4(), random.randint(1, 100), str(index), f"0x{index:040x}")
+            )
+
+        start = time.perf_counter()
+        index = WatchIndex()
+        for symbol, symbol_rows in rows.items():
+            index.watchers[symbol] = {"24h": SymbolWatchers(symbol_rows)}
+        build_time = time.perf_counter() - start
+
+        sweeps = [
+            {symbol: random.uniform(-30, 30) for symbol in symbols}
+            for _ in range(options["sweeps"])
+        ]
+
+        start = time.perf_counter()
+        indexed = 0
+        for price_changes in sweeps:
+            for symbol, percentage in price_changes.items():
+                indexed += len(index.triggered(symbol, percentage))
+        index_time = (time.perf_counter() - start) / len(sweeps)
+
+        start = time.perf_counter()
+        scanned = 0
+        for price_changes in sweeps:
+            for symbol, percentage in price_changes.items():
+                for row in rows[symbol]:
+                    if percentage >= row[1] or percentage <= -row[1]:
+                        scanned += 1
+        scan_time = (time.perf_counter() - start) / len(sweeps)
+
+        if indexed != scanned:
+            self.stderr.write(f"Mismatch: index {indexed}, scan {scanned}")
+        self.stdout.write(
+            f"{options['watchers']} watchers over {options['symbols']} symbols\n"
+            f"index build : {build_time * 1000:.1f} ms\n"
+            f"index sweep : {index_time * 1000:.2f} ms ({indexed // len(sweeps)} triggered)\n"
+            f"linear scan : {scan_time * 1000:.2f} ms"
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from pulse_tracker.websocket_binance import PulseTrackerStream
+
+
+class Command(BaseCommand):
+    help = "Stream the watchlist symbols' klines from Binance and notify watchers of every price-change window."
+
+    def handle(self, *args, **options):
+        PulseTrackerStream().run()
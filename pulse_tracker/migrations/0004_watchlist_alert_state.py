@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse_tracker', '0003_watchlist_percentage_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchlist',
+            name='is_alert_armed',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='watchlist',
+            name='last_alert_percentage',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='watchlist',
+            name='last_alerted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
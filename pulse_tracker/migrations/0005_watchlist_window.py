@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulse_tracker', '0004_watchlist_alert_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='watchlist',
+            name='window',
+            field=models.CharField(choices=[('5m', '5 Minutes'), ('1h', '1 Hour'), ('4h', '4 Hours'), ('24h', '24 Hours')], default='24h', max_length=5),
+        ),
+    ]
@@ -1,5 +1,8 @@
+from datetime import timedelta
+from django.conf import settings
 from django.db import models
 
+from .enums import PriceChangeWindowChoices
 from base.models import BaseModel
 from accounts.models import TelegramUser
 
@@ -19,6 +22,40 @@ class WatchList(BaseModel):
     contract_address = models.CharField(max_length=75)
     symbol = models.CharField(max_length=20)
     percentage_change = models.IntegerField()
+    window = models.CharField(
+        max_length=5, choices=PriceChangeWindowChoices, default="24h"
+    )
+    is_alert_armed = models.BooleanField(default=True)
+    last_alerted_at = models.DateTimeField(null=True, blank=True)
+    last_alert_percentage = models.FloatField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+
+    def update_alert_state(self, percentage, now):
+        """
+        Applies a new price change to the alert state of this watcher.
+
+        An alert is due only when the change crosses the threshold while the
+        watcher is armed and out of its cooldown window. The watcher is then
+        disarmed until the change falls back below PULSE_TRACKER_REARM_RATIO
+        of the threshold, so a pump that stays above it alerts once.
+
+        Returns:
+            tuple: (alert is due, state fields changed).
+        """
+        if abs(percentage) >= self.percentage_change:
+            cooldown = timedelta(seconds=settings.PULSE_TRACKER_ALERT_COOLDOWN)
+            if not self.is_alert_armed:
+                return False, False
+            if self.last_alerted_at and now - self.last_alerted_at < cooldown:
+                return False, False
+            self.is_alert_armed = False
+            self.last_alerted_at = now
+            self.last_alert_percentage = percentage
+            return True, True
+        rearm_below = self.percentage_change * settings.PULSE_TRACKER_REARM_RATIO
+        if not self.is_alert_armed and abs(percentage) < rearm_below:
+            self.is_alert_armed = True
+            return False, True
+        return False, False
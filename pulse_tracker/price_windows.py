@@ -0,0 +1,52 @@
+import math
+from array import array
+
+from .enums import PRICE_CHANGE_WINDOW_MINUTES
+
+# One slot per minute of the longest window, plus the current minute.
+RING_SIZE = max(PRICE_CHANGE_WINDOW_MINUTES.values()) + 1
+
+
+class PriceRing:
+    """
+    Fixed-size ring buffer of one symbol's 1 minute closes.
+
+    The slot of the current minute is overwritten by every update, so the
+    change over a window is the current price against the close stored
+    `minutes` slots back: O(1) per update and per window, whatever the
+    number of windows or their length. Minutes without an update (e.g. while
+    the stream reconnected) carry the last known close forward.
+    """
+
+    __slots__ = ("closes", "minute")
+
+    def __init__(self):
+        self.closes = array("d", [math.nan]) * RING_SIZE
+        self.minute = None
+
+    def update(self, minute, price):
+        """
+        Stores `price` as the close of `minute` (minutes since the epoch).
+        Updates older than the current minute are ignored.
+        """
+        if self.minute is not None:
+            if minute < self.minute:
+                return
+            last = self.closes[self.minute % RING_SIZE]
+            for gap in range(max(self.minute + 1, minute - RING_SIZE + 1), minute):
+                self.closes[gap % RING_SIZE] = last
+        self.minute = minute
+        self.closes[minute % RING_SIZE] = price
+
+    def change(self, minutes):
+        """
+        Returns the percentage change over the last `minutes` minutes, or None
+        while the ring does not reach that far back yet.
+        """
+        if self.minute is None:
+            return None
+        past = self.closes[(self.minute - minutes) % RING_SIZE]
+        if math.isnan(past) or past == 0:
+            return None
+        price = self.closes[self.minute % RING_SIZE]
+        return round((price - past) / past * 100, 2)
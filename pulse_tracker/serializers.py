@@ -1,3 +1,4 @@
+from .enums import PriceChangeWindowChoices
 from .models import WatchList
 from rest_framework import serializers
 from utils.w3 import is_contract_address, to_checksum_address
@@ -14,7 +15,7 @@ class WatchListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = WatchList
-        fields = ["telegram_user_id", "contract_address","percentage_change"]
+        fields = ["telegram_user_id", "contract_address", "percentage_change", "window"]
         extra_kwargs = {
             "contract_address": {
                 "error_messages": {"required": "Contract address is required."}
@@ -37,7 +38,26 @@ class WatchListGetSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = WatchList
-        fields = ["uuid", "contract_address", "symbol"]
+        fields = ["uuid", "contract_address", "symbol", "percentage_change", "window"]
+
+
+class PulseTrackerNotificationSerializer(serializers.Serializer):
+    """
+    Serializer for notifying the watchers of a token price change.
+    """
+
+    symbol = serializers.CharField(error_messages={"required": "Symbol is required."})
+    percentage = serializers.FloatField(
+        error_messages={"required": "Percentage is required."}
+    )
+    window = serializers.ChoiceField(
+        choices=PriceChangeWindowChoices,
+        default="24h",
+        error_messages={"invalid_choice": "Invalid window."},
+    )
+
+    def validate_symbol(self, value):
+        return value.upper()
 
 
 class SwapTokenSerializer(serializers.Serializer):
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import WatchList
+from .watch_index import bump_watch_index_version
+
+
+@receiver(post_save, sender=WatchList)
+@receiver(post_delete, sender=WatchList)
+def refresh_watch_index(sender, instance, **kwargs):
+    # Bumped once committed, so a process reloading on the new version
+    # reads the change.
+    symbol = instance.symbol
+    transaction.on_commit(lambda: bump_watch_index_version(symbol))
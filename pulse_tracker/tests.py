@@ -1,3 +1,216 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework.test import APIRequestFactory
+
+from .models import WatchList
+from .price_windows import RING_SIZE, PriceRing
+from .views import PulseTrackerNotification
+from .watch_index import SymbolWatchers, WatchIndex
+from .websocket_binance import PulseTrackerStream
+from accounts.models import TelegramUser
+
+
+@override_settings(PULSE_TRACKER_ALERT_COOLDOWN=600, PULSE_TRACKER_REARM_RATIO=0.5)
+class WatchListAlertStateTests(TestCase):
+    def setUp(self):
+        self.watcher = WatchList(percentage_change=10)
+        self.now = timezone.now()
+
+    def test_alerts_on_crossing_up_or_down(self):
+        self.assertEqual(self.watcher.update_alert_state(12, self.now), (True, True))
+        self.assertFalse(self.watcher.is_alert_armed)
+        self.assertEqual(self.watcher.last_alerted_at, self.now)
+        self.assertEqual(self.watcher.last_alert_percentage, 12)
+
+        watcher = WatchList(percentage_change=10)
+        self.assertEqual(watcher.update_alert_state(-10, self.now), (True, True))
+
+    def test_below_threshold_does_not_alert(self):
+        self.assertEqual(
+            self.watcher.update_alert_state(9.9, self.now), (False, False)
+        )
+        self.assertTrue(self.watcher.is_alert_armed)
+
+    def test_staying_above_threshold_alerts_once(self):
+        self.watcher.update_alert_state(12, self.now)
+        later = self.now + timedelta(hours=1)
+        self.assertEqual(self.watcher.update_alert_state(15, later), (False, False))
+
+    def test_rearms_below_ratio_only(self):
+        self.watcher.update_alert_state(12, self.now)
+        self.assertEqual(self.watcher.update_alert_state(6, self.now), (False, False))
+        self.assertFalse(self.watcher.is_alert_armed)
+        self.assertEqual(self.watcher.update_alert_state(4, self.now), (False, True))
+        self.assertTrue(self.watcher.is_alert_armed)
+
+    def test_rearmed_watcher_waits_for_cooldown(self):
+        self.watcher.update_alert_state(12, self.now)
+        self.watcher.update_alert_state(0, self.now)
+        soon = self.now + timedelta(seconds=599)
+        self.assertEqual(self.watcher.update_alert_state(12, soon), (False, False))
+        self.assertTrue(self.watcher.is_alert_armed)
+        later = self.now + timedelta(seconds=601)
+        self.assertEqual(self.watcher.update_alert_state(12, later), (True, True))
+
+
+class SymbolWatchersTests(TestCase):
+    def test_triggered_is_the_prefix_reached(self):
+        watchers = SymbolWatchers(
+            [("c", 30, 3, "0x"), ("a", 10, 1, "0x"), ("b", 20, 2, "0x")]
+        )
+        self.assertEqual(watchers.uuids, ["a", "b", "c"])
+        self.assertEqual(list(watchers.triggered(5)), [])
+        self.assertEqual(list(watchers.triggered(20)), [0, 1])
+        self.assertEqual(list(watchers.triggered(-25)), [0, 1])
+        self.assertEqual(list(watchers.triggered(100)), [0, 1, 2])
+
+
+class WatchIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TelegramUser.objects.create(telegram_user_id="42")
+        self.index = WatchIndex()
+
+    def watch(self, symbol, percentage_change, window="24h"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return WatchList.objects.create(
+                telegram_user=self.user,
+                contract_address="0xabc",
+                symbol=symbol,
+                percentage_change=percentage_change,
+                window=window,
+            )
+
+    def test_triggered_by_symbol_and_window(self):
+        five = self.watch("ETHUSDT", 5)
+        ten = self.watch("ETHUSDT", 10)
+        hourly = self.watch("ETHUSDT", 1, window="1h")
+        self.watch("BTCUSDT", 1)
+        self.index.refresh(["ETHUSDT"])
+        self.assertEqual(
+            [row[0] for row in self.index.triggered("ETHUSDT", -7)], [five.uuid]
+        )
+        self.assertEqual(len(self.index.triggered("ETHUSDT", 12)), 2)
+        self.assertEqual(
+            [row[0] for row in self.index.triggered("ETHUSDT", 2, "1h")], [hourly.uuid]
+        )
+        self.assertEqual(self.index.triggered("BTCUSDT", 50), [])
+        self.assertEqual(sorted(self.index.windows("ETHUSDT")), ["1h", "24h"])
+        self.assertNotIn(
+            ten.uuid, [row[0] for row in self.index.triggered("ETHUSDT", 9)]
+        )
+
+    def test_reloads_only_changed_symbols(self):
+        self.watch("ETHUSDT", 5)
+        self.watch("BTCUSDT", 5)
+        self.index.refresh(["ETHUSDT", "BTCUSDT"])
+        with self.assertNumQueries(0):
+            self.index.refresh(["ETHUSDT", "BTCUSDT"])
+
+        self.watch("ETHUSDT", 1)
+        with self.assertNumQueries(1):
+            self.index.refresh(["ETHUSDT", "BTCUSDT"])
+        self.assertEqual(len(self.index.triggered("ETHUSDT", 6)), 2)
+        self.assertEqual(len(self.index.triggered("BTCUSDT", 6)), 1)
+
+    def test_version_is_bumped_on_commit_only(self):
+        self.index.refresh(["ETHUSDT"])
+        WatchList.objects.create(
+            telegram_user=self.user,
+            contract_address="0xabc",
+            symbol="ETHUSDT",
+            percentage_change=1,
+        )
+        with self.assertNumQueries(0):
+            self.index.refresh(["ETHUSDT"])
+
+    def test_soft_deleted_watcher_is_dropped(self):
+        watcher = self.watch("ETHUSDT", 5)
+        self.index.refresh(["ETHUSDT"])
+        with self.captureOnCommitCallbacks(execute=True):
+            watcher.soft_delete()
+        self.index.refresh(["ETHUSDT"])
+        self.assertEqual(self.index.triggered("ETHUSDT", 50), [])
+
+
+class PriceRingTests(TestCase):
+    def test_change_over_windows(self):
+        ring = PriceRing()
+        self.assertIsNone(ring.change(5))
+        for minute in range(100, 161):
+            ring.update(minute, 100 + minute - 100)
+        self.assertEqual(ring.change(5), round(5 / 155 * 100, 2))
+        self.assertEqual(ring.change(60), 60.0)
+        self.assertIsNone(ring.change(240))
+
+    def test_current_minute_is_overwritten_and_old_updates_ignored(self):
+        ring = PriceRing()
+        ring.update(10, 100)
+        ring.update(15, 110)
+        ring.update(15, 120)
+        ring.update(14, 1)
+        self.assertEqual(ring.change(5), 20.0)
+
+    def test_gaps_carry_the_last_close_forward(self):
+        ring = PriceRing()
+        ring.update(0, 100)
+        ring.update(60, 150)
+        self.assertEqual(ring.change(5), 50.0)
+        self.assertEqual(ring.change(60), 50.0)
+
+    def test_wraps_around(self):
+        ring = PriceRing()
+        for minute in range(RING_SIZE * 2):
+            ring.update(minute, minute + 1)
+        last = RING_SIZE * 2
+        self.assertEqual(ring.change(1440), round(1440 / (last - 1440) * 100, 2))
+
+
+class PulseTrackerNotificationTests(TestCase):
+    def post(self, data):
+        request = APIRequestFactory().post("/", data, format="json")
+        return PulseTrackerNotification.as_view()(request)
+
+    @mock.patch("pulse_tracker.views.notify_watchers")
+    def test_notifies_watchers_of_the_window(self, notify_watchers):
+        response = self.post({"symbol": "eth", "percentage": "5.5", "window": "1h"})
+        self.assertEqual(response.status_code, 200)
+        notify_watchers.assert_called_once_with({"ETH": 5.5}, "1h")
+
+    @mock.patch("pulse_tracker.views.notify_watchers")
+    def test_window_defaults_to_24h(self, notify_watchers):
+        self.post({"symbol": "ETH", "percentage": 5})
+        notify_watchers.assert_called_once_with({"ETH": 5.0}, "24h")
+
+    @mock.patch("pulse_tracker.views.notify_watchers")
+    def test_unknown_window_is_rejected(self, notify_watchers):
+        response = self.post({"symbol": "ETH", "percentage": 5, "window": "2d"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["message"], "Invalid window.")
+        notify_watchers.assert_not_called()
+
+
+class PulseTrackerStreamTests(TestCase):
+    def setUp(self):
+        self.stream = PulseTrackerStream()
+        self.stream.stream_symbols = {"ethusdt@kline_1m": "ETH"}
+        ring = PriceRing()
+        for minute in range(RING_SIZE):
+            ring.update(minute, 100 + minute)
+        self.stream.rings = {"ETH": ring}
+        self.kline = {"k": {"t": (RING_SIZE - 1) * 60000, "c": "200"}}
+
+    @mock.patch("pulse_tracker.websocket_binance.notify_watchers")
+    @mock.patch("pulse_tracker.websocket_binance.watch_index")
+    def test_24h_window_is_left_to_the_ticker_sweep(self, index, notify_watchers):
+        index.windows.return_value = ["1h", "24h"]
+        index.triggered.return_value = [("a", "1", "0x")]
+        self.stream.on_data("ethusdt@kline_1m", self.kline)
+        windows = [call.args[2] for call in index.triggered.call_args_list]
+        self.assertEqual(windows, ["1h"])
+        notify_watchers.assert_called_once_with({"ETH": mock.ANY}, "1h")
+        self.assertEqual(list(self.stream.latest), [("ETH", "1h")])
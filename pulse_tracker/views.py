@@ -1,5 +1,4 @@
 import logging
-import time
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
@@ -9,13 +8,15 @@ from .models import WatchList
 from .serializers import (
     WatchListSerializer,
     WatchListGetSerializer,
+    PulseTrackerNotificationSerializer,
     SwapTokenSerializer,
 )
 from accounts.models import TelegramUser, DefaultWallet
 from base.views import HandleException
 from utils.encryption import decrypt_text
+from utils.metrics import span, timing_breakdown
 from utils.w3 import get_token_symbol, swap_eth_to_token, swap_token_to_eth
-from utils.helper import send_pulse_tracker_notification
+from utils.helper import notify_watchers
 
 
 # Configure logging
@@ -81,9 +82,14 @@ class WatchListView(HandleException, APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         percentage_change = serializer.validated_data["percentage_change"]
+        window = serializer.validated_data.get("window", "24h")
         symbol = get_token_symbol(contract_address)
         WatchList.objects.create(
-            telegram_user=user_obj, contract_address=contract_address, symbol=symbol, percentage_change= percentage_change
+            telegram_user=user_obj,
+            contract_address=contract_address,
+            symbol=symbol,
+            percentage_change=percentage_change,
+            window=window,
         )
         logger_info.info("Watchlist added successfully.")
         return Response(
@@ -130,21 +136,13 @@ class PulseTrackerNotification(HandleException, APIView):
         logger_info.info(
             "POST request to send notifications based on token price changes."
         )
-        data = request.data
-        symbol = data.get("symbol").upper()
-        percentage = float(data.get("percentage"))
-        notification_data = {"symbol": symbol, "percentage": percentage}
-        logger_info.info(f"Symbol: {symbol}, Percentage: {percentage}")
-        watchlists = WatchList.objects.filter(symbol=symbol)
-        for watchlist in watchlists:
-            user = watchlist.telegram_user.telegram_user_id
-            percentage_change = watchlist.percentage_change
-            logger_info.info(percentage_change)
-            if percentage>=percentage_change or percentage<=-percentage_change:
-                message = f"🎉 Congratulations! Your token {symbol} has increased by {percentage}%! 📈 If you would like to buy or sell, please proceed. 💰"
-                logger_info.info(message)
-                notification_data["token_address"] = watchlist.contract_address
-                send_pulse_tracker_notification(user, message, notification_data)
+        serializer = PulseTrackerNotificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        symbol = serializer.validated_data["symbol"]
+        percentage = serializer.validated_data["percentage"]
+        window = serializer.validated_data["window"]
+        logger_info.info(f"Symbol: {symbol}, Percentage: {percentage}, Window: {window}")
+        notify_watchers({symbol: percentage}, window)
         return Response(
             {"status": True, "message": "Notification sent successfully."},
             status=status.HTTP_200_OK,
@@ -157,7 +155,6 @@ class SwapTokenView(HandleException, APIView):
     """
 
     def post(self, request):
-        start_time = time.time()
         logger_info.info("POST request to swap tokens.")
         data = request.data
         serializer = SwapTokenSerializer(data=data)
@@ -187,25 +184,23 @@ class SwapTokenView(HandleException, APIView):
                 {"status": False, "message": "Default wallet not found."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        private_key = decrypt_text(default_wallet.user_wallet.private_key)
-        if swap_type == "buy":
-            logger_info.info("Swapping ETH to token.")
-            tx = swap_eth_to_token(private_key, amount, token_address, is_transfer)
-        elif swap_type == "sell":
-            logger_info.info("Swapping token to ETH.")
-            tx = swap_token_to_eth(private_key, amount, token_address, is_transfer)
-        else:
+        if swap_type not in ("buy", "sell"):
             logger_info.info("Invalid swap type.")
             return Response(
                 {"status": False, "message": "Invalid swap type."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        with timing_breakdown("swap_token_view", label=swap_type):
+            with span("swap_token_view.decrypt"):
+                private_key = decrypt_text(default_wallet.user_wallet.private_key)
+            if swap_type == "buy":
+                logger_info.info("Swapping ETH to token.")
+                tx = swap_eth_to_token(private_key, amount, token_address, is_transfer)
+            else:
+                logger_info.info("Swapping token to ETH.")
+                tx = swap_token_to_eth(private_key, amount, token_address, is_transfer)
         tx_url = f"{settings.TRANSACTION_HASH_URL}{tx}"
         logger_info.info(f"Transaction URL: {tx_url}")
-        end_time = time.time()
-        logger_info.info(
-            f"Time taken to complete the transaction: {end_time - start_time} seconds"
-        )
         return Response(
             {
                 "status": True,
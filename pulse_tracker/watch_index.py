@@ -0,0 +1,142 @@
+import logging
+import time
+from array import array
+from bisect import bisect_right
+from django.core.cache import cache
+
+from .models import WatchList
+from utils.versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+WATCH_INDEX_VERSION_KEY = "pulse_tracker:watch_index:{symbol}"
+WATCH_LIST_VERSION_KEY = "pulse_tracker:watch_list"
+
+# Symbols are reloaded at least this often, in case a version bump was lost
+# (e.g. evicted from the cache).
+WATCH_INDEX_MAX_AGE_SECONDS = 300
+
+
+class SymbolWatchers:
+    """
+    Watchers of one symbol and window stored column-wise and sorted by
+    threshold, so the watchers triggered by a price move are the prefix found
+    by one bisect.
+    """
+
+    __slots__ = (
+        "thresholds",
+        "uuids",
+        "chat_ids",
+        "contract_addresses",
+    )
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[1])
+        self.thresholds = array("d", [row[1] for row in rows])
+        self.uuids = [row[0] for row in rows]
+        self.chat_ids = [row[2] for row in rows]
+        self.contract_addresses = [row[3] for row in rows]
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def triggered(self, percentage):
+        """
+        Returns the positions of the watchers whose threshold is reached.
+        """
+        return range(bisect_right(self.thresholds, abs(percentage)))
+
+
+class WatchIndex:
+    """
+    In-memory per-symbol index of watchlist thresholds, split by the window
+    each watcher measures the price change over.
+
+    Every change to a symbol's watchlist bumps a version in the shared cache
+    (see pulse_tracker.signals); `refresh` reloads only the symbols whose
+    version moved, so each process keeps its index in sync incrementally.
+    """
+
+    def __init__(self):
+        self.watchers = {}
+        self.loaded = {}
+
+    def refresh(self, symbols):
+        """
+        Loads the given symbols if they are missing or out of date.
+        """
+        keys = {
+            WATCH_INDEX_VERSION_KEY.format(symbol=symbol): symbol for symbol in symbols
+        }
+        versions = cache.get_many(list(keys))
+        stale = {}
+        expired_at = time.monotonic() - WATCH_INDEX_MAX_AGE_SECONDS
+        for key, symbol in keys.items():
+            version = versions.get(key, 0)
+            loaded = self.loaded.get(symbol)
+            if loaded is None or loaded[0] != version or loaded[1] < expired_at:
+                stale[symbol] = version
+        if not stale:
+            return
+
+        rows = {symbol: {} for symbol in stale}
+        queryset = WatchList.objects.filter(symbol__in=list(stale)).values_list(
+            "symbol",
+            "window",
+            "uuid",
+            "percentage_change",
+            "telegram_user__telegram_user_id",
+            "contract_address",
+        )
+        for symbol, window, *row in queryset:
+            rows[symbol].setdefault(window, []).append(row)
+        loaded_at = time.monotonic()
+        for symbol, version in stale.items():
+            self.watchers[symbol] = {
+                window: SymbolWatchers(window_rows)
+                for window, window_rows in rows[symbol].items()
+            }
+            self.loaded[symbol] = (version, loaded_at)
+        logger_info.info(f"Watch index reloaded for {len(stale)} symbols.")
+
+    def windows(self, symbol):
+        """
+        Returns the windows watched on `symbol`.
+        """
+        return list(self.watchers.get(symbol, {}))
+
+    def triggered(self, symbol, percentage, window="24h"):
+        """
+        Returns (uuid, chat id, contract address) of every watcher of `symbol`
+        over `window` whose threshold is reached by `percentage`.
+        """
+        watchers = self.watchers.get(symbol, {}).get(window)
+        if watchers is None:
+            return []
+        return [
+            (
+                watchers.uuids[position],
+                watchers.chat_ids[position],
+                watchers.contract_addresses[position],
+            )
+            for position in watchers.triggered(percentage)
+        ]
+
+
+def bump_watch_index_version(symbol):
+    """
+    Marks a symbol's watchers, and the watchlist as a whole, as changed for
+    every process holding an index or a stream subscription.
+    """
+    bump_version(WATCH_INDEX_VERSION_KEY.format(symbol=symbol))
+    bump_version(WATCH_LIST_VERSION_KEY)
+
+
+def get_watch_list_version():
+    return get_version(WATCH_LIST_VERSION_KEY)
+
+
+watch_index = WatchIndex()
@@ -1,86 +1,165 @@
-import json
-import requests
+import logging
 import threading
-import websocket
+import time
 from django.conf import settings
-
-from utils.helper import get_watchlist_symbols
-
-
-def on_open(ws):
-    """
-    Handles WebSocket opening event.
-    """
-    print("opened connection")
-
-
-def on_close(ws, close_status_code, close_msg):
-    """
-    Handles WebSocket closing event.
-    """
-    print("closed connection")
-    ws.close()
-
-
-def on_error(ws, error):
-    """
-    Handles WebSocket error event.
-    """
-    print(error)
-    ws.close()
-
-
-def on_message(ws, message, symbol):
-    """
-    Handles incoming WebSocket messages.
-    """
-    json_message = json.loads(message)
-    percentage = float(
-        json_message["P"]
-    )  # 'P' is the percentage change in crypto price
-    if percentage >= 100 or percentage <= -100:
-        send_percentage_to_api(symbol, percentage)
-    print("connection closed")
-    ws.close()
-
-
-def send_percentage_to_api(symbol, percentage):
-    """
-    Sends the percentage change to the API.
-    """
-    url = f"{settings.BACKEND_URL}/api/notify/"
-    data = {"symbol": symbol, "percentage": percentage}
-    requests.post(url, data)
-
-
-def start_binance_websocket(symbol):
-    """
-    Starts a WebSocket connection to Binance for a given symbol.
-    """
-    socket = f"wss://stream.binance.com:9443/ws/{symbol}usdt@ticker"
-    ws = websocket.WebSocketApp(
-        socket,
-        on_open=on_open,
-        on_close=on_close,
-        on_message=lambda ws, message: on_message(ws, message, symbol),
-        on_error=on_error,
-    )
-    ws.run_forever()
-
-
-def run_in_thread(symbol):
-    """
-    Runs the WebSocket connection in a separate thread.
-    """
-    thread = threading.Thread(target=start_binance_websocket, args=(symbol,))
-    thread.daemon = True  # Daemonize thread to close when the main program exits
-    thread.start()
-
-
-def initialize_websockets():
-    """
-    Initializes WebSocket connections for all symbols in the watchlist.
-    """
-    symbols = get_watchlist_symbols()
-    for pair in symbols:
-        run_in_thread(pair.lower())
+from django.db import close_old_connections
+
+from .enums import PRICE_CHANGE_WINDOW_MINUTES, TICKER_WINDOW
+from .price_windows import RING_SIZE, PriceRing
+from .watch_index import get_watch_list_version, watch_index
+from utils.binance_stream import BinanceStreamClient
+from utils.helper import (
+    get_binance_minute_closes,
+    get_watchlist_symbols,
+    notify_watchers,
+)
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+
+class PulseTrackerStream:
+    """
+    Streams the 1m klines of every watchlist symbol over shared Binance
+    combined-stream connections into per-symbol price rings, and evaluates
+    the watchers of each window (5m, 1h, 4h) on every update. The 24h
+    watchers are left to the ticker sweep (see TICKER_WINDOW).
+
+    Subscriptions follow the watchlist: they are reconciled whenever a
+    WatchList row is added or deleted (and every reconcile interval anyway).
+    A new symbol's ring is seeded once from the klines endpoint, after which
+    no REST call is made for it.
+
+    Watchers newly reached by an update are notified straight from the
+    stream thread. Every flush interval the latest change of each symbol and
+    window is evaluated in one batch as well, which re-arms watchers whose
+    change fell back.
+    """
+
+    def __init__(self, flush_interval=None, reconcile_interval=None):
+        self.flush_interval = (
+            flush_interval or settings.PULSE_TRACKER_STREAM_FLUSH_SECONDS
+        )
+        self.reconcile_interval = (
+            reconcile_interval or settings.PULSE_TRACKER_STREAM_RECONCILE_SECONDS
+        )
+        self.client = BinanceStreamClient("pulse-tracker", self.on_data)
+        self.stream_symbols = {}
+        self.rings = {}
+        self.latest = {}
+        self.notified = set()
+        self.lock = threading.Lock()
+        self.version = None
+        self.reconciled_at = 0
+
+    def on_data(self, stream, data):
+        symbol = self.stream_symbols.get(stream)
+        if symbol is None:
+            return
+        kline = data["k"]
+        due = {}
+        with self.lock:
+            ring = self.rings.get(symbol)
+            if ring is None:
+                return
+            ring.update(kline["t"] // 60000, float(kline["c"]))
+            for window in watch_index.windows(symbol):
+                if window == TICKER_WINDOW:
+                    continue
+                percentage = ring.change(PRICE_CHANGE_WINDOW_MINUTES[window])
+                if percentage is None:
+                    continue
+                self.latest[(symbol, window)] = percentage
+                fresh = [
+                    uuid
+                    for uuid, _, _ in watch_index.triggered(symbol, percentage, window)
+                    if uuid not in self.notified
+                ]
+                if fresh:
+                    self.notified.update(fresh)
+                    due[window] = percentage
+        if not due:
+            return
+        # Called from the connection threads, whose database connection is
+        # not managed by a request or the run loop.
+        close_old_connections()
+        try:
+            for window, percentage in due.items():
+                try:
+                    notify_watchers({symbol: percentage}, window)
+                except Exception as e:
+                    logger_error.error(f"Pulse tracker stream {symbol} {window} : {e}")
+        finally:
+            close_old_connections()
+
+    def seed(self, symbol):
+        """
+        Builds the price ring of a symbol from its recent 1m klines.
+        """
+        ring = PriceRing()
+        try:
+            for minute, price in get_binance_minute_closes(symbol, RING_SIZE - 1):
+                ring.update(minute, price)
+        except Exception as e:
+            logger_error.error(f"Could not seed the price ring of {symbol} : {e}")
+        return ring
+
+    def reconcile(self):
+        """
+        Subscribes to the klines of every watchlist symbol and drops the rest.
+        """
+        version = get_watch_list_version()
+        if (
+            version == self.version
+            and time.monotonic() - self.reconciled_at < self.reconcile_interval
+        ):
+            return
+        symbols = get_watchlist_symbols()
+        watch_index.refresh(symbols)
+        rings = {
+            symbol: self.rings.get(symbol) or self.seed(symbol) for symbol in symbols
+        }
+        with self.lock:
+            self.rings = rings
+        self.stream_symbols = {
+            f"{symbol.lower()}usdt@kline_1m": symbol for symbol in symbols
+        }
+        self.client.set_streams(self.stream_symbols)
+        self.version = version
+        self.reconciled_at = time.monotonic()
+
+    def flush(self):
+        """
+        Evaluates every watcher of the symbols that ticked since the last flush.
+        """
+        with self.lock:
+            latest, self.latest = self.latest, {}
+        windows = {}
+        for (symbol, window), percentage in latest.items():
+            windows.setdefault(window, {})[symbol] = percentage
+        for window, price_changes in windows.items():
+            notify_watchers(price_changes, window)
+
+        notified = set()
+        for (symbol, window), percentage in latest.items():
+            notified.update(
+                uuid
+                for uuid, _, _ in watch_index.triggered(symbol, percentage, window)
+            )
+        with self.lock:
+            self.notified = notified
+
+    def run(self):
+        logger_info.info("Pulse tracker stream started.")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self.reconcile()
+                    self.flush()
+                except Exception as e:
+                    logger_error.error(f"Pulse tracker stream : {e}")
+                time.sleep(self.flush_interval)
+        finally:
+            self.client.stop()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import CryptoTrade, Recifi, RecifiToken
+from .models import CryptoTrade, Recifi, RecifiAlert, RecifiSnapshot, RecifiToken
 
 
 # Register your models here.
@@ -15,6 +15,8 @@ class CryptoTradeAdmin(admin.ModelAdmin):
         "quantity",
         "target_price",
         "status",
+        "claimed_at",
+        "tx_hash",
         "created_at",
     )
 
@@ -25,6 +27,7 @@ class RecifiAdmin(admin.ModelAdmin):
         "uuid",
         "name",
         "wallet_address",
+        "weight",
         "percentage_change_24hrs",
         "pecentage_change_7days",
         "percentage_change_30days",
@@ -35,4 +38,14 @@ class RecifiAdmin(admin.ModelAdmin):
 
 @admin.register(RecifiToken)
 class RecifiTokenAdmin(admin.ModelAdmin):
-    list_display = ("uuid", "Recifi", "token_address", "created_at")
+    list_display = ("uuid", "Recifi", "token_address", "last_bought_at", "created_at")
+
+
+@admin.register(RecifiSnapshot)
+class RecifiSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "Recifi", "taken_at", "total_quote", "created_at")
+
+
+@admin.register(RecifiAlert)
+class RecifiAlertAdmin(admin.ModelAdmin):
+    list_display = ("uuid", "token_address", "window", "window_start", "created_at")
@@ -6,6 +6,4 @@ class TradeConfig(AppConfig):
     name = "trade"
 
     def ready(self) -> None:
-        from .binance_websocket import run_in_thread
-
-        run_in_thread()
+        import trade.signals
@@ -0,0 +1,147 @@
+import logging
+from bitarray import bitarray
+from bitarray.util import count_and
+from datetime import datetime, timedelta
+from django.utils import timezone
+
+from .enums import CONSENSUS_WINDOW_MINUTES
+from .models import Recifi, RecifiToken
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+
+def get_window_start(now, window):
+    """
+    Floors `now` to the length of the consensus window.
+    """
+    seconds = CONSENSUS_WINDOW_MINUTES[window] * 60
+    return datetime.fromtimestamp(now.timestamp() // seconds * seconds, tz=now.tzinfo)
+
+
+class WhaleConsensus:
+    """
+    Which whales bought each token within each consensus window (15m, 1h,
+    6h, 24h), as one bitset over the whale indices per token and window.
+
+    The number of whales behind a token is a popcount, the whales common to
+    two windows or two tokens an AND, and weighted shares are popcounts of
+    the token's bitset ANDed with the mask of each whale weight.
+    """
+
+    def __init__(self, whales, now=None):
+        """
+        Args:
+            whales: (uuid, weight) of every whale.
+        """
+        self.now = now or timezone.now()
+        self.index = {}
+        self.masks = {}
+        self.size = len(whales)
+        for position, (uuid, weight) in enumerate(whales):
+            self.index[uuid] = position
+            if weight not in self.masks:
+                self.masks[weight] = self.empty()
+            self.masks[weight][position] = 1
+        self.total_weight = sum(
+            weight * mask.count() for weight, mask in self.masks.items()
+        )
+        self.windows = {window: {} for window in CONSENSUS_WINDOW_MINUTES}
+        self.cutoffs = {
+            window: self.now - timedelta(minutes=minutes)
+            for window, minutes in CONSENSUS_WINDOW_MINUTES.items()
+        }
+
+    @classmethod
+    def load(cls):
+        """
+        Builds the bitsets from the (whale, token) pairs bought within the
+        longest window, read with one query.
+        """
+        consensus = cls(list(Recifi.objects.values_list("uuid", "weight")))
+        pairs = RecifiToken.objects.filter(
+            last_bought_at__gte=min(consensus.cutoffs.values())
+        ).values_list("Recifi_id", "token_address", "last_bought_at")
+        for whale_id, token_address, last_bought_at in pairs:
+            consensus.add(whale_id, token_address, last_bought_at)
+        return consensus
+
+    def empty(self):
+        bits = bitarray(self.size)
+        bits.setall(0)
+        return bits
+
+    def add(self, whale_id, token_address, bought_at):
+        """
+        Records a buy of `token_address` by a whale in every window it falls in.
+        """
+        position = self.index.get(whale_id)
+        if position is None:
+            return
+        for window, cutoff in self.cutoffs.items():
+            if bought_at >= cutoff:
+                tokens = self.windows[window]
+                if token_address not in tokens:
+                    tokens[token_address] = self.empty()
+                tokens[token_address][position] = 1
+
+    def tokens(self, window):
+        return self.windows[window].keys()
+
+    def count(self, token_address, window):
+        """
+        Number of whales that bought the token within the window.
+        """
+        bits = self.windows[window].get(token_address)
+        return bits.count() if bits is not None else 0
+
+    def overlap(self, token_address, window, other_window):
+        """
+        Number of whales that bought the token within both windows.
+        """
+        bits = self.windows[window].get(token_address)
+        other = self.windows[other_window].get(token_address)
+        if bits is None or other is None:
+            return 0
+        return count_and(bits, other)
+
+    def share(self, token_address, window):
+        """
+        Weighted percentage of whales that bought the token within the window.
+        """
+        bits = self.windows[window].get(token_address)
+        if bits is None or not self.total_weight:
+            return 0
+        weight = sum(
+            weight * count_and(bits, mask) for weight, mask in self.masks.items()
+        )
+        return round(weight / self.total_weight * 100, 2)
+
+    def rank(self, window):
+        """
+        Returns the (token, weighted share) of the window, highest first.
+        """
+        return sorted(
+            ((token, self.share(token, window)) for token in self.tokens(window)),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def triggered(self, thresholds):
+        """
+        Returns the windows in which each token's weighted share is above the
+        window's threshold (a percentage), for the tokens above any.
+
+        Returns:
+            dict: token address -> {window: share}, windows shortest first.
+        """
+        alerts = {}
+        for window, threshold in sorted(
+            thresholds.items(), key=lambda item: CONSENSUS_WINDOW_MINUTES[item[0]]
+        ):
+            for token in self.tokens(window):
+                share = self.share(token, window)
+                if share > threshold:
+                    alerts.setdefault(token, {})[window] = share
+        return alerts
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+
+from .executor import execute_triggered_trades
+from .trigger_book import trigger_book
+from utils.binance_stream import BinanceStreamConnection, extract_field
+from utils.metrics import record_gauges
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+TRADE_ENGINE_GAUGE = "trade_engine"
+
+# Fields holding the price of each feed; bookTicker is priced at the middle
+# of the best bid and ask.
+FEED_PRICE_FIELDS = {
+    "kline_1m": ("c",),
+    "aggTrade": ("p",),
+    "bookTicker": ("b", "a"),
+}
+
+
+class TradeEngine:
+    """
+    Owns the ETH/USDT price feed and executes the triggered trades in the
+    same process, without going through the execute-trade API.
+
+    The feed is the kline close, the aggregated trades or the best bid and
+    ask (TRADE_ENGINE_FEED). The websocket thread only picks the price out
+    of the raw message, stores it as the latest tick and wakes the engine
+    thread. The engine evaluates at most once per TRADE_ENGINE_COALESCE_MS
+    with the latest price, so bursts of ticks and slow executions never
+    back up the feed: ticks received in the meantime are superseded.
+
+    A heartbeat with the feed state and the last tick's latencies is written
+    to the shared cache every TRADE_ENGINE_HEARTBEAT_SECONDS, where the
+    trade engine health endpoint reads it.
+    """
+
+    def __init__(self, symbol="ethusdt", feed=None, coalesce_ms=None):
+        feed = feed or settings.TRADE_ENGINE_FEED
+        self.price_fields = FEED_PRICE_FIELDS[feed]
+        self.coalesce_interval = (
+            settings.TRADE_ENGINE_COALESCE_MS if coalesce_ms is None else coalesce_ms
+        ) / 1000
+        self.connection = BinanceStreamConnection(
+            "trade-engine", self.on_data, raw=True
+        )
+        self.connection.subscribe([f"{symbol}@{feed}"])
+        self.lock = threading.Lock()
+        self.ticked = threading.Event()
+        self.tick = None
+        self.stats = {
+            "started_at": time.time(),
+            "ticks": 0,
+            "evaluated": 0,
+            "superseded": 0,
+            "last_price": None,
+            "last_tick_at": None,
+            "feed_lag": None,
+            "last_summary": None,
+        }
+        self.heartbeat_at = 0
+        self.evaluated_at = 0
+
+    def on_data(self, message):
+        received_at = time.time()
+        prices = [extract_field(message, field) for field in self.price_fields]
+        price = sum(float(price) for price in prices) / len(prices)
+        event_time = extract_field(message, "E")
+        with self.lock:
+            if self.tick is not None:
+                self.stats["superseded"] += 1
+            self.tick = (price, received_at, event_time)
+            self.stats["ticks"] += 1
+        self.ticked.set()
+
+    def evaluate(self):
+        with self.lock:
+            tick, self.tick = self.tick, None
+            self.ticked.clear()
+        if tick is None:
+            return
+        price, received_at, event_time = tick
+        close_old_connections()
+        summary = execute_triggered_trades(price, received_at)
+        self.stats.update(
+            {
+                "evaluated": self.stats["evaluated"] + 1,
+                "last_price": price,
+                "last_tick_at": received_at,
+            }
+        )
+        if event_time is not None:
+            self.stats["feed_lag"] = round(received_at - int(event_time) / 1000, 3)
+        if summary["triggered"]:
+            self.stats["last_summary"] = summary
+            logger_info.info(
+                f"Trade engine tick {price}: {summary['executed']} executed, "
+                f"{summary['failed']} failed, tick to broadcast p50 {summary['latency_p50']}s "
+                f"max {summary['latency_max']}s."
+            )
+
+    def heartbeat(self):
+        record_gauges(
+            TRADE_ENGINE_GAUGE,
+            {
+                **self.stats,
+                "feed_connected": self.connection.is_open,
+                "open_trades": len(trigger_book),
+                "heartbeat_at": time.time(),
+            },
+        )
+        self.heartbeat_at = time.monotonic()
+
+    def run(self):
+        logger_info.info("Trade engine started.")
+        trigger_book.load()
+        self.connection.start()
+        try:
+            while True:
+                self.ticked.wait(settings.TRADE_ENGINE_HEARTBEAT_SECONDS)
+                delay = self.evaluated_at + self.coalesce_interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.evaluated_at = time.monotonic()
+                try:
+                    self.evaluate()
+                except Exception as e:
+                    logger_error.error(f"Trade engine : {e}")
+                if (
+                    time.monotonic() - self.heartbeat_at
+                    >= settings.TRADE_ENGINE_HEARTBEAT_SECONDS
+                ):
+                    try:
+                        self.heartbeat()
+                    except Exception as e:
+                        logger_error.error(f"Trade engine heartbeat : {e}")
+        finally:
+            self.connection.stop()
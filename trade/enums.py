@@ -9,4 +9,21 @@ TradeStatusChoices = (
     ("failed", "Failed"),
     ("in_process", "In Process"),
     ("cancelled", "Cancelled"),
+    ("needs_review", "Needs Review"),
 )
+
+# Length of each whale consensus window in minutes.
+CONSENSUS_WINDOW_MINUTES = {
+    "15m": 15,
+    "1h": 60,
+    "6h": 360,
+    "24h": 1440,
+}
+
+# Length of each portfolio window of the whale wallets in hours.
+PORTFOLIO_WINDOW_HOURS = {
+    "1d": 24,
+    "7d": 24 * 7,
+    "1m": 24 * 30,
+    "1y": 24 * 365,
+}
@@ -0,0 +1,252 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CryptoTrade
+from .trigger_book import trigger_book
+from utils.encryption import decrypt_text
+from utils.helper import queue_buy_sell_notification
+from utils.metrics import record_gauges, span, timing_breakdown
+from utils.w3 import sell_eth_for_usdt, buy_eth_from_usdt
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+EXECUTED = "executed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Swap backend of each trade type, replaced by a stub when replaying ticks.
+SWAPS = {
+    "buy": buy_eth_from_usdt,
+    "sell": sell_eth_for_usdt,
+}
+
+_pool = None
+
+
+def get_pool():
+    """
+    Returns the process-wide pool that executes the wallets of a tick.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.TRADE_EXECUTION_WORKERS,
+            thread_name_prefix="trade-executor",
+        )
+    return _pool
+
+
+def claim_trade(uuid, close_price):
+    """
+    Move one open trade crossed by `close_price` to in_process with a lease,
+    in a transaction that lasts only as long as the two queries.
+
+    Returns:
+        CryptoTrade: The claimed trade, or None if it is gone, locked by
+        another executor or no longer crossed.
+    """
+    with transaction.atomic():
+        trade = (
+            CryptoTrade.objects.select_for_update(skip_locked=True)
+            .select_related("user_wallet", "telegram_user")
+            .filter(uuid=uuid, status="open")
+            .first()
+        )
+        if trade is None:
+            return None
+        if not (
+            (trade.trade_type == "buy" and trade.target_price >= close_price)
+            or (trade.trade_type == "sell" and trade.target_price <= close_price)
+        ):
+            return None
+        trade.status = "in_process"
+        trade.claimed_at = timezone.now()
+        trade.save(update_fields=["status", "claimed_at", "updated_at"])
+    return trade
+
+
+def execute_trade(uuid, close_price, tick_at=None):
+    """
+    Claim, execute and settle one triggered trade.
+
+    Only the claim and the final status update run in (short) transactions;
+    the swap's RPC round trips hold no row lock nor open transaction. The
+    swap's hash is committed once signed, before it is broadcast (see
+    record_swap_hash). A trade whose executor dies or fails in between stays
+    in_process until its lease expires, and trade.tasks.
+    reap_expired_trade_claims then settles it without ever re-opening it.
+
+    Returns:
+        tuple: (EXECUTED, FAILED or SKIPPED, seconds from the tick, or from
+        the start when no tick time is given, to the swap's broadcast).
+    """
+    start_time = time.time()
+    tick_at = tick_at or start_time
+    with timing_breakdown("trade", label=str(uuid)):
+        with span("trade.claim"):
+            trade = claim_trade(uuid, close_price)
+        if trade is None:
+            return SKIPPED, time.time() - tick_at
+
+        if trade.trade_type == "buy":
+            logger_info.info(f"Buying ETH from USDT. Close price: {close_price}")
+        else:
+            logger_info.info(f"Selling ETH for USDT. Close price: {close_price}")
+        swap = SWAPS[trade.trade_type]
+        with span("trade.decrypt"):
+            private_key = decrypt_text(trade.user_wallet.private_key)
+        with span("trade.swap"):
+            result = swap(
+                amount_eth=trade.quantity,
+                target_price=trade.target_price,
+                private_key=private_key,
+                current_price=close_price,
+                on_signed=lambda tx_hash: record_swap_hash(trade, tx_hash),
+            )
+        broadcast_latency = time.time() - tick_at
+
+        with span("trade.finalize"), transaction.atomic():
+            if result and result[0]:
+                handle_successful_trade(trade, result, close_price, start_time)
+                outcome = EXECUTED
+            else:
+                handle_failed_trade(trade, result)
+                outcome = FAILED
+    return outcome, broadcast_latency
+
+
+def record_swap_hash(trade, tx_hash):
+    """
+    Commits the hash of a claimed trade's swap before it is broadcast, so a
+    trade that may have been broadcast is never executed again.
+    """
+    CryptoTrade.objects.filter(uuid=trade.uuid).update(
+        tx_hash=tx_hash, updated_at=timezone.now()
+    )
+    trade.tx_hash = tx_hash
+
+
+def handle_successful_trade(trade, execute_trade, close_price, start_time):
+    trade.status = "closed"
+    trade.tx_hash = execute_trade[1]
+    trade.save(update_fields=["status", "tx_hash", "updated_at"])
+    trade_type = "bought" if trade.trade_type == "buy" else "sold"
+    user = trade.telegram_user.telegram_user_id
+    if trade.trade_type == "sell":
+        message = (
+            f"Hey user 👋, your transaction has been executed ✅. You can track status "
+            f"of the transaction here on Etherscan 🔗{settings.TRANSACTION_HASH_URL}{execute_trade[1]}\n"
+            f"{trade.quantity} ETH {trade_type} successfully at {close_price} price.🕵️‍♂️"
+        )
+    elif trade.trade_type == "buy":
+        message = (
+            f"Hey user 👋, your transaction has been executed ✅. You can track status "
+            f"of the transaction here on Etherscan 🔗{settings.TRANSACTION_HASH_URL}{execute_trade[1]}\n"
+            f"ETH {trade_type} successfully using {trade.quantity} USDT at {close_price} price."
+        )
+    else:
+        message = ""
+    queue_buy_sell_notification(user, message)
+    end_time = time.time()
+    logger_info.info(
+        f"Trade {trade.uuid} executed successfully in {end_time - start_time} seconds."
+    )
+
+
+def handle_failed_trade(trade, execute_trade):
+    # A swap that was signed may have reached the chain despite the error.
+    trade.status = "needs_review" if trade.tx_hash else "failed"
+    trade.save(update_fields=["status", "updated_at"])
+    logger_info.info(
+        f"Trade {trade.uuid} execution failed. {execute_trade[1] if execute_trade else 'Unknown error'}"
+    )
+
+
+def execute_wallet_trades(uuids, close_price, tick_at=None, close_connection=True):
+    """
+    Execute the triggered trades of one wallet one after the other, so two
+    transactions from the same wallet never race for a nonce.
+    """
+    results = []
+    try:
+        for uuid in uuids:
+            try:
+                results.append(execute_trade(uuid, close_price, tick_at))
+            except Exception as e:
+                logger_error.error(f"Trade {uuid} execution error : {e}")
+                results.append((FAILED, 0))
+    finally:
+        if close_connection:
+            connection.close()
+    return results
+
+
+def execute_triggered_trades(close_price, tick_at=None, record=True):
+    """
+    Execute every open trade crossed by `close_price`, received at `tick_at`
+    (a time.time() value).
+
+    The crossed trades come from the trigger book and are grouped by wallet.
+    Wallets run concurrently on a bounded thread pool (inline when
+    TRADE_EXECUTION_WORKERS is 1), and every trade commits independently.
+    The summary of a tick that triggered trades is stored as the
+    "trade_tick" gauge group unless `record` is False.
+
+    Returns:
+        dict: Counts of triggered, executed, failed and skipped trades, the
+        tick's duration and the tick-to-broadcast latencies in seconds.
+    """
+    start = time.time()
+    tick_at = tick_at or start
+    trigger_book.sync()
+    wallets = {}
+    for order in trigger_book.crossed(close_price):
+        wallets.setdefault(order.wallet_id, []).append(order.uuid)
+    summary = {
+        "open": len(trigger_book),
+        "triggered": sum(len(uuids) for uuids in wallets.values()),
+        EXECUTED: 0,
+        FAILED: 0,
+        SKIPPED: 0,
+    }
+    if not wallets:
+        return summary
+
+    if settings.TRADE_EXECUTION_WORKERS <= 1:
+        results = [
+            execute_wallet_trades(uuids, close_price, tick_at, close_connection=False)
+            for uuids in wallets.values()
+        ]
+    else:
+        pool = get_pool()
+        futures = [
+            pool.submit(execute_wallet_trades, uuids, close_price, tick_at)
+            for uuids in wallets.values()
+        ]
+        results = [future.result() for future in futures]
+
+    latencies = []
+    for wallet_results in results:
+        for outcome, duration in wallet_results:
+            summary[outcome] += 1
+            if outcome != SKIPPED:
+                latencies.append(duration)
+    latencies.sort()
+    summary.update(
+        {
+            "price": close_price,
+            "wallets": len(wallets),
+            "duration": round(time.time() - start, 3),
+            "latency_p50": round(latencies[len(latencies) // 2], 3) if latencies else 0,
+            "latency_max": round(latencies[-1], 3) if latencies else 0,
+        }
+    )
+    if record:
+        record_gauges("trade_tick", summary)
+    return summary
@@ -0,0 +1,56 @@
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils.covalent import get_wallet_holdings
+from utils.quota import USER_LANE
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+HOLDINGS_PREFIX = "trade:holdings"
+
+
+def get_holdings_key(wallet_address):
+    return f"{HOLDINGS_PREFIX}:{wallet_address.lower()}"
+
+
+def store_holdings(holdings, fetched_at):
+    """
+    Stores the top holdings of Recifi whales, as fetched at `fetched_at`,
+    for RECIFI_HOLDINGS_CACHE_SECONDS.
+
+    Args:
+        holdings: wallet address -> top holdings (see get_top_holdings).
+    """
+    cache.set_many(
+        {
+            get_holdings_key(wallet_address): {
+                "holdings": wallet_holdings,
+                "fetched_at": fetched_at,
+            }
+            for wallet_address, wallet_holdings in holdings.items()
+        },
+        settings.RECIFI_HOLDINGS_CACHE_SECONDS,
+    )
+
+
+def get_holdings(wallet_address):
+    """
+    Returns the top holdings of a Recifi whale stored by the hourly portfolio
+    sweep, fetching and storing them from Covalent, in the user lane of the
+    shared Covalent quota, when none are stored.
+
+    Returns:
+        dict: {"holdings", "fetched_at"}.
+    """
+    entry = cache.get(get_holdings_key(wallet_address))
+    if entry is None:
+        logger_info.info(f"Holdings of {wallet_address} not cached, fetching them.")
+        fetched_at = timezone.now()
+        holdings = get_wallet_holdings(wallet_address, USER_LANE)
+        store_holdings({wallet_address: holdings}, fetched_at)
+        entry = {"holdings": holdings, "fetched_at": fetched_at}
+    return entry
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Recifi
+from .serializers import recifierializer
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+LEADERBOARDS_KEY = "trade:leaderboards"
+LEADERBOARD_SIZE = 5
+
+GAINERS = "gainers"
+LOSERS = "losers"
+
+# Recifi field ranked by each leaderboard duration.
+LEADERBOARD_FIELDS = {
+    "1d": "percentage_change_24hrs",
+    "7d": "pecentage_change_7days",
+    "1m": "percentage_change_30days",
+    "1y": "pecentage_change_1year",
+}
+
+
+def get_leaderboard_key(board_type, duration):
+    """
+    Returns the leaderboard served for the query parameters of the Recifi
+    whale endpoint: gainers unless losers are asked for, over 24 hours
+    unless another known duration is.
+    """
+    return (
+        LOSERS if board_type == LOSERS else GAINERS,
+        duration if duration in LEADERBOARD_FIELDS else "1d",
+    )
+
+
+def build_leaderboards():
+    """
+    Ranks the Recifi whales by each percentage change, both ways, and stores
+    the top LEADERBOARD_SIZE of every leaderboard as a ready-to-send payload
+    with an ETag derived from its content, for
+    RECIFI_LEADERBOARDS_CACHE_SECONDS.
+
+    Returns:
+        dict: (gainers or losers, duration) -> {"etag", "data"}.
+    """
+    wallets = list(
+        Recifi.objects.only("name", "wallet_address", *LEADERBOARD_FIELDS.values())
+    )
+    leaderboards = {}
+    for duration, field in LEADERBOARD_FIELDS.items():
+        ranked = sorted(
+            (wallet for wallet in wallets if getattr(wallet, field) is not None),
+            key=lambda wallet: getattr(wallet, field),
+        )
+        for board_type, top in (
+            (LOSERS, ranked[:LEADERBOARD_SIZE]),
+            (GAINERS, ranked[::-1][:LEADERBOARD_SIZE]),
+        ):
+            data = [
+                {
+                    "name": row["name"],
+                    "wallet_address": row["wallet_address"],
+                    "percentage_change": row[field],
+                }
+                for row in recifierializer(top, many=True).data
+            ]
+            etag = hashlib.sha1(
+                json.dumps(data, cls=JSONEncoder).encode()
+            ).hexdigest()[:16]
+            leaderboards[(board_type, duration)] = {"etag": etag, "data": data}
+    cache.set(
+        LEADERBOARDS_KEY, leaderboards, settings.RECIFI_LEADERBOARDS_CACHE_SECONDS
+    )
+    logger_info.info(f"Recifi leaderboards built from {len(wallets)} whales.")
+    return leaderboards
+
+
+def get_leaderboard(board_type, duration):
+    """
+    Returns one stored leaderboard, building them all if none is stored.
+    """
+    leaderboards = cache.get(LEADERBOARDS_KEY)
+    if leaderboards is None:
+        leaderboards = build_leaderboards()
+    return leaderboards[get_leaderboard_key(board_type, duration)]
+
+
+def clear_leaderboards():
+    """
+    Drops the stored leaderboards after a whale was added, edited or removed,
+    so the next request rebuilds them.
+    """
+    cache.delete(LEADERBOARDS_KEY)
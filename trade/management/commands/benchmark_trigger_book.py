@@ -0,0 +1,82 @@
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+
+from trade.trigger_book import Order, TriggerBook, TriggerSide
+
+MARKET_PRICE = 3000
+
+
+class Command(BaseCommand):
+    help = "Benchmark the trade trigger book against a linear scan of open trades."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=100000)
+        parser.add_argument("--ticks", type=int, default=1000)
+        parser.add_argument("--updates", type=int, default=1000)
+
+    def random_order(self, order_uuid):
+        """
+        Buys are placed below the market price and sells above it, spread
+        over +/- 50%.
+        """
+        trade_type = random.choice(["buy", "sell"])
+        distance = random.uniform(0, MARKET_PRICE / 2)
+        if trade_type == "buy":
+            distance = -distance
+        return Order(
+            order_uuid, trade_type, round(MARKET_PRICE + distance, 2), uuid.uuid4()
+        )
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        orders = [self.random_order(uuid.uuid4()) for _ in range(options["orders"])]
+
+        start = time.perf_counter()
+        book = TriggerBook()
+        book.sides = {
+            trade_type: TriggerSide(
+                side.sign,
+                (order for order in orders if order.trade_type == trade_type),
+            )
+            for trade_type, side in book.sides.items()
+        }
+        book.orders = {order.uuid: order for order in orders}
+        build_time = time.perf_counter() - start
+
+        ticks = [random.gauss(MARKET_PRICE, 20) for _ in range(options["ticks"])]
+
+        start = time.perf_counter()
+        indexed = 0
+        for price in ticks:
+            indexed += len(book.crossed(price))
+        book_time = (time.perf_counter() - start) / len(ticks)
+
+        start = time.perf_counter()
+        scanned = 0
+        for price in ticks:
+            for order in orders:
+                if (order.trade_type == "buy" and order.target_price >= price) or (
+                    order.trade_type == "sell" and order.target_price <= price
+                ):
+                    scanned += 1
+        scan_time = (time.perf_counter() - start) / len(ticks)
+
+        start = time.perf_counter()
+        for order in random.sample(orders, options["updates"]):
+            order = self.random_order(order.uuid)
+            book.apply(
+                order.uuid, order.trade_type, order.target_price, order.wallet_id, "open"
+            )
+        update_time = (time.perf_counter() - start) / options["updates"]
+
+        if indexed != scanned:
+            self.stderr.write(f"Mismatch: book {indexed}, scan {scanned}")
+        self.stdout.write(
+            f"{options['orders']} open orders\n"
+            f"book build  : {build_time * 1000:.1f} ms\n"
+            f"book tick   : {book_time * 1000:.3f} ms ({indexed // len(ticks)} crossed)\n"
+            f"linear scan : {scan_time * 1000:.3f} ms\n"
+            f"book update : {update_time * 1000000:.1f} us"
+        )
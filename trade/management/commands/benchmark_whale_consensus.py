@@ -0,0 +1,90 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trade.consensus import WhaleConsensus
+from trade.enums import CONSENSUS_WINDOW_MINUTES
+
+
+class Command(BaseCommand):
+    help = "Benchmark the whale consensus bitsets against per-token whale sets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--whales", type=int, default=5000)
+        parser.add_argument("--tokens", type=int, default=5000)
+        parser.add_argument(
+            "--buys", type=int, default=200000, help="(whale, token) pairs in 24h."
+        )
+
+    def handle(self, *args, **options):
+        random.seed(7)
+        now = timezone.now()
+        whales = [
+            (uuid.uuid4(), random.choice([1, 1, 1, 2, 5]))
+            for _ in range(options["whales"])
+        ]
+        tokens = [f"0x{index:040x}" for index in range(options["tokens"])]
+        buys = [
+            (
+                random.choice(whales)[0],
+                # Half of the buys go to a few popular tokens.
+                tokens[min(int(random.paretovariate(1)) - 1, len(tokens) - 1)]
+                if random.random() < 0.5
+                else random.choice(tokens),
+                now - timedelta(minutes=random.uniform(0, 1440)),
+            )
+            for _ in range(options["buys"])
+        ]
+
+        start = time.perf_counter()
+        consensus = WhaleConsensus(whales, now=now)
+        for buy in buys:
+            consensus.add(*buy)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranked = {window: consensus.rank(window) for window in CONSENSUS_WINDOW_MINUTES}
+        rank_time = time.perf_counter() - start
+
+        # The same ranking from one set of whales per token and window.
+        start = time.perf_counter()
+        weights = dict(whales)
+        total_weight = sum(weights.values())
+        sets = {window: {} for window in CONSENSUS_WINDOW_MINUTES}
+        for whale, token, bought_at in buys:
+            for window, minutes in CONSENSUS_WINDOW_MINUTES.items():
+                if bought_at >= now - timedelta(minutes=minutes):
+                    sets[window].setdefault(token, set()).add(whale)
+        expected = {
+            window: sorted(
+                (
+                    (
+                        token,
+                        round(
+                            sum(weights[whale] for whale in holders) / total_weight * 100,
+                            2,
+                        ),
+                    )
+                    for token, holders in token_sets.items()
+                ),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+            for window, token_sets in sets.items()
+        }
+        set_time = time.perf_counter() - start
+
+        for window in CONSENSUS_WINDOW_MINUTES:
+            if dict(ranked[window]) != dict(expected[window]):
+                self.stderr.write(f"Mismatch in the {window} window")
+        top = ranked["1h"][:3]
+        self.stdout.write(
+            f"{options['whales']} whales, {options['tokens']} tokens, {options['buys']} buys\n"
+            f"bitset build : {build_time * 1000:.1f} ms\n"
+            f"bitset rank  : {rank_time * 1000:.1f} ms for {len(CONSENSUS_WINDOW_MINUTES)} windows\n"
+            f"set rank     : {set_time * 1000:.1f} ms (build included)\n"
+            f"top 1h       : {top}"
+        )
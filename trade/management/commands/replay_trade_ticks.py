@@ -0,0 +1,200 @@
+import csv
+import math
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from accounts.models import TelegramUser, UserWallet
+from trade import executor
+from trade.models import CryptoTrade
+from trade.trigger_book import trigger_book
+from utils.encryption import encrypt_text
+
+
+class Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries of the current tick.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def stub_swap(amount_eth, target_price, private_key, current_price, on_signed=None):
+    """
+    Execution backend of the replay: succeeds instantly without any RPC.
+    """
+    tx_hash = f"0x{random.getrandbits(256):064x}"
+    if on_signed is not None:
+        on_signed(tx_hash)
+    return True, tx_hash
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay recorded or generated ETH/USDT ticks through the trade trigger "
+        "path against synthetic open trades, with a stubbed swap backend. "
+        "Every row written is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--csv",
+            help="Ticks to replay: Binance kline CSV (the close is used) or "
+            "'timestamp_ms,price' rows. Ticks are generated when omitted.",
+        )
+        parser.add_argument("--ticks", type=int, default=10000)
+        parser.add_argument("--interval-ms", type=int, default=100)
+        parser.add_argument("--start-price", type=float, default=3000)
+        parser.add_argument(
+            "--volatility",
+            type=float,
+            default=0.0005,
+            help="Standard deviation of the relative change between two generated ticks.",
+        )
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--wallets", type=int, default=100)
+        parser.add_argument(
+            "--spread",
+            type=float,
+            default=0.05,
+            help="Targets are spread over +/- this fraction of the first price.",
+        )
+        parser.add_argument("--seed", type=int, default=7)
+
+    def read_ticks(self, path):
+        ticks = []
+        with open(path, newline="") as file:
+            for row in csv.reader(file):
+                try:
+                    timestamp = int(float(row[0]))
+                    price = float(row[4] if len(row) >= 5 else row[1])
+                except (ValueError, IndexError):
+                    # Header or malformed row.
+                    continue
+                ticks.append((timestamp, price))
+        if not ticks:
+            raise CommandError(f"No ticks found in {path}.")
+        return ticks
+
+    def generate_ticks(self, count, interval_ms, start_price, volatility):
+        ticks = []
+        price = start_price
+        timestamp = int(time.time() * 1000)
+        for _ in range(count):
+            price *= math.exp(random.gauss(0, volatility))
+            ticks.append((timestamp, round(price, 2)))
+            timestamp += interval_ms
+        return ticks
+
+    def create_book(self, orders, wallets, price, spread):
+        user = TelegramUser.objects.create(
+            telegram_user_id=f"replay-{random.getrandbits(64)}"
+        )
+        private_key = encrypt_text(f"0x{random.getrandbits(256):064x}")
+        user_wallets = UserWallet.objects.bulk_create(
+            [
+                UserWallet(
+                    telegram_user=user,
+                    wallet_name=f"replay-{index}",
+                    wallet_address=f"0x{index:040x}",
+                    private_key=private_key,
+                )
+                for index in range(wallets)
+            ]
+        )
+        trades = []
+        for _ in range(orders):
+            trade_type = random.choice(["buy", "sell"])
+            distance = random.uniform(0, price * spread)
+            target_price = price - distance if trade_type == "buy" else price + distance
+            trades.append(
+                CryptoTrade(
+                    telegram_user=user,
+                    user_wallet=random.choice(user_wallets),
+                    trade_type=trade_type,
+                    quantity=0.01,
+                    target_price=round(target_price, 2),
+                )
+            )
+        CryptoTrade.objects.bulk_create(trades, batch_size=1000)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        if options["csv"]:
+            ticks = self.read_ticks(options["csv"])
+        else:
+            ticks = self.generate_ticks(
+                options["ticks"],
+                options["interval_ms"],
+                options["start_price"],
+                options["volatility"],
+            )
+
+        swaps = dict(executor.SWAPS)
+        executor.SWAPS.update({"buy": stub_swap, "sell": stub_swap})
+        try:
+            # Trades run inline so they see the uncommitted synthetic rows.
+            with override_settings(TRADE_EXECUTION_WORKERS=1):
+                with transaction.atomic():
+                    self.create_book(
+                        options["orders"],
+                        options["wallets"],
+                        ticks[0][1],
+                        options["spread"],
+                    )
+                    trigger_book.load()
+                    report = self.replay(ticks)
+                    raise Rollback
+        except Rollback:
+            pass
+        finally:
+            executor.SWAPS.update(swaps)
+            trigger_book.load()
+        self.stdout.write(report)
+
+    def replay(self, ticks):
+        durations = []
+        queries = []
+        triggered = executed = 0
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for timestamp, price in ticks:
+                counter.count = 0
+                tick_start = time.perf_counter()
+                summary = executor.execute_triggered_trades(price, record=False)
+                durations.append(time.perf_counter() - tick_start)
+                queries.append(counter.count)
+                triggered += summary["triggered"]
+                executed += summary["executed"]
+        elapsed = time.perf_counter() - start
+
+        durations.sort()
+        span = (ticks[-1][0] - ticks[0][0]) / 1000
+        return (
+            f"{len(ticks)} ticks over {span:.0f}s of market time replayed in {elapsed:.2f}s "
+            f"({span / elapsed if elapsed else 0:.0f}x real time)\n"
+            f"trades      : {triggered} triggered, {executed} executed, "
+            f"{triggered / elapsed if elapsed else 0:.0f} triggers/s\n"
+            f"queries     : {sum(queries) / len(queries):.2f} per tick, {max(queries)} max\n"
+            f"tick time   : p50 {percentile(durations, 0.5) * 1000:.3f} ms, "
+            f"p99 {percentile(durations, 0.99) * 1000:.3f} ms, "
+            f"max {durations[-1] * 1000:.3f} ms"
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from trade.engine import FEED_PRICE_FIELDS, TradeEngine
+
+
+class Command(BaseCommand):
+    help = "Stream the ETH/USDT price from Binance and execute triggered trades in-process."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--feed",
+            choices=list(FEED_PRICE_FIELDS),
+            help="Price feed, TRADE_ENGINE_FEED by default.",
+        )
+        parser.add_argument(
+            "--coalesce-ms",
+            type=int,
+            help="Minimum milliseconds between two evaluations, TRADE_ENGINE_COALESCE_MS by default.",
+        )
+
+    def handle(self, *args, **options):
+        TradeEngine(feed=options["feed"], coalesce_ms=options["coalesce_ms"]).run()
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:24
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0010_alter_deepwhale_pecentage_change_1year_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockCursor',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('block_number', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
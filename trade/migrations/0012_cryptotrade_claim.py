@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0011_blockcursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cryptotrade',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cryptotrade',
+            name='tx_hash',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
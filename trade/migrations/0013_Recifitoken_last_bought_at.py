@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def merge_duplicate_tokens(apps, schema_editor):
+    RecifiToken = apps.get_model("trade", "RecifiToken")
+
+    seen = set()
+    duplicates = []
+    for token in RecifiToken.objects.order_by("-created_at"):
+        key = (token.Recifi_id, token.token_address)
+        if key in seen:
+            duplicates.append(token.uuid)
+            continue
+        seen.add(key)
+        token.last_bought_at = token.created_at
+        token.save(update_fields=["last_bought_at"])
+    RecifiToken.objects.filter(uuid__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0012_cryptotrade_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recifitoken',
+            name='last_bought_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(merge_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='recifitoken',
+            constraint=models.UniqueConstraint(fields=('Recifi', 'token_address'), name='unique_Recifi_token'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0013_Recifitoken_last_bought_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recifi',
+            name='weight',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+    ]
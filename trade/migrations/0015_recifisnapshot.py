@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:53
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0014_recifi_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecifiSnapshot',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('taken_at', models.DateTimeField()),
+                ('total_quote', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('Recifi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='Recifi_snapshot', to='trade.recifi')),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recifisnapshot',
+            constraint=models.UniqueConstraint(fields=('Recifi', 'taken_at'), name='unique_Recifi_snapshot'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0015_recifisnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cryptotrade',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('closed', 'Closed'), ('failed', 'Failed'), ('in_process', 'In Process'), ('cancelled', 'Cancelled'), ('needs_review', 'Needs Review')], default='open', max_length=50),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 14:14
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trade', '0016_cryptotrade_needs_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecifiAlert',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('token_address', models.CharField(max_length=42)),
+                ('window', models.CharField(max_length=10)),
+                ('window_start', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-window_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recifialert',
+            constraint=models.UniqueConstraint(fields=('token_address', 'window', 'window_start'), name='unique_Recifi_alert'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from base.models import BaseModel
 from accounts.models import TelegramUser, UserWallet
 from .enums import CryptoTradeChoices, TradeStatusChoices
@@ -21,6 +22,8 @@ class CryptoTrade(BaseModel):
     quantity = models.FloatField()
     target_price = models.FloatField()
     status = models.CharField(choices=TradeStatusChoices, max_length=50, default="open")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    tx_hash = models.CharField(max_length=100, null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
@@ -50,6 +53,7 @@ class Recifi(BaseModel):
     pecentage_change_1year = models.DecimalField(
         max_digits=10, decimal_places=2, null=True, blank=True
     )
+    weight = models.PositiveSmallIntegerField(default=1)
 
     class Meta:
         ordering = ["-created_at"]
@@ -63,9 +67,76 @@ class RecifiToken(BaseModel):
         Recifi, on_delete=models.CASCADE, related_name="Recifi_token"
     )
     token_address = models.CharField(max_length=42)
+    last_bought_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["Recifi", "token_address"], name="unique_Recifi_token"
+            )
+        ]
 
     def __str__(self):
         return self.token_address
+
+
+class BlockCursor(BaseModel):
+    """
+    Model storing the last block processed by a block range scanner,
+    e.g. the Recifi whale buy detector.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    block_number = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} : {self.block_number}"
+
+
+class RecifiAlert(BaseModel):
+    """
+    Whale consensus alert sent for a token in one window, at most once per
+    window length: `window_start` is the alert time floored to the window
+    length.
+    """
+
+    token_address = models.CharField(max_length=42)
+    window = models.CharField(max_length=10)
+    window_start = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-window_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["token_address", "window", "window_start"],
+                name="unique_Recifi_alert",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.token_address} : {self.window} {self.window_start}"
+
+
+class RecifiSnapshot(BaseModel):
+    """
+    Total USD value of a Recifi wallet's holdings at one point in time, as
+    reported by Covalent.
+    """
+
+    Recifi = models.ForeignKey(
+        Recifi, on_delete=models.CASCADE, related_name="Recifi_snapshot"
+    )
+    taken_at = models.DateTimeField()
+    total_quote = models.DecimalField(max_digits=20, decimal_places=2)
+
+    class Meta:
+        ordering = ["-taken_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["Recifi", "taken_at"], name="unique_Recifi_snapshot"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.Recifi} : {self.taken_at}"
@@ -66,7 +66,7 @@ class CryptoTradeGetSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CryptoTrade
-        fields = ["uuid", "trade_type", "quantity", "target_price", "status"]
+        fields = ["uuid", "trade_type", "quantity", "target_price", "status", "tx_hash"]
 
 
 class recifierializer(serializers.ModelSerializer):
@@ -93,9 +93,10 @@ class Addrecifierializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recifi
-        fields = ["name", "wallet_address"]
+        fields = ["name", "wallet_address", "weight"]
         extra_kwargs = {
             "name": {"required": False},
+            "weight": {"required": False},
             "wallet_address": {
                 "validators": [
                     UniqueValidator(
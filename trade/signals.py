@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .leaderboards import clear_leaderboards
+from .models import CryptoTrade, Recifi
+from .trigger_book import bump_trigger_book_version, trigger_book
+
+
+@receiver(post_save, sender=CryptoTrade)
+def sync_trigger_book(sender, instance, **kwargs):
+    trigger_book.apply(
+        instance.uuid,
+        instance.trade_type,
+        instance.target_price,
+        instance.user_wallet_id,
+        None if instance.deleted_at else instance.status,
+    )
+    # Other processes reload on the new version, so it is only published
+    # once the change can be read.
+    transaction.on_commit(bump_trigger_book_version)
+
+
+@receiver(post_delete, sender=CryptoTrade)
+def remove_from_trigger_book(sender, instance, **kwargs):
+    trigger_book.apply(
+        instance.uuid,
+        instance.trade_type,
+        instance.target_price,
+        instance.user_wallet_id,
+        None,
+    )
+    transaction.on_commit(bump_trigger_book_version)
+
+
+@receiver(post_save, sender=Recifi)
+@receiver(post_delete, sender=Recifi)
+def invalidate_leaderboards(sender, instance, **kwargs):
+    clear_leaderboards()
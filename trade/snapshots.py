@@ -0,0 +1,127 @@
+import logging
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+
+from .enums import PORTFOLIO_WINDOW_HOURS
+from .models import RecifiSnapshot
+from utils.helper import calculate_percent_change
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+# The latest snapshot of a wallet counts as its current value while it is at
+# most this old (the sweep writes one every hour).
+SNAPSHOT_LATEST_TOLERANCE = timedelta(hours=2)
+
+# A snapshot stands for the value at the start of a window when it is within
+# 1/24 of the window from it, up to 12 hours: any time is that close to a
+# midnight, so the nightly snapshots back up the hourly ones on long windows.
+SNAPSHOT_MAX_TOLERANCE = timedelta(hours=12)
+
+# Windows longer than this are charted from the daily (midnight) snapshots.
+SERIES_HOURLY_MAX = timedelta(days=7)
+
+LATEST = "latest"
+
+
+def get_window(duration):
+    return timedelta(hours=PORTFOLIO_WINDOW_HOURS[duration])
+
+
+def get_tolerance(window):
+    return min(window / 24, SNAPSHOT_MAX_TOLERANCE)
+
+
+def get_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def get_snapshot_quotes(targets, wallet_ids=None):
+    """
+    Finds the snapshot of each wallet closest to each target time, with one
+    range query.
+
+    Args:
+        targets: key -> (target time, tolerance).
+        wallet_ids: Restricts the lookup to these Recifi wallets.
+
+    Returns:
+        dict: (wallet uuid, key) -> total quote of the closest snapshot within
+        the target's tolerance.
+    """
+    condition = Q()
+    for target, tolerance in targets.values():
+        condition |= Q(taken_at__range=(target - tolerance, target + tolerance))
+    snapshots = RecifiSnapshot.objects.filter(condition)
+    if wallet_ids is not None:
+        snapshots = snapshots.filter(Recifi_id__in=wallet_ids)
+    closest = {}
+    for wallet_id, taken_at, total_quote in snapshots.values_list(
+        "Recifi_id", "taken_at", "total_quote"
+    ):
+        for key, (target, tolerance) in targets.items():
+            distance = abs(taken_at - target)
+            if distance > tolerance:
+                continue
+            best = closest.get((wallet_id, key))
+            if best is None or distance < best[0]:
+                closest[(wallet_id, key)] = (distance, total_quote)
+    return {key: total_quote for key, (_, total_quote) in closest.items()}
+
+
+def get_window_start_quotes(durations, now, wallet_ids=None):
+    """
+    Returns the value of the wallets at the start of each window ending now.
+
+    Returns:
+        dict: (wallet uuid, duration) -> total quote.
+    """
+    targets = {}
+    for duration in durations:
+        window = get_window(duration)
+        targets[duration] = (now - window, get_tolerance(window))
+    return get_snapshot_quotes(targets, wallet_ids)
+
+
+def get_portfolio_changes(wallet_id, durations, now=None):
+    """
+    Percentage change of a wallet's value over each window, from its latest
+    snapshot and the snapshot at the start of the window.
+
+    Returns:
+        dict: duration -> percentage change, or None when either snapshot is
+        missing.
+    """
+    now = now or timezone.now()
+    targets = {LATEST: (now, SNAPSHOT_LATEST_TOLERANCE)}
+    for duration in durations:
+        window = get_window(duration)
+        targets[duration] = (now - window, get_tolerance(window))
+    quotes = get_snapshot_quotes(targets, [wallet_id])
+    latest = quotes.get((wallet_id, LATEST))
+    changes = {}
+    for duration in durations:
+        start = quotes.get((wallet_id, duration))
+        changes[duration] = (
+            calculate_percent_change(latest, start)
+            if latest is not None and start is not None
+            else None
+        )
+    return changes
+
+
+def get_portfolio_series(wallet_id, duration, now=None):
+    """
+    Returns the (taken_at, total quote) points of a wallet over a window,
+    hourly up to a week and daily beyond, with one range query.
+    """
+    now = now or timezone.now()
+    window = get_window(duration)
+    snapshots = RecifiSnapshot.objects.filter(
+        Recifi_id=wallet_id, taken_at__range=(now - window, now)
+    )
+    if window > SERIES_HOURLY_MAX:
+        snapshots = snapshots.filter(taken_at__hour=0)
+    return list(snapshots.order_by("taken_at").values_list("taken_at", "total_quote"))
@@ -1,104 +1,652 @@
 import time
 import logging
-from celery import shared_task
+from celery import chord, shared_task
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
-from .models import Recifi, RecifiToken
-from utils.covalent import (
-    get_wallet_24h_percentage_change,
-    get_bought_token,
-    get_wallet_price_change,
+from .consensus import WhaleConsensus, get_window_start
+from .enums import CONSENSUS_WINDOW_MINUTES
+from .holdings import store_holdings
+from .leaderboards import build_leaderboards
+from .models import (
+    BlockCursor,
+    CryptoTrade,
+    Recifi,
+    RecifiAlert,
+    RecifiSnapshot,
+    RecifiToken,
+)
+from .snapshots import get_hour, get_window_start_quotes
+from utils.covalent import fetch_historical_data, get_wallet_portfolio
+from utils.exceptions import LogRangeTooLarge
+from utils.helper import (
+    calculate_percent_change,
+    send_Recifi_alert_notification,
+    sum_all_quote,
+)
+from utils.metrics import record_gauges
+from utils.quota import BACKGROUND_LANE
+from utils.w3 import (
+    get_block_times,
+    get_erc20_transfers_to,
+    get_token_symbol,
+    to_checksum_address,
+    topic_to_address,
+    w3,
 )
-from utils.helper import send_Recifi_alert_notification, calculate_percent_change
-from utils.w3 import get_token_symbol, to_checksum_address
 
 logger = logging.getLogger(__name__)
 logger_info = logging.getLogger("info_logger")
 logger_error = logging.getLogger("error_logger")
 
+Recifi_BUY_CURSOR = "Recifi_buys"
+Recifi_BUY_LEASE_KEY = "trade:Recifi_buys:lease"
+
+
+# Fields of a Recifi wallet written by the portfolio sweep.
+Recifi_SWEEP_FIELDS = (
+    "percentage_change_24hrs",
+    "pecentage_change_7days",
+    "percentage_change_30days",
+    "pecentage_change_1year",
+)
+
+
+# Sweep field of each portfolio window, with the field holding the value at
+# the start of the window fetched nightly from Covalent.
+Recifi_SWEEP_WINDOWS = {
+    "pecentage_change_7days": ("7d", "price_change_7days"),
+    "percentage_change_30days": ("1m", "price_change_30days"),
+    "pecentage_change_1year": ("1y", "price_change_1year"),
+}
+
+
+def get_sweep_percentage_changes(
+    obj, percentage_24hrs_change, total_holdings, start_quotes
+):
+    """
+    Returns the sweep fields of a Recifi wallet from its current holdings.
+
+    The value at the start of each window is the wallet's own snapshot from
+    then, or the historical value fetched nightly while the wallet has no
+    snapshot that old.
+    """
+    values = {"percentage_change_24hrs": percentage_24hrs_change}
+    for field, (duration, price_field) in Recifi_SWEEP_WINDOWS.items():
+        start_quote = start_quotes.get((obj.uuid, duration))
+        if start_quote is None:
+            start_quote = getattr(obj, price_field)
+        values[field] = calculate_percent_change(total_holdings, start_quote)
+    return values
+
+
+def get_shards(wallets):
+    """
+    Splits the uuids of the Recifi wallets of the queryset `wallets` into
+    shards of RECIFI_SHARD_SIZE, as strings a task can be sent.
+    """
+    wallet_ids = [
+        str(wallet_id)
+        for wallet_id in wallets.order_by("uuid").values_list("uuid", flat=True)
+    ]
+    size = settings.RECIFI_SHARD_SIZE
+    return [wallet_ids[index : index + size] for index in range(0, len(wallet_ids), size)]
+
+
+def get_shard_retry_countdown(retries):
+    """
+    Seconds before the next retry of a shard, doubling with every retry.
+    """
+    return settings.RECIFI_SHARD_RETRY_SECONDS * 2**retries
+
+
+def sweep_Recifi_wallets(wallet_ids, now):
+    """
+    Updates the percentage changes of the given Recifi wallets.
+
+    The Covalent balances of the wallets are fetched concurrently on
+    RECIFI_SWEEP_WORKERS threads, in the background lane of the shared
+    Covalent quota, and each wallet's total value is stored as
+    its RecifiSnapshot of the hour, building the hourly series the
+    percentage changes are computed from. Its top holdings, from the same
+    Covalent response, are stored for the whale holdings endpoint. A wallet
+    that fails is logged and left unchanged, and only the wallets and fields
+    whose value changed are written, with one bulk_update.
+
+    Returns:
+        tuple: (wallets updated, uuids of the wallets that failed).
+    """
+    objs = list(
+        Recifi.objects.filter(uuid__in=wallet_ids).only(
+            "wallet_address",
+            "price_change_7days",
+            "price_change_30days",
+            "price_change_1year",
+            *Recifi_SWEEP_FIELDS,
+        )
+    )
+    with ThreadPoolExecutor(
+        max_workers=settings.RECIFI_SWEEP_WORKERS, thread_name_prefix="Recifi-sweep"
+    ) as pool:
+        futures = {
+            obj: pool.submit(fetch_wallet_portfolio, obj.wallet_address)
+            for obj in objs
+        }
+
+    changed_objs = []
+    changed_fields = set()
+    snapshots = []
+    holdings = {}
+    failed = []
+    start_quotes = get_window_start_quotes(
+        [duration for duration, _ in Recifi_SWEEP_WINDOWS.values()], now, wallet_ids
+    )
+    for obj, future in futures.items():
+        try:
+            percentage_24hrs_change, total_holdings, top_holdings = future.result()
+        except Exception as e:
+            failed.append(str(obj.uuid))
+            logger_error.error(f"Recifi sweep {obj.wallet_address} : {e}")
+            continue
+        holdings[obj.wallet_address] = top_holdings
+        snapshots.append(
+            RecifiSnapshot(
+                Recifi=obj,
+                taken_at=get_hour(now),
+                total_quote=total_holdings,
+                updated_at=now,
+            )
+        )
+        values = get_sweep_percentage_changes(
+            obj, percentage_24hrs_change, total_holdings, start_quotes
+        )
+        fields = [field for field, value in values.items() if getattr(obj, field) != value]
+        if not fields:
+            continue
+        for field in fields:
+            setattr(obj, field, values[field])
+        obj.updated_at = now
+        changed_objs.append(obj)
+        changed_fields.update(fields)
+    RecifiSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["Recifi", "taken_at"],
+        update_fields=["total_quote", "updated_at"],
+        batch_size=1000,
+    )
+    store_holdings(holdings, now)
+    if changed_objs:
+        Recifi.objects.bulk_update(
+            changed_objs, [*sorted(changed_fields), "updated_at"], batch_size=500
+        )
+    return len(changed_objs), failed
+
 
 @shared_task()
 def Recifi_wallets_24h_percentage_change():
     """
     Updates the percentage change for each wallet in the Recifi model at every 24hrs.
+
+    The wallets are split into shards of RECIFI_SHARD_SIZE swept by
+    sweep_Recifi_shard, in parallel on every worker consuming the queue, and
+    finish_Recifi_sweep adds up the shards and rebuilds the whale
+    leaderboards once all of them are done.
     """
     start_time = time.time()
-    objs = Recifi.objects.all()
-    for obj in objs:
-        percentage_24hrs_change, total_holdings = get_wallet_24h_percentage_change(
-            obj.wallet_address
-        )
-        obj.percentage_change_24hrs = percentage_24hrs_change
-        obj.pecentage_change_7days = calculate_percent_change(
-            total_holdings, obj.price_change_7days
-        )
-        obj.percentage_change_30days = calculate_percent_change(
-            total_holdings, obj.price_change_30days
+    shards = get_shards(Recifi.objects.all())
+    wallets = sum(len(shard) for shard in shards)
+    now = timezone.now().isoformat()
+    chord(sweep_Recifi_shard.s(shard, now) for shard in shards)(
+        finish_Recifi_sweep.s(start_time, wallets)
+    )
+    return f"Dispatched the percentage change of {wallets} wallets in {len(shards)} shards."
+
+
+@shared_task(bind=True, max_retries=3)
+def sweep_Recifi_shard(self, wallet_ids, now, updated=0):
+    """
+    Updates the percentage changes of one shard of Recifi wallets, as of the
+    time `now` the sweep started.
+
+    The wallets that failed are swept again by a retry of the shard, after a
+    growing countdown, and reported as failed once the retries are exhausted.
+
+    Returns:
+        dict: wallets of the shard "updated" and "failed".
+    """
+    try:
+        shard_updated, failed = sweep_Recifi_wallets(
+            wallet_ids, datetime.fromisoformat(now)
         )
-        obj.pecentage_change_1year = calculate_percent_change(
-            total_holdings, obj.price_change_1year
+    except Exception as e:
+        logger_error.error(f"Recifi sweep shard of {len(wallet_ids)} wallets : {e}")
+        shard_updated, failed = 0, wallet_ids
+    updated += shard_updated
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(
+            args=[failed, now],
+            kwargs={"updated": updated},
+            countdown=get_shard_retry_countdown(self.request.retries),
         )
-        obj.save()
+    return {"updated": updated, "failed": len(failed)}
+
+
+@shared_task()
+def finish_Recifi_sweep(results, start_time, wallets):
+    """
+    Adds up the shards of the portfolio sweep and rebuilds the whale
+    leaderboards from the swept wallets.
+    """
+    updated = sum(result["updated"] for result in results)
+    failed = sum(result["failed"] for result in results)
+    build_leaderboards()
     end_time = time.time()
+    record_gauges(
+        "Recifi_sweep",
+        {
+            "duration": round(end_time - start_time, 3),
+            "shards": len(results),
+            "wallets": wallets,
+            "updated": updated,
+            "failed": failed,
+            "wallets_per_second": round(wallets / (end_time - start_time), 2)
+            if end_time > start_time
+            else 0,
+        },
+    )
     logging.info(
         f"Time taken to update percentage change for wallets : {end_time - start_time} seconds."
     )
-    return f"Time taken to update percentage change for wallets : {end_time - start_time} seconds."
+    return (
+        f"Time taken to update percentage change for {wallets} wallets in {len(results)} shards "
+        f"({updated} updated, {failed} failed) : {end_time - start_time} seconds."
+    )
+
+
+@shared_task()
+def reap_expired_trade_claims():
+    """
+    Settles the trades left in_process by an executor that stopped or failed
+    between the claim and the final status update.
+
+    They are never re-opened, as the swap may already be on chain: a trade
+    whose swap hash was recorded moves to needs_review, for the transaction
+    to be checked, and any other trade to failed.
+    """
+    start_time = time.time()
+    expired_before = timezone.now() - timedelta(
+        seconds=settings.TRADE_CLAIM_LEASE_SECONDS
+    )
+    with transaction.atomic():
+        trades = CryptoTrade.objects.select_for_update(skip_locked=True).filter(
+            status="in_process", claimed_at__lt=expired_before
+        )
+        for trade in trades:
+            trade.status = "needs_review" if trade.tx_hash else "failed"
+            logger_error.error(
+                f"Trade {trade.uuid} claim expired at {trade.claimed_at} "
+                f"(swap {trade.tx_hash}), moving it to {trade.status}."
+            )
+            trade.save(update_fields=["status", "updated_at"])
+        reaped = len(trades)
+    end_time = time.time()
+    return f"Time taken to settle {reaped} expired trade claims : {end_time - start_time} seconds."
+
+
+@shared_task()
+def detect_Recifi_buys():
+    """
+    Detects tokens bought by Recifi wallets from ERC-20 Transfer logs.
+
+    Every block range since the last processed block is covered by one
+    eth_getLogs call per chunk of whale addresses, whatever the number of
+    whales. Each (whale, token) pair is stored once, and its last_bought_at
+    (the time of the block of the buy, not of its detection, so backfilled
+    buys are not taken for fresh ones) is moved forward whenever the whale
+    buys the token again.
+
+    A run holds a lease in the shared cache for up to
+    RECIFI_LOG_LEASE_SECONDS, and a run finding it taken returns at once.
+    The eth_getLogs calls run outside any transaction; each range's tokens
+    and the cursor are then committed in a short transaction of their own,
+    which stops the run if the cursor was moved meanwhile (by a run started
+    after the lease expired). When the node refuses a range as too large,
+    the range is halved, down to a single block, then the address chunk is.
+    """
+    start = time.time()
+    whales = {obj.wallet_address.lower(): obj for obj in Recifi.objects.all()}
+    if not whales:
+        return "No Recifi wallets to scan."
+    if not cache.add(Recifi_BUY_LEASE_KEY, 1, settings.RECIFI_LOG_LEASE_SECONDS):
+        return "Recifi buy detection is already running."
+    try:
+        return scan_Recifi_buys(whales, start)
+    finally:
+        cache.delete(Recifi_BUY_LEASE_KEY)
+
+
+def scan_Recifi_buys(whales, start):
+    """
+    Scans the blocks after the buy cursor for the buys of `whales` (lower
+    case address -> Recifi), see detect_Recifi_buys.
+    """
+
+    latest_block = w3.eth.block_number - settings.RECIFI_LOG_CONFIRMATIONS
+    cursor, _ = BlockCursor.objects.get_or_create(
+        name=Recifi_BUY_CURSOR,
+        defaults={
+            "block_number": latest_block - settings.RECIFI_LOG_BACKFILL_BLOCKS
+        },
+    )
+    addresses = list(whales)
+    block_range = settings.RECIFI_LOG_BLOCK_RANGE
+    chunk = settings.RECIFI_LOG_ADDRESS_CHUNK
+    detected = 0
+    from_block = cursor.block_number + 1
+    while from_block <= latest_block:
+        to_block = min(from_block + block_range - 1, latest_block)
+        bought = {}
+        try:
+            for index in range(0, len(addresses), chunk):
+                logs = get_erc20_transfers_to(
+                    addresses[index : index + chunk], from_block, to_block
+                )
+                for log in logs:
+                    whale = topic_to_address(log["topics"][2]).lower()
+                    if whale in whales:
+                        pair = (whale, to_checksum_address(log["address"]))
+                        bought[pair] = max(bought.get(pair, 0), log["blockNumber"])
+        except LogRangeTooLarge as e:
+            if to_block > from_block:
+                block_range = (to_block - from_block + 1) // 2
+            elif chunk > 1:
+                chunk = (chunk + 1) // 2
+            else:
+                raise
+            logger_error.error(
+                f"Recifi buy logs of blocks {from_block}-{to_block} refused ({e}), "
+                f"retrying with {block_range} blocks and {chunk} addresses."
+            )
+            continue
+
+        block_times = get_block_times(bought.values())
+        tokens = [
+            RecifiToken(
+                Recifi=whales[whale],
+                token_address=token,
+                last_bought_at=block_times[block_number],
+            )
+            for (whale, token), block_number in bought.items()
+        ]
+        with transaction.atomic():
+            cursor = BlockCursor.objects.select_for_update().get(
+                name=Recifi_BUY_CURSOR
+            )
+            if cursor.block_number != from_block - 1:
+                logger_error.error(
+                    f"Recifi buy cursor moved to {cursor.block_number} by another "
+                    f"run while scanning blocks {from_block}-{to_block}, stopping."
+                )
+                break
+            RecifiToken.objects.bulk_create(tokens, ignore_conflicts=True)
+            now = timezone.now()
+            for token in tokens:
+                RecifiToken.objects.filter(
+                    Recifi=token.Recifi, token_address=token.token_address
+                ).update(
+                    last_bought_at=Greatest(
+                        "last_bought_at", Value(token.last_bought_at)
+                    ),
+                    updated_at=now,
+                )
+            cursor.block_number = to_block
+            cursor.save()
+        detected += len(tokens)
+        from_block = to_block + 1
+
+    end = time.time()
+    logging.info(
+        f"Detected {detected} Recifi buys up to block {cursor.block_number} in {end - start} seconds."
+    )
+    return f"Detected {detected} Recifi buys up to block {cursor.block_number} in {end - start} seconds."
 
 
 @shared_task(time_limit=1000)
 def Recifi_alerts():
     """
-    Fetches token addresses from Recifi wallets, calculates percentage changes
-    for each token's occurrence among all wallets, and sends alerts if the
-    percentage change exceeds 5%.
+    Scores the whale consensus behind each token bought by Recifi wallets (as
+    recorded by detect_Recifi_buys) over the 15m, 1h, 6h and 24h windows, and
+    sends an alert for the tokens whose weighted share of whales is above
+    the window's RECIFI_CONSENSUS_THRESHOLDS percentage.
+
+    A token is alerted at most once per window length for the same window,
+    as recorded by one RecifiAlert row per (token, window, window start);
+    the alert reports the shortest window not alerted yet.
     """
 
     start = time.time()
-    RecifiToken.admin_objects.all().delete()
-    objs = Recifi.objects.all()
-    for obj in objs:
-        token_addresses = get_bought_token(obj.wallet_address)
-        tokens = [
-            RecifiToken(Recifi=obj, token_address=token_address)
-            for token_address in token_addresses
+    consensus = WhaleConsensus.load()
+    alerts = 0
+    for token, shares in consensus.triggered(
+        settings.RECIFI_CONSENSUS_THRESHOLDS
+    ).items():
+        fresh = [
+            window
+            for window in shares
+            if RecifiAlert.objects.get_or_create(
+                token_address=token,
+                window=window,
+                window_start=get_window_start(consensus.now, window),
+            )[1]
         ]
-        RecifiToken.objects.bulk_create(tokens)
-
-    Recifi_tokens = RecifiToken.objects.values_list("token_address", flat=True)
-    Recifi_tokens = set(Recifi_tokens)
-    for token in Recifi_tokens:
-        token_count = RecifiToken.objects.filter(token_address=token).count()
-        if token_count > 0:
-            total_tokens = objs.count()
-            percentage_change = round((token_count / total_tokens) * 100, 2)
-            if percentage_change > 5:
-                notification_data = {
-                    "percentage": percentage_change,
-                    "symbol": get_token_symbol(to_checksum_address(token)),
-                    "token_address": token,
-                }
-                send_Recifi_alert_notification(notification_data=notification_data)
+        if not fresh:
+            continue
+        window = min(fresh, key=CONSENSUS_WINDOW_MINUTES.get)
+        notification_data = {
+            "percentage": shares[window],
+            "window": window,
+            "symbol": get_token_symbol(to_checksum_address(token)),
+            "token_address": token,
+        }
+        send_Recifi_alert_notification(notification_data=notification_data)
+        alerts += 1
+    RecifiAlert.objects.filter(
+        window_start__lt=consensus.now
+        - timedelta(minutes=max(CONSENSUS_WINDOW_MINUTES.values()))
+    ).delete()
     end = time.time()
     logging.info(
-        f"Time taken to fetch token addresses from Recifi wallets : {end - start} seconds."
+        f"Time taken to score whale consensus of {consensus.size} Recifi wallets, {alerts} alerts : {end - start} seconds."
     )
-    return f"Time taken to fetch token addresses from Recifi wallets : {end - start} seconds."
+    return f"Time taken to score whale consensus of {consensus.size} Recifi wallets, {alerts} alerts : {end - start} seconds."
+
+
+# Recifi fields holding the total value of the wallet this many days ago.
+HISTORICAL_PRICE_DAYS = {
+    "price_change_7days": 7,
+    "price_change_30days": 30,
+    "price_change_1year": 365,
+}
+
+
+def fetch_wallet_portfolio(wallet_address):
+    """
+    Fetches the portfolio of a wallet from Covalent (see
+    get_wallet_portfolio), in the background lane of the shared Covalent
+    quota.
+    """
+    try:
+        return get_wallet_portfolio(wallet_address, BACKGROUND_LANE)
+    finally:
+        connection.close()
+
+
+def fetch_wallet_snapshots(wallet_address, dates):
+    """
+    Fetches the total value of a wallet's holdings at each date from
+    Covalent, in the background lane of the shared Covalent quota.
+
+    Returns:
+        dict: date -> total quote, or the exception raised for that date.
+    """
+    quotes = {}
+    try:
+        for date in dates:
+            try:
+                quotes[date] = sum_all_quote(
+                    fetch_historical_data(
+                        wallet_address, date.strftime("%Y-%m-%d"), BACKGROUND_LANE
+                    )
+                )
+            except Exception as e:
+                quotes[date] = e
+    finally:
+        connection.close()
+    return quotes
+
+
+def update_wallets_historical_price(wallet_ids, today):
+    """
+    Updates the price change fields of the given Recifi wallets.
+
+    The value of every wallet 7, 30 and 365 days before `today` is read from
+    the stored RecifiSnapshot of that date when there is one. The missing
+    snapshots are fetched from Covalent concurrently (RECIFI_SWEEP_WORKERS
+    wallets at a time, within the shared Covalent quota) and stored, and the
+    wallets are written with one bulk_update.
+
+    Returns:
+        tuple: (snapshots fetched, uuids of the wallets with a failed date).
+    """
+    now = timezone.now()
+    dates = {
+        field: today - timedelta(days=days)
+        for field, days in HISTORICAL_PRICE_DAYS.items()
+    }
+    wallets = list(
+        Recifi.objects.filter(uuid__in=wallet_ids).only(
+            "wallet_address", *HISTORICAL_PRICE_DAYS
+        )
+    )
+    quotes = {
+        (wallet_id, taken_at): total_quote
+        for wallet_id, taken_at, total_quote in RecifiSnapshot.objects.filter(
+            Recifi_id__in=wallet_ids, taken_at__in=dates.values()
+        ).values_list("Recifi_id", "taken_at", "total_quote")
+    }
+    missing = {}
+    for wallet in wallets:
+        for date in dates.values():
+            if (wallet.uuid, date) not in quotes:
+                missing.setdefault(wallet, []).append(date)
+
+    with ThreadPoolExecutor(
+        max_workers=settings.RECIFI_SWEEP_WORKERS, thread_name_prefix="Recifi-history"
+    ) as pool:
+        futures = {
+            wallet: pool.submit(
+                fetch_wallet_snapshots, wallet.wallet_address, missing_dates
+            )
+            for wallet, missing_dates in missing.items()
+        }
+
+    snapshots = []
+    failed = set()
+    for wallet, future in futures.items():
+        for date, quote in future.result().items():
+            if isinstance(quote, Exception):
+                failed.add(str(wallet.uuid))
+                logger_error.error(
+                    f"Historical price of {wallet.wallet_address} at {date:%Y-%m-%d} : {quote}"
+                )
+                continue
+            quotes[(wallet.uuid, date)] = quote
+            snapshots.append(
+                RecifiSnapshot(Recifi=wallet, taken_at=date, total_quote=quote)
+            )
+    RecifiSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True, batch_size=1000)
+
+    for wallet in wallets:
+        for field, date in dates.items():
+            quote = quotes.get((wallet.uuid, date))
+            if quote is not None:
+                setattr(wallet, field, quote)
+        wallet.updated_at = now
+    Recifi.objects.bulk_update(
+        wallets, [*HISTORICAL_PRICE_DAYS, "updated_at"], batch_size=500
+    )
+    return len(snapshots), sorted(failed)
 
 
 @shared_task()
 def update_historical_price():
     """
     Updates the price change for each wallet in the Recifi model.
+
+    The wallets are split into shards of RECIFI_SHARD_SIZE updated by
+    update_historical_price_shard, in parallel on every worker consuming the
+    queue, and finish_historical_price adds up the shards.
     """
     start = time.time()
-    wallets = Recifi.objects.all()
-    for wallet in wallets:
-        wallet.price_change_7days = get_wallet_price_change(wallet.wallet_address, 7)
-        wallet.price_change_30days = get_wallet_price_change(wallet.wallet_address, 30)
-        wallet.price_change_1year = get_wallet_price_change(wallet.wallet_address, 365)
-        wallet.save()
+    shards = get_shards(Recifi.objects.all())
+    wallets = sum(len(shard) for shard in shards)
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    chord(
+        update_historical_price_shard.s(shard, today.isoformat()) for shard in shards
+    )(finish_historical_price.s(start, wallets))
+    return f"Dispatched the price change of {wallets} wallets in {len(shards)} shards."
+
+
+@shared_task(bind=True, max_retries=3)
+def update_historical_price_shard(self, wallet_ids, today, fetched=0):
+    """
+    Updates the price change fields of one shard of Recifi wallets.
+
+    The wallets with a date that failed are updated again by a retry of the
+    shard, after a growing countdown, which only fetches the snapshots still
+    missing; they are reported as failed once the retries are exhausted.
+
+    Returns:
+        dict: snapshots "fetched" and wallets "failed" in the shard.
+    """
+    try:
+        shard_fetched, failed = update_wallets_historical_price(
+            wallet_ids, datetime.fromisoformat(today)
+        )
+    except Exception as e:
+        logger_error.error(
+            f"Historical price shard of {len(wallet_ids)} wallets : {e}"
+        )
+        shard_fetched, failed = 0, wallet_ids
+    fetched += shard_fetched
+    if failed and self.request.retries < self.max_retries:
+        raise self.retry(
+            args=[failed, today],
+            kwargs={"fetched": fetched},
+            countdown=get_shard_retry_countdown(self.request.retries),
+        )
+    return {"fetched": fetched, "failed": len(failed)}
+
+
+@shared_task()
+def finish_historical_price(results, start, wallets):
+    """
+    Adds up the shards of the historical price update.
+    """
+    fetched = sum(result["fetched"] for result in results)
+    failed = sum(result["failed"] for result in results)
     end = time.time()
     logging.info(
         f"Time taken to update price change for wallets : {end - start} seconds."
     )
-    return f"Time taken to update price change for wallets : {end - start} seconds."
+    return (
+        f"Time taken to update price change for {wallets} wallets in {len(results)} shards "
+        f"({fetched} snapshots fetched, {failed} failed) : {end - start} seconds."
+    )
@@ -1,3 +1,571 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework.test import APIRequestFactory
+
+from . import executor, tasks
+from .consensus import WhaleConsensus, get_window_start
+from .holdings import get_holdings
+from .leaderboards import LEADERBOARDS_KEY, build_leaderboards
+from .models import (
+    BlockCursor,
+    CryptoTrade,
+    Recifi,
+    RecifiAlert,
+    RecifiSnapshot,
+    RecifiToken,
+)
+from .snapshots import (
+    get_hour,
+    get_portfolio_changes,
+    get_snapshot_quotes,
+    get_tolerance,
+    get_window,
+)
+from .trigger_book import Order, TriggerBook, TriggerSide
+from .views import CryptoTradeView, RecifiView, etag_matches
+from accounts.models import TelegramUser, UserWallet
+from utils import covalent
+from utils.exceptions import LogRangeTooLarge
+from utils.quota import BACKGROUND_LANE, USER_LANE
+from utils.w3 import TRANSFER_TOPIC, address_to_topic
+
+WHALE = "0x" + "1" * 40
+TOKEN = "0x" + "2" * 40
+
+
+@override_settings(
+    RECIFI_LOG_BLOCK_RANGE=500,
+    RECIFI_LOG_ADDRESS_CHUNK=1000,
+    RECIFI_LOG_CONFIRMATIONS=0,
+    RECIFI_LOG_BACKFILL_BLOCKS=300,
+)
+class DetectRecifiBuysTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Recifi.objects.create(name="whale", wallet_address=WHALE)
+        BlockCursor.objects.create(name=tasks.Recifi_BUY_CURSOR, block_number=1000)
+        self.ranges = []
+        self.genesis = timezone.now() - timedelta(hours=10)
+
+    def get_block_time(self, block_number):
+        return self.genesis + timedelta(seconds=12 * block_number)
+
+    def get_logs(self, addresses, from_block, to_block):
+        self.ranges.append((from_block, to_block))
+        if to_block - from_block + 1 > 100:
+            raise LogRangeTooLarge("query returned more than 10000 results")
+        return [
+            {
+                "address": TOKEN,
+                "blockNumber": block_number,
+                "topics": [
+                    TRANSFER_TOPIC,
+                    address_to_topic(TOKEN),
+                    address_to_topic(WHALE),
+                ],
+            }
+            for block_number in (1250, 1260)
+            if from_block <= block_number <= to_block
+        ]
+
+    def run_task(self, latest_block):
+        with mock.patch.object(tasks, "w3") as w3, mock.patch.object(
+            tasks, "get_erc20_transfers_to", side_effect=self.get_logs
+        ), mock.patch.object(
+            tasks,
+            "get_block_times",
+            side_effect=lambda blocks: {
+                block: self.get_block_time(block) for block in blocks
+            },
+        ):
+            w3.eth.block_number = latest_block
+            return tasks.detect_Recifi_buys()
+
+    def test_refused_range_is_halved(self):
+        self.run_task(1300)
+        self.assertEqual(self.ranges[:3], [(1001, 1300), (1001, 1150), (1001, 1075)])
+        self.assertEqual(self.ranges[-1][1], 1300)
+        self.assertEqual(
+            BlockCursor.objects.get(name=tasks.Recifi_BUY_CURSOR).block_number, 1300
+        )
+        self.assertEqual(RecifiToken.objects.get().token_address.lower(), TOKEN)
+
+    def get_cursor(self):
+        return BlockCursor.objects.get(name=tasks.Recifi_BUY_CURSOR).block_number
+
+    def test_buys_are_dated_by_their_latest_block(self):
+        self.run_task(1300)
+        self.assertEqual(
+            RecifiToken.objects.get().last_bought_at, self.get_block_time(1260)
+        )
+
+    def test_older_buy_does_not_move_last_bought_at_back(self):
+        later = self.get_block_time(2000)
+        RecifiToken.objects.create(
+            Recifi=Recifi.objects.get(), token_address=TOKEN, last_bought_at=later
+        )
+        self.run_task(1300)
+        self.assertEqual(RecifiToken.objects.get().last_bought_at, later)
+
+    def test_scanned_ranges_are_kept_when_a_later_one_fails(self):
+        get_logs = self.get_logs
+
+        def fail_after_1250(addresses, from_block, to_block):
+            if from_block > 1250:
+                raise ValueError("node down")
+            return get_logs(addresses, from_block, to_block)
+
+        self.get_logs = fail_after_1250
+        with override_settings(RECIFI_LOG_BLOCK_RANGE=100):
+            with self.assertRaises(ValueError):
+                self.run_task(1400)
+        self.assertEqual(self.get_cursor(), 1300)
+        self.assertEqual(RecifiToken.objects.count(), 1)
+        self.assertIsNone(cache.get(tasks.Recifi_BUY_LEASE_KEY))
+
+    def test_run_holding_the_lease_is_not_overlapped(self):
+        cache.add(tasks.Recifi_BUY_LEASE_KEY, 1)
+        self.assertEqual(
+            self.run_task(1300), "Recifi buy detection is already running."
+        )
+        self.assertEqual(self.ranges, [])
+
+    def test_run_stops_when_the_cursor_moved(self):
+        get_logs = self.get_logs
+
+        def move_cursor(addresses, from_block, to_block):
+            BlockCursor.objects.update(block_number=1300)
+            return get_logs(addresses, from_block, to_block)
+
+        self.get_logs = move_cursor
+        with override_settings(RECIFI_LOG_BLOCK_RANGE=100):
+            self.run_task(1300)
+        self.assertEqual(self.ranges, [(1001, 1100)])
+        self.assertEqual(self.get_cursor(), 1300)
+
+    def test_single_block_single_address_refusal_is_raised(self):
+        self.get_logs = mock.Mock(side_effect=LogRangeTooLarge("too many"))
+        with self.assertRaises(LogRangeTooLarge):
+            with override_settings(
+                RECIFI_LOG_BLOCK_RANGE=1, RECIFI_LOG_ADDRESS_CHUNK=1
+            ):
+                self.run_task(1001)
+        self.assertEqual(
+            BlockCursor.objects.get(name=tasks.Recifi_BUY_CURSOR).block_number, 1000
+        )
+
+
+class TradeTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = TelegramUser.objects.create(telegram_user_id="42")
+        self.wallet = UserWallet.objects.create(
+            telegram_user=self.user,
+            wallet_name="main",
+            wallet_address="0x" + "3" * 40,
+            private_key="key",
+        )
+
+    def create_trade(self, trade_type, target_price, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CryptoTrade.objects.create(
+                telegram_user=self.user,
+                user_wallet=self.wallet,
+                trade_type=trade_type,
+                quantity=0.1,
+                target_price=target_price,
+                **kwargs,
+            )
+
+
+@mock.patch("trade.views.check_balance_eth_usdt", return_value=(10, 10))
+class CryptoTradeViewTests(TradeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trade = self.create_trade("buy", 100)
+
+    def post(self):
+        data = {
+            "telegram_user_id": "42",
+            "trade_type": "buy",
+            "quantity": 5,
+            "target_price": 90,
+        }
+        request = APIRequestFactory().post("/", data, format="json")
+        return CryptoTradeView.as_view()(request)
+
+    def test_open_order_is_updated(self, check_balance):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.trade.refresh_from_db()
+        self.assertEqual((self.trade.quantity, self.trade.target_price), (5, 90))
+
+    def test_order_claimed_meanwhile_is_left_alone(self, check_balance):
+        atomic = transaction.atomic
+
+        def claim_first():
+            CryptoTrade.objects.filter(uuid=self.trade.uuid).update(
+                status="in_process", tx_hash="0xabc"
+            )
+            return atomic()
+
+        with mock.patch("trade.views.transaction.atomic", side_effect=claim_first):
+            response = self.post()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["message"], "Your order is already being executed."
+        )
+        self.trade.refresh_from_db()
+        self.assertEqual(
+            (self.trade.status, self.trade.tx_hash, self.trade.target_price),
+            ("in_process", "0xabc", 100),
+        )
+
+
+class TriggerSideTests(TestCase):
+    def test_buys_cross_at_or_below_their_target(self):
+        orders = [Order(target, "buy", target, None) for target in (90, 100)]
+        side = TriggerSide(-1, orders)
+        side.add(Order(95, "buy", 95, None))
+        self.assertEqual([order.uuid for order in side.crossed(95)], [100, 95])
+        self.assertEqual(side.crossed(101), [])
+
+    def test_sells_cross_at_or_above_their_target(self):
+        orders = [Order(target, "sell", target, None) for target in (110, 105, 120)]
+        side = TriggerSide(1, orders)
+        self.assertEqual([order.uuid for order in side.crossed(110)], [105, 110])
+        side.remove(orders[1])
+        self.assertEqual([order.uuid for order in side.crossed(110)], [110])
+
+
+class TriggerBookTests(TradeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = TriggerBook()
+
+    def crossed(self, price):
+        return sorted(order.target_price for order in self.book.crossed(price))
+
+    def test_load_keeps_open_trades_only(self):
+        self.create_trade("buy", 100)
+        self.create_trade("sell", 110)
+        self.create_trade("buy", 105, status="closed")
+        self.book.load()
+        self.assertEqual(len(self.book), 2)
+        self.assertEqual(self.crossed(100), [100])
+        self.assertEqual(self.crossed(111), [110])
+        self.assertEqual(self.crossed(105), [])
+
+    def test_sync_applies_committed_changes(self):
+        buy = self.create_trade("buy", 100)
+        self.book.load()
+        self.create_trade("buy", 102)
+        with self.captureOnCommitCallbacks(execute=True):
+            buy.status = "closed"
+            buy.save()
+        self.book.sync()
+        self.assertEqual(self.crossed(99), [102])
+
+    def test_sync_waits_for_the_commit(self):
+        self.book.load()
+        CryptoTrade.objects.create(
+            telegram_user=self.user,
+            user_wallet=self.wallet,
+            trade_type="buy",
+            quantity=0.1,
+            target_price=100,
+        )
+        with self.assertNumQueries(0):
+            self.book.sync()
+        self.assertEqual(len(self.book), 0)
+
+    def test_sync_drops_soft_deleted_trades(self):
+        buy = self.create_trade("buy", 100)
+        self.book.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            buy.soft_delete()
+        self.book.sync()
+        self.assertEqual(len(self.book), 0)
+
+
+class ClaimTradeTests(TradeTestCase):
+    def test_claims_open_crossed_trades_only(self):
+        buy = self.create_trade("buy", 100)
+        sell = self.create_trade("sell", 110)
+        closed = self.create_trade("buy", 100, status="closed")
+        self.assertIsNone(executor.claim_trade(buy.uuid, 101))
+        self.assertIsNone(executor.claim_trade(sell.uuid, 109))
+        self.assertIsNone(executor.claim_trade(closed.uuid, 90))
+
+        claimed = executor.claim_trade(buy.uuid, 100)
+        self.assertEqual(claimed.status, "in_process")
+        self.assertIsNotNone(claimed.claimed_at)
+        self.assertIsNone(executor.claim_trade(buy.uuid, 100))
+        self.assertEqual(executor.claim_trade(sell.uuid, 110).status, "in_process")
+
+
+@mock.patch("trade.executor.decrypt_text", return_value="key")
+@mock.patch("trade.executor.queue_buy_sell_notification")
+class ExecuteTradeTests(TradeTestCase):
+    def swap(self, result):
+        def swap(on_signed, **kwargs):
+            on_signed("0xabc")
+            self.recorded = CryptoTrade.objects.get(uuid=self.trade.uuid).tx_hash
+            return result
+
+        return mock.patch.dict(executor.SWAPS, {"buy": swap})
+
+    def test_swap_hash_is_committed_before_broadcast(self, *mocks):
+        self.trade = self.create_trade("buy", 100)
+        with self.swap((True, "0xabc")):
+            outcome, _ = executor.execute_trade(self.trade.uuid, 99)
+        self.assertEqual(outcome, executor.EXECUTED)
+        self.assertEqual(self.recorded, "0xabc")
+        self.assertEqual(CryptoTrade.objects.get(uuid=self.trade.uuid).status, "closed")
+
+    def test_failed_signed_swap_needs_review(self, *mocks):
+        self.trade = self.create_trade("buy", 100)
+        with self.swap((False, "timeout")):
+            outcome, _ = executor.execute_trade(self.trade.uuid, 99)
+        self.assertEqual(outcome, executor.FAILED)
+        self.assertEqual(
+            CryptoTrade.objects.get(uuid=self.trade.uuid).status, "needs_review"
+        )
+
+
+@override_settings(TRADE_CLAIM_LEASE_SECONDS=60)
+class ReapExpiredTradeClaimsTests(TradeTestCase):
+    def claimed(self, seconds_ago, tx_hash=None):
+        return self.create_trade(
+            "buy",
+            100,
+            status="in_process",
+            claimed_at=timezone.now() - timedelta(seconds=seconds_ago),
+            tx_hash=tx_hash,
+        )
+
+    def get_status(self, trade):
+        return CryptoTrade.objects.get(uuid=trade.uuid).status
+
+    def test_expired_claims_are_never_reopened(self):
+        unsigned = self.claimed(120)
+        signed = self.claimed(120, tx_hash="0xabc")
+        live = self.claimed(10)
+        tasks.reap_expired_trade_claims()
+        self.assertEqual(self.get_status(unsigned), "failed")
+        self.assertEqual(self.get_status(signed), "needs_review")
+        self.assertEqual(self.get_status(live), "in_process")
+
+
+class WhaleConsensusTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.consensus = WhaleConsensus(
+            [("a", 1), ("b", 1), ("c", 2)], now=self.now
+        )
+
+    def buy(self, whale, token, minutes_ago):
+        self.consensus.add(whale, token, self.now - timedelta(minutes=minutes_ago))
+
+    def test_shares_are_weighted(self):
+        self.buy("a", TOKEN, 5)
+        self.buy("c", TOKEN, 120)
+        self.buy("unknown", TOKEN, 5)
+        self.assertEqual(self.consensus.count(TOKEN, "15m"), 1)
+        self.assertEqual(self.consensus.share(TOKEN, "15m"), 25.0)
+        self.assertEqual(self.consensus.share(TOKEN, "6h"), 75.0)
+        self.assertEqual(self.consensus.overlap(TOKEN, "15m", "6h"), 1)
+        self.assertEqual(self.consensus.share(WHALE, "24h"), 0)
+
+    def test_triggered_above_each_window_threshold(self):
+        self.buy("a", TOKEN, 5)
+        self.buy("c", TOKEN, 120)
+        self.buy("b", WHALE, 600)
+        thresholds = {"24h": 80, "6h": 50, "1h": 20, "15m": 25}
+        self.assertEqual(
+            self.consensus.triggered(thresholds), {TOKEN: {"1h": 25.0, "6h": 75.0}}
+        )
+        self.assertEqual(
+            list(self.consensus.triggered(thresholds)[TOKEN]), ["1h", "6h"]
+        )
+
+
+@mock.patch.object(tasks, "get_token_symbol", return_value="TKN")
+@mock.patch.object(tasks, "send_Recifi_alert_notification")
+@override_settings(RECIFI_CONSENSUS_THRESHOLDS={"15m": 20, "1h": 20, "6h": 20})
+class RecifiAlertsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        whale = Recifi.objects.create(name="whale", wallet_address=WHALE)
+        Recifi.objects.create(name="other", wallet_address=TOKEN)
+        RecifiToken.objects.create(
+            Recifi=whale,
+            token_address=TOKEN,
+            last_bought_at=self.now - timedelta(minutes=30),
+        )
+
+    def run_task(self):
+        with mock.patch("trade.consensus.timezone.now", return_value=self.now):
+            tasks.Recifi_alerts()
+
+    def test_token_is_alerted_once_per_window_length(self, send, get_token_symbol):
+        self.run_task()
+        self.run_task()
+        send.assert_called_once()
+        self.assertEqual(send.call_args.kwargs["notification_data"]["window"], "1h")
+        self.assertEqual(RecifiAlert.objects.count(), 2)
+
+    def test_alert_reports_the_shortest_fresh_window(self, send, get_token_symbol):
+        RecifiAlert.objects.create(
+            token_address=TOKEN,
+            window="1h",
+            window_start=get_window_start(self.now, "1h"),
+        )
+        self.run_task()
+        data = send.call_args.kwargs["notification_data"]
+        self.assertEqual((data["window"], data["percentage"]), ("6h", 50.0))
+
+
+class SnapshotQuotesTests(TestCase):
+    def setUp(self):
+        self.now = get_hour(timezone.now())
+        self.whale = Recifi.objects.create(name="whale", wallet_address=WHALE)
+        self.other = Recifi.objects.create(name="other", wallet_address=TOKEN)
+
+    def snapshot(self, hours_ago, total_quote, whale=None):
+        RecifiSnapshot.objects.create(
+            Recifi=whale or self.whale,
+            taken_at=self.now - timedelta(hours=hours_ago),
+            total_quote=total_quote,
+        )
+
+    def test_tolerance_is_a_24th_of_the_window_up_to_12_hours(self):
+        self.assertEqual(get_tolerance(get_window("1d")), timedelta(hours=1))
+        self.assertEqual(get_tolerance(get_window("7d")), timedelta(hours=7))
+        self.assertEqual(get_tolerance(get_window("1y")), timedelta(hours=12))
+
+    def test_closest_snapshot_within_tolerance(self):
+        self.snapshot(24.8, 1)
+        self.snapshot(23.6, 2)
+        self.snapshot(27, 3)
+        self.snapshot(30, 4, whale=self.other)
+        targets = {
+            "day": (self.now - timedelta(hours=24), timedelta(hours=1)),
+            "wide": (self.now - timedelta(hours=28), timedelta(hours=2)),
+            "none": (self.now - timedelta(hours=48), timedelta(hours=1)),
+        }
+        quotes = get_snapshot_quotes(targets)
+        self.assertEqual(quotes[(self.whale.uuid, "day")], 2)
+        self.assertEqual(quotes[(self.whale.uuid, "wide")], 3)
+        self.assertEqual(quotes[(self.other.uuid, "wide")], 4)
+        self.assertNotIn((self.whale.uuid, "none"), quotes)
+        self.assertEqual(
+            set(get_snapshot_quotes(targets, [self.other.uuid])),
+            {(self.other.uuid, "wide")},
+        )
+
+    def test_portfolio_changes_need_both_snapshots(self):
+        self.snapshot(1, 150)
+        self.snapshot(24 * 7 + 5, 100)
+        changes = get_portfolio_changes(self.whale.uuid, ["7d", "1m"], self.now)
+        self.assertEqual(changes, {"7d": Decimal("50.00"), "1m": None})
+        later = self.now + timedelta(hours=2)
+        self.assertEqual(
+            get_portfolio_changes(self.whale.uuid, ["7d"], later), {"7d": None}
+        )
+
+
+class RecifiLeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for index, change in enumerate((5, -3, 12)):
+            Recifi.objects.create(
+                name=f"whale {index}",
+                wallet_address=WHALE,
+                percentage_change_24hrs=change,
+            )
+
+    def get(self, **headers):
+        request = APIRequestFactory().get("/", {"type": "gainers"}, **headers)
+        return RecifiView.as_view()(request)
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"a"', '"b", "a"'))
+        self.assertTrue(etag_matches('"a"', 'W/"a"'))
+        self.assertTrue(etag_matches('"a"', "*"))
+        self.assertFalse(etag_matches('"a"', '"xa", "ab"'))
+        self.assertFalse(etag_matches('"a"', ""))
+
+    def test_unchanged_leaderboard_is_not_sent_again(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        names = [row["name"] for row in response.data["data"]]
+        self.assertEqual(names, ["whale 2", "whale 0", "whale 1"])
+        etag = response["ETag"]
+
+        response = self.get(HTTP_IF_NONE_MATCH=f'"stale", W/{etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_changed_leaderboard_gets_a_new_etag(self):
+        etag = self.get()["ETag"]
+        Recifi.objects.filter(name="whale 1").update(percentage_change_24hrs=20)
+        build_leaderboards()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(RECIFI_LEADERBOARDS_CACHE_SECONDS=60)
+    def test_leaderboards_expire(self):
+        with mock.patch("trade.leaderboards.cache") as leaderboards_cache:
+            build_leaderboards()
+        leaderboards_cache.set.assert_called_once_with(
+            LEADERBOARDS_KEY, mock.ANY, 60
+        )
+
+
+class CovalentQuotaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.whale = Recifi.objects.create(name="whale", wallet_address=WHALE)
+
+    @override_settings(COVALENT_USER_MAX_WAIT=3, COVALENT_BACKGROUND_MAX_WAIT=30)
+    @mock.patch.object(covalent, "covalent_quota")
+    @mock.patch.object(covalent.requests, "get")
+    def test_balance_calls_take_a_token_of_their_lane(self, get, quota):
+        get.return_value.status_code = 200
+        item = {"balance": "10", "contract_decimals": 1, "quote": 1}
+        get.return_value.json.return_value = {"data": {"items": [item]}}
+        self.assertEqual(covalent.fetch_covalent_data(WHALE), [item])
+        covalent.get_wallet_portfolio(WHALE, BACKGROUND_LANE)
+        self.assertEqual(
+            quota.acquire.call_args_list,
+            [
+                mock.call(USER_LANE, timeout=3),
+                mock.call(BACKGROUND_LANE, timeout=30),
+            ],
+        )
+
+    @mock.patch.object(covalent, "fetch_covalent_data", return_value=[])
+    def test_holdings_cache_miss_uses_the_user_lane(self, fetch):
+        self.assertEqual(get_holdings(WHALE)["holdings"], [])
+        fetch.assert_called_once_with(WHALE, USER_LANE)
+        get_holdings(WHALE)
+        fetch.assert_called_once()
+
+    @mock.patch.object(tasks, "get_wallet_portfolio")
+    def test_sweep_uses_the_background_lane(self, get_wallet_portfolio):
+        get_wallet_portfolio.return_value = (Decimal("1.5"), Decimal(100), [])
+        updated, failed = tasks.sweep_Recifi_wallets(
+            [self.whale.uuid], timezone.now()
+        )
+        get_wallet_portfolio.assert_called_once_with(WHALE, BACKGROUND_LANE)
+        self.assertEqual((updated, failed), (1, []))
+        self.assertEqual(RecifiSnapshot.objects.get().total_quote, 100)
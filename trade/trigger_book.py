@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from django.utils import timezone
+
+from .models import CryptoTrade
+from utils.versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+TRIGGER_BOOK_VERSION_KEY = "trade:trigger_book"
+
+# The book is fully reloaded at least this often, in case a version bump or
+# a hard delete was missed.
+TRIGGER_BOOK_MAX_AGE_SECONDS = 300
+
+# Rows saved this close before the previous sync started are read again, so
+# a row saved by a process with a slightly late clock is not skipped.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class Order:
+    """
+    Compact record of one open trade in the trigger book.
+    """
+
+    __slots__ = ("uuid", "trade_type", "target_price", "wallet_id")
+
+    def __init__(self, uuid, trade_type, target_price, wallet_id):
+        self.uuid = uuid
+        self.trade_type = trade_type
+        self.target_price = target_price
+        self.wallet_id = wallet_id
+
+
+class TriggerSide:
+    """
+    Orders of one side kept sorted by trigger key, so the orders crossed by a
+    price are the prefix found by one bisect.
+
+    Buys trigger when the price falls to their target, so their key is the
+    negated target (highest target first); sells trigger when it rises to
+    their target, so their key is the target itself (lowest first).
+    """
+
+    __slots__ = ("sign", "keys", "orders")
+
+    def __init__(self, sign, orders=()):
+        self.sign = sign
+        self.orders = sorted(orders, key=lambda order: sign * order.target_price)
+        self.keys = [sign * order.target_price for order in self.orders]
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order):
+        key = self.sign * order.target_price
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.orders.insert(position, order)
+
+    def remove(self, order):
+        position = bisect_left(self.keys, self.sign * order.target_price)
+        while self.orders[position] is not order:
+            position += 1
+        del self.keys[position]
+        del self.orders[position]
+
+    def crossed(self, price):
+        return self.orders[: bisect_right(self.keys, self.sign * price)]
+
+
+class TriggerBook:
+    """
+    In-memory book of the open ETH/USDT trades, so a price tick only touches
+    the trades whose target it actually crossed.
+
+    Every committed save of a CryptoTrade bumps a version in the shared
+    cache (see trade.signals). `sync` then reads only the trades saved since the last
+    sync, using `updated_at` as a watermark, and applies them to the book.
+    """
+
+    def __init__(self):
+        self.sides = {"buy": TriggerSide(-1), "sell": TriggerSide(1)}
+        self.orders = {}
+        self.lock = threading.Lock()
+        self.version = None
+        self.watermark = None
+        self.loaded_at = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    def apply(self, uuid, trade_type, target_price, wallet_id, status):
+        """
+        Adds, moves or removes one trade according to its current state.
+        """
+        with self.lock:
+            order = self.orders.pop(uuid, None)
+            if order is not None:
+                self.sides[order.trade_type].remove(order)
+            if status == "open" and trade_type in self.sides:
+                order = Order(uuid, trade_type, target_price, wallet_id)
+                self.orders[uuid] = order
+                self.sides[trade_type].add(order)
+
+    def load(self):
+        """
+        Rebuilds the book from every open trade.
+        """
+        version = get_version(TRIGGER_BOOK_VERSION_KEY)
+        started_at = timezone.now()
+        rows = CryptoTrade.objects.filter(status="open").values_list(
+            "uuid", "trade_type", "target_price", "user_wallet_id"
+        )
+        orders = {row[0]: Order(*row) for row in rows}
+        sides = {
+            trade_type: TriggerSide(
+                side.sign,
+                (order for order in orders.values() if order.trade_type == trade_type),
+            )
+            for trade_type, side in self.sides.items()
+        }
+        with self.lock:
+            self.sides = sides
+            self.orders = orders
+        self.version = version
+        self.watermark = started_at
+        self.loaded_at = time.monotonic()
+        logger_info.info(f"Trigger book loaded with {len(orders)} open trades.")
+
+    def sync(self):
+        """
+        Applies the trades saved since the last sync, if any was.
+        """
+        if (
+            self.version is None
+            or time.monotonic() - self.loaded_at > TRIGGER_BOOK_MAX_AGE_SECONDS
+        ):
+            self.load()
+            return
+        version = get_version(TRIGGER_BOOK_VERSION_KEY)
+        if version == self.version:
+            return
+        started_at = timezone.now()
+        # Soft-deleted trades are read too, so they leave the book.
+        rows = CryptoTrade.admin_objects.filter(
+            updated_at__gte=self.watermark - SYNC_OVERLAP
+        ).values_list(
+            "uuid",
+            "trade_type",
+            "target_price",
+            "user_wallet_id",
+            "status",
+            "deleted_at",
+        )
+        for *row, status, deleted_at in rows:
+            self.apply(*row, None if deleted_at else status)
+        self.version = version
+        self.watermark = started_at
+
+    def crossed(self, price):
+        """
+        Returns the buys whose target is at or above `price` and the sells
+        whose target is at or below it.
+        """
+        with self.lock:
+            return self.sides["buy"].crossed(price) + self.sides["sell"].crossed(price)
+
+
+def bump_trigger_book_version():
+    bump_version(TRIGGER_BOOK_VERSION_KEY)
+
+
+trigger_book = TriggerBook()
@@ -6,12 +6,16 @@ from .views import (
     RecifiView,
     RecifiWalletHoldings,
     TradeDetailView,
+    TradeEngineHealth,
     WalletPercentageChange,
 )
 
 urlpatterns = [
     path("trade/", CryptoTradeView.as_view(), name="crypto_trade"),
     path("execute-trade/", ExecuteTrade.as_view(), name="execute_trade"),
+    path(
+        "trade-engine/health/", TradeEngineHealth.as_view(), name="trade_engine_health"
+    ),
     path("Recifi-whale/", RecifiView.as_view(), name="Recifi_whale"),
     path("wallet-holdings/", RecifiWalletHoldings.as_view(), name="wallet_holdings"),
     path("trade/<uuid:uuid>/", TradeDetailView.as_view(), name="cancel_trade"),
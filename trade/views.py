@@ -2,12 +2,19 @@ import logging
 import time
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
+from django.utils.http import parse_etags
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .enums import TradeStatusChoices
+from .enums import PORTFOLIO_WINDOW_HOURS, TradeStatusChoices
 from .models import CryptoTrade, Recifi
+from .engine import TRADE_ENGINE_GAUGE
+from .executor import execute_triggered_trades
+from .holdings import get_holdings
+from .leaderboards import get_leaderboard
+from .snapshots import get_portfolio_changes, get_portfolio_series
 from .serializers import (
     CryptoTradeSerializer,
     recifierializer,
@@ -17,20 +24,8 @@ from .serializers import (
 from accounts.models import DefaultWallet, TelegramUser
 from base.constants import WALLET_ADDRESS_REQ
 from base.views import HandleException
-from utils.covalent import (
-    get_wallet_holdings,
-    get_wallet_24h_percentage_change,
-    get_wallet_1week_percentage_change,
-    get_wallet_1month_percentage_change,
-    get_wallet_1year_percentage_change,
-)
-from utils.encryption import decrypt_text
-from utils.helper import send_buy_sell_notification
-from utils.w3 import (
-    check_balance_eth_usdt,
-    sell_eth_for_usdt,
-    buy_eth_from_usdt,
-)
+from utils.metrics import get_gauge
+from utils.w3 import check_balance_eth_usdt
 
 
 # Configure logging
@@ -149,9 +144,28 @@ class CryptoTradeView(HandleException, APIView):
             status="open",
         ).first()
         if existing_trade:
-            existing_trade.quantity = quantity
-            existing_trade.target_price = target_price
-            existing_trade.save()
+            with transaction.atomic():
+                # Locked and re-checked, as the executor may have claimed it.
+                existing_trade = (
+                    CryptoTrade.objects.select_for_update()
+                    .filter(uuid=existing_trade.uuid, status="open")
+                    .first()
+                )
+                if existing_trade:
+                    existing_trade.quantity = quantity
+                    existing_trade.target_price = target_price
+                    existing_trade.save(
+                        update_fields=["quantity", "target_price", "updated_at"]
+                    )
+            if not existing_trade:
+                logger_info.info("Trade is already being executed.")
+                return Response(
+                    {
+                        "status": False,
+                        "message": "Your order is already being executed.",
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             logger_info.info("Trade updated successfully.")
             return Response(
                 {
@@ -214,101 +228,81 @@ class ExecuteTrade(HandleException, APIView):
 
     def post(self, request):
         """
-        Executes the trade based on the close price.
+        Executes every trade triggered by the close price.
         """
         data = request.data
         close_price = float(data.get("close_price"))
-        with transaction.atomic():
-            trades = CryptoTrade.objects.select_for_update(skip_locked=True).filter(
-                status="open"
+        summary = execute_triggered_trades(close_price)
+        if not summary["open"]:
+            return Response(
+                {"status": False, "message": "No open trades found."},
+                status=status.HTTP_200_OK,
+            )
+        if summary["executed"]:
+            return Response(
+                {
+                    "status": True,
+                    "message": "Trade executed successfully.",
+                    "data": summary,
+                },
+                status=status.HTTP_200_OK,
+            )
+        if summary["failed"]:
+            return Response(
+                {
+                    "status": False,
+                    "message": "Trade execution failed.",
+                    "data": summary,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            if not trades:
-                return Response(
-                    {"status": False, "message": "No open trades found."},
-                    status=status.HTTP_200_OK,
-                )
-            for trade in trades:
-                start_time = time.time()
-                trade.status = "in_process"
-                trade.save()
-                private_key = decrypt_text(trade.user_wallet.private_key)
-                execute_trade = None
-                if trade.trade_type == "buy" and trade.target_price >= close_price:
-                    logger_info.info(
-                        f"Buying ETH from USDT. Close price: {close_price}"
-                    )
-                    execute_trade = buy_eth_from_usdt(
-                        amount_eth=trade.quantity,
-                        target_price=trade.target_price,
-                        private_key=private_key,
-                        current_price=close_price,
-                    )
-                elif trade.trade_type == "sell" and trade.target_price <= close_price:
-                    logger_info.info(
-                        f"Selling ETH for USDT. Close price: {close_price}"
-                    )
-                    execute_trade = sell_eth_for_usdt(
-                        amount_eth=trade.quantity,
-                        target_price=trade.target_price,
-                        private_key=private_key,
-                        current_price=close_price,
-                    )
-                else:
-                    trade.status = "open"
-                    trade.save()
-                    continue
-
-                if execute_trade and execute_trade[0]:
-                    self.handle_successful_trade(
-                        trade, execute_trade, close_price, start_time
-                    )
-                    return Response(
-                        {"status": True, "message": "Trade executed successfully."},
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    self.handle_failed_trade(trade, execute_trade)
-                    return Response(
-                        {"status": False, "message": "Trade execution failed."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
         return Response(
             {"status": False, "message": "No trade executed."},
             status=status.HTTP_200_OK,
         )
 
-    def handle_successful_trade(self, trade, execute_trade, close_price, start_time):
-        trade.status = "closed"
-        trade.save()
-        trade_type = "bought" if trade.trade_type == "buy" else "sold"
-        user = trade.telegram_user.telegram_user_id
-        if trade.trade_type == "sell":
-            message = (
-                f"Hey user 👋, your transaction has been executed ✅. You can track status "
-                f"of the transaction here on Etherscan 🔗{settings.TRANSACTION_HASH_URL}{execute_trade[1]}\n"
-                f"{trade.quantity} ETH {trade_type} successfully at {close_price} price.🕵️‍♂️"
+
+class TradeEngineHealth(HandleException, APIView):
+    """
+    API view to report the health of the trade engine worker.
+    """
+
+    def get(self, request):
+        """
+        Returns the trade engine's last heartbeat, with a 503 status when it
+        is missing or older than three heartbeat intervals.
+        """
+        health = get_gauge(TRADE_ENGINE_GAUGE)
+        max_age = settings.TRADE_ENGINE_HEARTBEAT_SECONDS * 3
+        if not health or time.time() - health["heartbeat_at"] > max_age:
+            logger_error.error("Trade engine heartbeat is missing or stale.")
+            return Response(
+                {
+                    "status": False,
+                    "message": "Trade engine is not running.",
+                    "data": health,
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
-        elif trade.trade_type == "buy":
-            message = (
-                f"Hey user 👋, your transaction has been executed ✅. You can track status "
-                f"of the transaction here on Etherscan 🔗{settings.TRANSACTION_HASH_URL}{execute_trade[1]}\n"
-                f"ETH {trade_type} successfully using {trade.quantity} USDT at {close_price} price."
+        if not health["feed_connected"]:
+            return Response(
+                {
+                    "status": False,
+                    "message": "Trade engine price feed is disconnected.",
+                    "data": health,
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
-        else:
-            message = ""
-        send_buy_sell_notification(user, message)
-        logger_info.info("Trade executed successfully.")
-        end_time = time.time()
-        logger_info.info(
-            f"Trade executed successfully in {end_time - start_time} seconds."
-        )
+        return Response({"status": True, "data": health}, status=status.HTTP_200_OK)
 
-    def handle_failed_trade(self, trade, execute_trade):
-        trade.status = "failed"
-        trade.save()
-        logger_info.info(
-            f"Trade execution failed. {execute_trade[1] if execute_trade else 'Unknown error'}"
-        )
+
+def etag_matches(etag, if_none_match):
+    """
+    Whether an If-None-Match header value (a comma-separated list of ETags,
+    weak or strong, or "*") matches `etag`, with the weak comparison.
+    """
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in (tag.removeprefix("W/") for tag in etags)
 
 
 class RecifiView(HandleException, generics.ListCreateAPIView):
@@ -322,73 +316,29 @@ class RecifiView(HandleException, generics.ListCreateAPIView):
         return recifierializer
 
     def get_queryset(self):
-        """
-        Get the top 5 Recifi objects based on percentage change.
-
-        Excludes objects with no percentage change. If the 'type' query parameter
-        is 'losers', returns the 5 objects with the lowest percentage change.
-        Otherwise, returns the 5 objects with the highest percentage change.
-
-        Returns:
-            QuerySet: The top 5 Recifi objects.
-        """
-        logger_info.info(
-            "GET request to get top 5 Recifi whales based on percentage change."
-        )
-        top_5_type = self.request.query_params.get("type")
-        duration = self.request.query_params.get("duration")
-        queryset = Recifi.objects.all()
-        if top_5_type == "losers":
-            if duration == "7d":
-                queryset = queryset.order_by("pecentage_change_7days")[:5]
-            elif duration == "1m":
-                queryset = queryset.order_by("percentage_change_30days")[:5]
-            elif duration == "1y":
-                queryset = queryset.order_by("pecentage_change_1year")[:5]
-            else:
-                queryset = queryset.order_by("percentage_change_24hrs")[:5]
-        else:
-            if duration == "7d":
-                queryset = queryset.order_by("-pecentage_change_7days")[:5]
-            elif duration == "1m":
-                queryset = queryset.order_by("-percentage_change_30days")[:5]
-            elif duration == "1y":
-                queryset = queryset.order_by("-pecentage_change_1year")[:5]
-            else:
-                queryset = queryset.order_by("-percentage_change_24hrs")[:5]
-
-        logger_info.info("Recifi whales returned successfully.")
-        return queryset
-
-    def get_final_data(self, objs, duration):
-        final_data = []
-        duration_mapping = {
-            "7d": "pecentage_change_7days",
-            "1m": "percentage_change_30days",
-            "1y": "pecentage_change_1year",
-        }
-        default_duration = "percentage_change_24hrs"
-        for i in objs:
-            percentage_change_key = duration_mapping.get(duration, default_duration)
-            final_data.append(
-                {
-                    "name": i["name"],
-                    "wallet_address": i["wallet_address"],
-                    "percentage_change": i[percentage_change_key],
-                }
-            )
-        return final_data
+        return Recifi.objects.all()
 
     def get(self, request, *args, **kwargs):
         """
         API view to get top 5 Recifi whales either losers or gainers based on perchange change.
+
+        The leaderboards are built by the hourly sweep (see
+        trade.leaderboards); each carries an ETag, and a request sending it
+        back in If-None-Match gets a 304 until the leaderboard changes.
         """
         logger_info.info("GET request to get top 5 Recifi whales.")
-        data = super().get(self, request, *args, **kwargs)
-        duration = self.request.query_params.get("duration")
-        final_data = self.get_final_data(data.data, duration)
+        leaderboard = get_leaderboard(
+            request.query_params.get("type"), request.query_params.get("duration")
+        )
+        etag = f'"{leaderboard["etag"]}"'
+        if etag_matches(etag, request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
         logger_info.info("Recifi whales fetched successfully.")
-        return Response({"status": True, "data": final_data}, status=status.HTTP_200_OK)
+        return Response(
+            {"status": True, "data": leaderboard["data"]},
+            status=status.HTTP_200_OK,
+            headers={"ETag": etag},
+        )
 
     def post(self, request, *args, **kwargs):
         """
@@ -408,6 +358,9 @@ class RecifiView(HandleException, generics.ListCreateAPIView):
 class RecifiWalletHoldings(HandleException, APIView):
     """
     API view to get Recifi whales wallet holdings.
+
+    The holdings are the ones stored by the hourly portfolio sweep, fetched
+    live only when none are stored; "updated_at" is when they were fetched.
     """
 
     def get(self, request):
@@ -436,10 +389,15 @@ class RecifiWalletHoldings(HandleException, APIView):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        wallet_holdings = get_wallet_holdings(wallet_address)
+        wallet_holdings = get_holdings(wallet_address)
         logger_info.info(f"Wallet holdings fetched successfully for {wallet_address}.")
         return Response(
-            {"status": True, "data": wallet_holdings}, status=status.HTTP_200_OK
+            {
+                "status": True,
+                "data": wallet_holdings["holdings"],
+                "updated_at": wallet_holdings["fetched_at"],
+            },
+            status=status.HTTP_200_OK,
         )
 
 
@@ -451,6 +409,10 @@ class WalletPercentageChange(HandleException, APIView):
     def get(self, request, wallet_address):
         """
         API view to get pecentage change of the wallet for the provided duration.
+
+        The change is computed from the wallet's stored portfolio snapshots,
+        along with the points of the duration for charts; Covalent is not
+        called.
         """
         logger_info.info("GET request to get percentage change of the wallet.")
         duration = request.query_params.get("duration")
@@ -460,25 +422,43 @@ class WalletPercentageChange(HandleException, APIView):
                 {"status": False, "message": "Duration is required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if duration not in ["1d", "7d", "1m", "1y"]:
+        if duration not in PORTFOLIO_WINDOW_HOURS:
             logger_error.error("Invalid duration.")
             return Response(
                 {"status": False, "message": "Invalid duration."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if duration == "1d":
-            percentage_change = get_wallet_24h_percentage_change(wallet_address)
-        elif duration == "7d":
-            percentage_change = get_wallet_1week_percentage_change(wallet_address)
-        elif duration == "1m":
-            percentage_change = get_wallet_1month_percentage_change(wallet_address)
-        elif duration == "1y":
-            percentage_change = get_wallet_1year_percentage_change(wallet_address)
-        else:
-            percentage_change = None
+        Recifi_whale_wallet = Recifi.objects.filter(
+            wallet_address=wallet_address
+        ).first()
+        if not Recifi_whale_wallet:
+            logger_error.error(
+                f"Provided wallet address {wallet_address} not found in our whale wallets list."
+            )
+            return Response(
+                {
+                    "status": False,
+                    "message": "Provided wallet address not found in our whale wallets list.",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        now = timezone.now()
+        percentage_change = get_portfolio_changes(
+            Recifi_whale_wallet.uuid, [duration], now
+        )[duration]
+        series = get_portfolio_series(Recifi_whale_wallet.uuid, duration, now)
 
         logger_info.info("Historical data fetched successfully.")
         return Response(
-            {"status": True, "data": {"percentage_change": percentage_change}},
+            {
+                "status": True,
+                "data": {
+                    "percentage_change": percentage_change,
+                    "series": [
+                        {"taken_at": taken_at, "total_quote": total_quote}
+                        for taken_at, total_quote in series
+                    ],
+                },
+            },
             status=status.HTTP_200_OK,
         )
@@ -0,0 +1,121 @@
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+BALANCE_PREFIX = "balance"
+BALANCE_BLOCK_KEY = f"{BALANCE_PREFIX}:block"
+BALANCE_TRACKED_KEY = f"{BALANCE_PREFIX}:tracked"
+
+# Asset name of the native Ether balance; any other asset is a token address.
+ETH_ASSET = "eth"
+
+
+class BalanceCache:
+    """
+    Wallet balances keyed by (wallet, asset) in the shared cache, each
+    stamped with the block it was read at.
+
+    The latest block is published by `refresh` (accounts.tasks.
+    refresh_wallet_balances), which re-reads every tracked balance older than
+    the new block before publishing it. A balance is served from the cache as
+    long as it is as recent as the published block; it is read again
+    otherwise, and whenever no block was published in the last
+    BALANCE_CACHE_BLOCK_SECONDS.
+
+    `invalidate` marks balances as dirty right after one of our broadcasts:
+    they are read from the node on every access until a later block, which
+    may include the broadcast transaction, is published.
+    """
+
+    def __init__(self, fetch, get_block_number):
+        self.fetch = fetch
+        self.get_block_number = get_block_number
+
+    def key(self, wallet, asset):
+        return f"{BALANCE_PREFIX}:{wallet.lower()}:{asset.lower()}"
+
+    def block(self):
+        """
+        Returns the latest published block, publishing it when there is none.
+        """
+        block = cache.get(BALANCE_BLOCK_KEY)
+        if block is None:
+            block = self.get_block_number()
+            cache.set(BALANCE_BLOCK_KEY, block, settings.BALANCE_CACHE_BLOCK_SECONDS)
+        return block
+
+    def get(self, wallet, asset):
+        """
+        Returns the balance of `asset` held by `wallet`, as returned by
+        `fetch(wallet, asset)`.
+        """
+        block = self.block()
+        key = self.key(wallet, asset)
+        entry = cache.get(key)
+        if entry is not None and "balance" in entry and entry["block"] >= block:
+            return entry["balance"]
+        balance = self.fetch(wallet, asset)
+        if entry is None or "balance" in entry or block > entry["block"]:
+            cache.set(
+                key,
+                {"block": block, "balance": balance},
+                settings.BALANCE_CACHE_TRACK_SECONDS,
+            )
+            self.track(wallet, asset)
+        return balance
+
+    def track(self, wallet, asset):
+        tracked = cache.get(BALANCE_TRACKED_KEY, {})
+        if (wallet, asset) not in tracked:
+            tracked[(wallet, asset)] = time.time()
+            cache.set(BALANCE_TRACKED_KEY, tracked, None)
+
+    def invalidate(self, wallet, *assets):
+        """
+        Marks the balances of `assets` held by `wallet` as dirty until the
+        next block.
+        """
+        block = self.block()
+        cache.set_many(
+            {self.key(wallet, asset): {"block": block} for asset in assets},
+            settings.BALANCE_CACHE_TRACK_SECONDS,
+        )
+
+    def refresh(self):
+        """
+        Re-reads the tracked balances older than the latest block, then
+        publishes the block. Balances not read from the node for
+        BALANCE_CACHE_TRACK_SECONDS stop being tracked.
+
+        Returns:
+            tuple: (block, balances refreshed, balances that failed).
+        """
+        block = self.get_block_number()
+        now = time.time()
+        tracked = {
+            pair: tracked_at
+            for pair, tracked_at in cache.get(BALANCE_TRACKED_KEY, {}).items()
+            if now - tracked_at < settings.BALANCE_CACHE_TRACK_SECONDS
+        }
+        cache.set(BALANCE_TRACKED_KEY, tracked, None)
+        entries = cache.get_many([self.key(*pair) for pair in tracked])
+        values = {}
+        failed = 0
+        for wallet, asset in tracked:
+            key = self.key(wallet, asset)
+            entry = entries.get(key)
+            if entry is not None and entry["block"] >= block:
+                continue
+            try:
+                values[key] = {"block": block, "balance": self.fetch(wallet, asset)}
+            except Exception as e:
+                failed += 1
+                logger_error.error(f"Balance refresh {wallet} {asset} : {e}")
+        cache.set_many(values, settings.BALANCE_CACHE_TRACK_SECONDS)
+        cache.set(BALANCE_BLOCK_KEY, block, settings.BALANCE_CACHE_BLOCK_SECONDS)
+        return block, len(values), failed
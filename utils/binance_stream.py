@@ -0,0 +1,206 @@
+import json
+import logging
+import threading
+import time
+import websocket
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443/stream"
+
+# Binance allows 1024 streams per connection and 5 incoming messages per
+# second, so subscriptions are sent in batches and spaced out.
+MAX_STREAMS_PER_CONNECTION = 1024
+SUBSCRIBE_BATCH_SIZE = 200
+SUBSCRIBE_INTERVAL_SECONDS = 0.25
+
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+
+
+class BinanceStreamConnection:
+    """
+    One combined-stream websocket whose streams are changed at runtime with
+    SUBSCRIBE / UNSUBSCRIBE messages. The connection is re-opened with
+    exponential backoff whenever it drops, and re-subscribes its streams.
+
+    With `raw`, stream messages are passed undecoded as `on_data(message)`
+    so hot paths can pick out their fields with `extract_field`.
+    """
+
+    def __init__(self, name, on_data, url=BINANCE_STREAM_URL, raw=False):
+        self.name = name
+        self.on_data = on_data
+        self.url = url
+        self.raw = raw
+        self.streams = set()
+        self.ws = None
+        self.is_open = False
+        self.running = False
+        self.request_id = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run_forever, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.ws:
+            self.ws.close()
+
+    def run_forever(self):
+        backoff = RECONNECT_MIN_SECONDS
+        while self.running:
+            opened_at = time.monotonic()
+            self.ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self.on_open,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close,
+            )
+            self.ws.run_forever(ping_interval=180, ping_timeout=10)
+            self.is_open = False
+            if not self.running:
+                break
+            if time.monotonic() - opened_at > RECONNECT_MAX_SECONDS:
+                backoff = RECONNECT_MIN_SECONDS
+            logger_info.info(f"{self.name} reconnecting in {backoff} seconds.")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    def on_open(self, ws):
+        logger_info.info(f"{self.name} opened with {len(self.streams)} streams.")
+        self.is_open = True
+        with self.lock:
+            streams = list(self.streams)
+        self.send("SUBSCRIBE", streams)
+
+    def on_message(self, ws, message):
+        if self.raw and message.startswith('{"stream"'):
+            self.on_data(message)
+            return
+        payload = json.loads(message)
+        if "stream" in payload:
+            self.on_data(payload["stream"], payload["data"])
+        elif payload.get("error"):
+            logger_error.error(f"{self.name} error response : {payload}")
+
+    def on_error(self, ws, error):
+        logger_error.error(f"{self.name} error : {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        logger_info.info(f"{self.name} closed : {close_status_code} {close_msg}")
+
+    @property
+    def capacity(self):
+        return MAX_STREAMS_PER_CONNECTION - len(self.streams)
+
+    def subscribe(self, streams):
+        with self.lock:
+            self.streams.update(streams)
+        if self.is_open:
+            self.send("SUBSCRIBE", streams)
+
+    def unsubscribe(self, streams):
+        with self.lock:
+            self.streams.difference_update(streams)
+        if self.is_open:
+            self.send("UNSUBSCRIBE", streams)
+
+    def send(self, method, streams):
+        for index in range(0, len(streams), SUBSCRIBE_BATCH_SIZE):
+            self.request_id += 1
+            message = {
+                "method": method,
+                "params": streams[index : index + SUBSCRIBE_BATCH_SIZE],
+                "id": self.request_id,
+            }
+            try:
+                self.ws.send(json.dumps(message))
+            except websocket.WebSocketException as e:
+                # The streams are re-sent by on_open after the reconnect.
+                logger_error.error(f"{self.name} could not {method} : {e}")
+                return
+            time.sleep(SUBSCRIBE_INTERVAL_SECONDS)
+
+
+class BinanceStreamClient:
+    """
+    Multiplexes any number of Binance streams over as few combined-stream
+    connections as possible, opening another connection only when the
+    existing ones reached the per-connection stream limit.
+
+    `on_data(stream, data)` is called from the connection threads.
+    """
+
+    def __init__(self, name, on_data):
+        self.name = name
+        self.on_data = on_data
+        self.connections = []
+        self.lock = threading.Lock()
+
+    @property
+    def streams(self):
+        return set().union(*(connection.streams for connection in self.connections))
+
+    def set_streams(self, streams):
+        """
+        Subscribes to the missing streams and unsubscribes from the extra ones.
+        """
+        with self.lock:
+            streams = set(streams)
+            for connection in self.connections:
+                removed = connection.streams - streams
+                if removed:
+                    connection.unsubscribe(sorted(removed))
+
+            added = sorted(streams - self.streams)
+            for connection in self.connections:
+                batch = added[: max(connection.capacity, 0)]
+                if batch:
+                    connection.subscribe(batch)
+                    added = added[len(batch) :]
+            while added:
+                connection = BinanceStreamConnection(
+                    f"{self.name}-{len(self.connections)}", self.on_data
+                )
+                connection.subscribe(added[:MAX_STREAMS_PER_CONNECTION])
+                added = added[MAX_STREAMS_PER_CONNECTION:]
+                self.connections.append(connection)
+                connection.start()
+            logger_info.info(
+                f"{self.name} streaming {len(streams)} streams over {len(self.connections)} connections."
+            )
+
+    def stop(self):
+        for connection in self.connections:
+            connection.stop()
+
+
+def extract_field(message, field):
+    """
+    Returns the raw value of the first `field` key of a stream message
+    without decoding the whole JSON, or None when it is missing.
+
+    Only meant for flat scalar fields whose key appears once in the message,
+    such as the price fields of aggTrade, bookTicker and kline events.
+    """
+    key = f'"{field}":'
+    start = message.find(key)
+    if start == -1:
+        return None
+    start += len(key)
+    if message[start] == '"':
+        start += 1
+        return message[start : message.index('"', start)]
+    end = start
+    while message[end] not in ",}":
+        end += 1
+    return message[start:end]
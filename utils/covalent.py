@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 
 from .exceptions import CovalentAPIError
 from .helper import calculate_percent_change, sum_all_quote
+from .quota import USER_LANE, SharedQuota
 
 
 # Configure logging
@@ -13,8 +14,30 @@ logger = logging.getLogger(__name__)
 logger_info = logging.getLogger("info")
 logger_error = logging.getLogger("error")
 
+# Shared Covalent quota, scheduled like the Etherscan one (see ApiQuota).
+covalent_quota = SharedQuota(
+    name="covalent",
+    rate=settings.COVALENT_RATE_LIMIT,
+    burst=settings.COVALENT_BURST,
+    user_reserve=settings.COVALENT_USER_RESERVE,
+)
 
-def fetch_covalent_data(wallet_address):
+
+def acquire_covalent_quota(lane):
+    """
+    Blocks until the shared Covalent quota grants a call in `lane`, waiting
+    at most as long as the lane allows.
+    """
+    timeout = (
+        settings.COVALENT_USER_MAX_WAIT
+        if lane == USER_LANE
+        else settings.COVALENT_BACKGROUND_MAX_WAIT
+    )
+    covalent_quota.acquire(lane, timeout=timeout)
+
+
+def fetch_covalent_data(wallet_address, lane=USER_LANE):
+    acquire_covalent_quota(lane)
     url = f"https://api.covalenthq.com/v1/1/address/{wallet_address}/balances_v2/?key={settings.COVALENT_API_KEY}"
     response = requests.get(url)
 
@@ -37,8 +60,15 @@ def fetch_covalent_data(wallet_address):
     return data["data"]["items"]
 
 
-def get_wallet_holdings(wallet_address):
-    items = fetch_covalent_data(wallet_address)[:5]
+def get_wallet_holdings(wallet_address, lane=USER_LANE):
+    return get_top_holdings(fetch_covalent_data(wallet_address, lane))
+
+
+def get_top_holdings(items):
+    """
+    Returns the holdings shown for a wallet from its Covalent balance items.
+    """
+    items = items[:5]
     tokens = []
 
     for item in items:
@@ -64,7 +94,24 @@ def get_wallet_holdings(wallet_address):
 
 
 def get_wallet_24h_percentage_change(wallet_address):
-    items = fetch_covalent_data(wallet_address)
+    return get_24h_percentage_change(fetch_covalent_data(wallet_address))
+
+
+def get_wallet_portfolio(wallet_address, lane=USER_LANE):
+    """
+    Returns the 24h percentage change, total value and top holdings of a
+    wallet from a single Covalent balance request, made in `lane` of the
+    shared Covalent quota.
+    """
+    items = fetch_covalent_data(wallet_address, lane)
+    return *get_24h_percentage_change(items), get_top_holdings(items)
+
+
+def get_24h_percentage_change(items):
+    """
+    Returns the 24h percentage change and total value of a wallet from its
+    Covalent balance items.
+    """
     total_holdings = 0
     total_holdings_24h = 0
 
@@ -79,7 +126,8 @@ def get_wallet_24h_percentage_change(wallet_address):
     return percent_change_24h, Decimal(total_holdings)
 
 
-def fetch_historical_data(wallet_address, date):
+def fetch_historical_data(wallet_address, date, lane=USER_LANE):
+    acquire_covalent_quota(lane)
     url = (
         f"https://api.covalenthq.com/v1/1/address/{wallet_address}/historical_balances/"
     )
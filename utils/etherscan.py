@@ -0,0 +1,37 @@
+import logging
+import requests
+from django.conf import settings
+
+from .quota import USER_LANE, SharedQuota
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+etherscan_quota = SharedQuota(
+    name="etherscan",
+    rate=settings.ETHERSCAN_RATE_LIMIT,
+    burst=settings.ETHERSCAN_BURST,
+    user_reserve=settings.ETHERSCAN_USER_RESERVE,
+)
+
+
+
+
+def etherscan_get(params, lane=USER_LANE):
+    """
+    Call the Etherscan API once a token from the shared quota was granted.
+
+    User-facing views should use the default user lane, Celery tasks and
+    sweeps should pass BACKGROUND_LANE so they never starve users.
+    """
+    timeout = (
+        settings.ETHERSCAN_USER_MAX_WAIT
+        if lane == USER_LANE
+        else settings.ETHERSCAN_BACKGROUND_MAX_WAIT
+    )
+    etherscan_quota.acquire(lane, timeout=timeout)
+    params = {**params, "apikey": settings.ETHERSCAN_API_KEY}
+    response = requests.get(settings.ETHERSCAN_API_URL, params=params)
+    response.raise_for_status()
+    return response.json()
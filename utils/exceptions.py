@@ -4,3 +4,12 @@ class CovalentAPIError(Exception):
     """
 
     pass
+
+
+class LogRangeTooLarge(Exception):
+    """
+    Exception raised when a node refuses an eth_getLogs call because its
+    block range, or the number of logs it would return, is too large.
+    """
+
+    pass
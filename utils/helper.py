@@ -1,52 +1,71 @@
+import json
 import logging
 import requests
 import time
-from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
+from pulse_tracker.enums import TICKER_WINDOW
 from pulse_tracker.models import WatchList
-from accounts.models import TelegramUser
+from pulse_tracker.watch_index import watch_index
+from .metrics import record_gauges
+from .etherscan import etherscan_get, USER_LANE
+from .telegram import TelegramBroadcaster, telegram_user_id_chunks
 
 logger = logging.getLogger(__name__)
 logger_info = logging.getLogger("info")
 logger_error = logging.getLogger("error")
 
+BINANCE_KLINES_LIMIT = 1000
 
-def send_buy_sell_notification(user, message):
-    """
-    Send a notification to a user.
-    """
-    token = settings.BUY_SELL_BOT_TOKEN
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    data = {
-        "chat_id": user,
-        "text": message,
-    }
-    response = requests.post(url, json=data)
-    logger_info.info(f"Notification for user {user} : {response.json()}")
-    return True if response.status_code == 200 else False
 
-
-def send_pulse_tracker_notification(user, message, notification_data):
+def get_pulse_tracker_payload(message, notification_data):
     """
-    Send a notification to the pulse tracker bot.
+    Build the pulse tracker bot message with its Buy/Sell button.
     """
     symbol = notification_data["symbol"]
     token_address = notification_data["token_address"]
     percentage = notification_data["percentage"]
-    url = f"https://api.telegram.org/bot{settings.PULSE_TRACKER_BOT_TOKEN}/sendMessage"
     bot_link = (
         f"https://t.me/RecifiAi_sell_bot?start={symbol}_{token_address}_{percentage}"
     )
-    data = {
-        "chat_id": user,
+    return {
         "text": message,
         "reply_markup": {"inline_keyboard": [[{"text": "Buy/Sell", "url": bot_link}]]},
     }
-    response = requests.post(url, json=data)
-    logger_info.info(f"Notification for user {user} : {response.json()}")
-    return True if response.status_code == 200 else False
+
+
+def queue_notifications(bot, messages):
+    """
+    Write messages to the notification outbox. Call it inside the transaction
+    of the state change being announced; the delivery worker is triggered once
+    that transaction commits.
+
+    Args:
+        bot (str): One of NotificationBotChoices.
+        messages (list): (chat_id, sendMessage body without chat_id) pairs.
+    """
+    from accounts.models import NotificationOutbox
+    from accounts.tasks import deliver_notifications
+
+    NotificationOutbox.objects.bulk_create(
+        [
+            NotificationOutbox(bot=bot, chat_id=chat_id, payload=payload)
+            for chat_id, payload in messages
+        ]
+    )
+    if messages:
+        transaction.on_commit(deliver_notifications.delay, robust=True)
+
+
+def queue_buy_sell_notification(user, message):
+    """
+    Queue a notification to a user through the outbox.
+    """
+    queue_notifications("buy_sell", [(user, {"text": message})])
 
 
 def send_Recifi_alert_notification(notification_data):
@@ -56,37 +75,26 @@ def send_Recifi_alert_notification(notification_data):
     symbol = notification_data["symbol"]
     token_address = notification_data["token_address"]
     percentage = notification_data["percentage"]
-    url = (
-        f"https://api.telegram.org/bot{settings.Recifi_ALERT_BOT_TOKEN}/sendMessage"
-    )
+    window = notification_data["window"]
     bot_link = "https://t.me/RecifiAi_sell_bot"
 
     message = (
         f"🚨 Whale Movement Alert! 🚨\n"
-        f"🐋 {percentage}% whale wallets have just bought {symbol}!\n"
+        f"🐋 {percentage}% whale wallets have bought {symbol} in the last {window}!\n"
         f"📜 Contract Address: {token_address}\n"
         f"🔍 Check it out on [Etherscan]({settings.ETHERSCAN_URL}{token_address}) "
         f"or [DEXTOOLS]({settings.DEXTOOLS_URL}{token_address})!"
     )
 
-    users = TelegramUser.objects.all()
-    for user in users:
-        data = {
-            "chat_id": user.telegram_user_id,
-            "text": message,
-            "parse_mode": "Markdown",
-            "reply_markup": {"inline_keyboard": [[{"text": "Buy", "url": bot_link}]]},
-        }
-
-        try:
-            response = requests.post(url, json=data)
-            logger_info.info(
-                f"Notification sent to user {user.telegram_user_id}: {response.json()}"
-            )
-        except requests.exceptions.RequestException as e:
-            logger_info.error(
-                f"Failed to send notification to user {user.telegram_user_id}: {e}"
-            )
+    data = {
+        "text": message,
+        "parse_mode": "Markdown",
+        "reply_markup": {"inline_keyboard": [[{"text": "Buy", "url": bot_link}]]},
+    }
+    broadcaster = TelegramBroadcaster(settings.RECIFI_ALERT_BOT_TOKEN)
+    result = broadcaster.broadcast(data, telegram_user_id_chunks())
+    logger_info.info(f"Recifi alert for {symbol} broadcasted : {result}")
+    return result
 
 
 def get_watchlist_symbols():
@@ -97,25 +105,147 @@ def get_watchlist_symbols():
     return list(symbols)
 
 
+def get_binance_price_changes(symbols):
+    """
+    Get the 24hr percentage change of the given symbols against USDT.
+
+    Symbols are fetched with the multi-symbol ticker endpoint, in chunks of
+    BINANCE_TICKER_CHUNK. Binance rejects a whole chunk when one symbol is not
+    listed, in which case the full ticker list is fetched once and filtered.
+    """
+    pairs = {f"{symbol}USDT": symbol for symbol in symbols}
+    pair_names = list(pairs)
+    tickers = []
+    for index in range(0, len(pair_names), settings.BINANCE_TICKER_CHUNK):
+        chunk = pair_names[index : index + settings.BINANCE_TICKER_CHUNK]
+        params = {"symbols": json.dumps(chunk, separators=(",", ":"))}
+        response = requests.get(settings.BINANCE_API, params=params)
+        if response.status_code == 200:
+            tickers.extend(response.json())
+            continue
+        logger_info.info(
+            f"Binance rejected ticker chunk ({response.status_code}), fetching all tickers."
+        )
+        response = requests.get(settings.BINANCE_API)
+        response.raise_for_status()
+        tickers = response.json()
+        break
+
+    price_changes = {}
+    for ticker in tickers:
+        symbol = pairs.get(ticker["symbol"])
+        if symbol is not None:
+            price_changes[symbol] = float(ticker["priceChangePercent"])
+    return price_changes
+
+
+def get_binance_minute_closes(symbol, minutes):
+    """
+    Get the 1 minute closes of a symbol against USDT over the last `minutes`
+    minutes, paging through the klines endpoint.
+
+    Returns:
+        list: (minute since the epoch, close price) pairs, oldest first.
+    """
+    start_time = (int(time.time()) // 60 - minutes) * 60000
+    closes = []
+    while True:
+        params = {
+            "symbol": f"{symbol}USDT",
+            "interval": "1m",
+            "startTime": start_time,
+            "limit": BINANCE_KLINES_LIMIT,
+        }
+        response = requests.get(settings.BINANCE_KLINES_API, params=params)
+        response.raise_for_status()
+        klines = response.json()
+        closes.extend((kline[0] // 60000, float(kline[4])) for kline in klines)
+        if len(klines) < BINANCE_KLINES_LIMIT:
+            return closes
+        start_time = klines[-1][0] + 60000
+
+
+def notify_watchers(price_changes, window="24h"):
+    """
+    Evaluate every watcher of the given symbols over one window in one pass
+    and queue the pulse tracker alerts that are due.
+
+    Triggered watchers are selected from the in-memory watch index, so only
+    they and the disarmed watchers waiting to be re-armed are read from the
+    database.
+
+    Args:
+        price_changes (dict): Percentage change by symbol.
+        window (str): The window the changes were measured over.
+
+    Returns:
+        int: Number of alerts queued.
+    """
+    now = timezone.now()
+    watch_index.refresh(list(price_changes))
+    triggered = {}
+    for symbol, percentage in price_changes.items():
+        for uuid, chat_id, contract_address in watch_index.triggered(
+            symbol, percentage, window
+        ):
+            triggered[uuid] = (chat_id, contract_address)
+
+    messages = []
+    changed = []
+    with transaction.atomic():
+        watchlists = WatchList.objects.select_for_update().filter(
+            Q(uuid__in=list(triggered), is_alert_armed=True)
+            | Q(symbol__in=list(price_changes), window=window, is_alert_armed=False)
+        )
+        for watchlist in watchlists:
+            percentage = price_changes[watchlist.symbol]
+            is_due, is_changed = watchlist.update_alert_state(percentage, now)
+            if is_changed:
+                changed.append(watchlist)
+            if not is_due:
+                continue
+            symbol = watchlist.symbol
+            user, contract_address = triggered[watchlist.uuid]
+            message = f"🎉 Congratulations! Your token {symbol} has increased by {percentage}% in the last {window}! 📈 If you would like to buy or sell, please proceed. 💰"
+            notification_data = {
+                "symbol": symbol,
+                "percentage": percentage,
+                "token_address": contract_address,
+            }
+            messages.append(
+                (user, get_pulse_tracker_payload(message, notification_data))
+            )
+        WatchList.objects.bulk_update(
+            changed,
+            ["is_alert_armed", "last_alerted_at", "last_alert_percentage"],
+        )
+        queue_notifications("pulse_tracker", messages)
+    logger_info.info(
+        f"{len(triggered)} watchers triggered, {len(messages)} pulse tracker alerts queued, "
+        f"{len(changed)} alert states updated."
+    )
+    return len(messages)
+
+
 def get_percentage_change():
     """
-    Get the percentage change of the crypto symbols
+    Get the 24hr percentage change of the crypto symbols and notify their
+    24h watchers, the only ones not evaluated by the pulse tracker stream.
     """
     start = time.time()
     symbols = get_watchlist_symbols()
-    binance_url = f"{settings.BINANCE_API}"
-    for symbol in symbols:
-        params = {"symbol": f"{symbol}USDT"}
-        response = requests.get(binance_url, params=params)
-
-        if response.status_code == 200:
-            data = response.json()
-            price_change_percent = float(data["priceChangePercent"])
-            url = f"{settings.BACKEND_URL}/api/notify/"
-            data = {"symbol": symbol, "percentage": price_change_percent}
-            logger_info.info(f"Sending notification for {symbol} : {data}")
-            requests.post(url, data)
+    price_changes = get_binance_price_changes(symbols) if symbols else {}
+    alerts = notify_watchers(price_changes, TICKER_WINDOW) if price_changes else 0
     end = time.time()
+    record_gauges(
+        "pulse_tracker_sweep",
+        {
+            "duration": round(end - start, 3),
+            "symbols": len(symbols),
+            "priced_symbols": len(price_changes),
+            "alerts": alerts,
+        },
+    )
     return f"Time taken to compelete pulse-tracker notification: {end - start} seconds."
 
 
@@ -123,7 +253,6 @@ def get_transaction_history(wallet_address):
     """
     Get the transaction history for a wallet address.
     """
-    etherscan_url = settings.ETHERSCAN_API_URL
     params = {
         "module": "account",
         "action": "txlist",
@@ -131,16 +260,13 @@ def get_transaction_history(wallet_address):
         "startblock": 0,
         "endblock": 99999999,
         "sort": "asc",
-        "apikey": settings.ETHERSCAN_API_KEY,
     }
-    response = requests.get(etherscan_url, params=params)
-    response.raise_for_status()
-    data = response.json()
+    data = etherscan_get(params, lane=USER_LANE)
     if data["status"] == "1":
         transactions = data["result"][::-1][:10]
         response_data = []
-        for transaction in transactions:
-            tx_hash_url = f"{settings.TRANSACTION_HASH_URL}{transaction['hash']}"
+        for tx in transactions:
+            tx_hash_url = f"{settings.TRANSACTION_HASH_URL}{tx['hash']}"
             response_data.append({"tx_hash_url": tx_hash_url})
         return response_data
     else:
@@ -156,52 +282,6 @@ def calculate_percent_change(current_value, previous_value):
         return Decimal(0)
 
 
-def get_bought_token(wallet_address, minutes=60):
-    """
-    Get the transaction history for a wallet address and filter transactions within the specified minutes.
-    """
-    logger_info.info(
-        f"Fetching Recifi bought token addresses for wallet {wallet_address}."
-    )
-    params = {
-        "module": "account",
-        "action": "tokentx",
-        "address": wallet_address,
-        "startblock": 0,
-        "endblock": 99999999,
-        "sort": "asc",
-        "apikey": settings.ETHERSCAN_API_KEY,
-    }
-    response = requests.get(settings.ETHERSCAN_API_URL, params=params)
-    response.raise_for_status()
-    data = response.json()
-
-    if data["status"] == "1":
-        transactions = data["result"]
-        bought_token_addresses = []
-        now = datetime.now(timezone.utc)
-
-        # Filter transactions based on the minutes parameter
-        if minutes is not None:
-            cutoff_time = now - timedelta(minutes=minutes)
-            transactions = [
-                tx
-                for tx in transactions
-                if datetime.fromtimestamp(int(tx["timeStamp"]), timezone.utc)
-                >= cutoff_time
-            ]
-
-        # Extract bought token addresses
-        for transaction in transactions:
-            if transaction["to"].lower() == wallet_address.lower():
-                bought_token_addresses.append(transaction["contractAddress"])
-
-        bought_token_addresses = list(set(bought_token_addresses))
-        return bought_token_addresses
-    else:
-        return []
-
-
 def sum_all_quote(data):
     total_sum = 0
     for i in data:
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+METRICS_PREFIX = "metrics"
+METRIC_GROUPS_KEY = f"{METRICS_PREFIX}:groups"
+HISTOGRAMS_KEY = f"{METRICS_PREFIX}:histograms"
+
+# Upper bounds of the histogram buckets in milliseconds; one more bucket
+# counts everything above the last bound.
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Observations are aggregated in-process and added to the shared cache at
+# most this often, so timing a stage costs no cache round trip.
+HISTOGRAM_FLUSH_SECONDS = 5
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+_flushed_at = time.monotonic()
+_breakdown = ContextVar("timing_breakdown", default=None)
+
+
+def record_gauges(group, values):
+    """
+    Store the latest values of a group of gauges (e.g. the last pulse tracker
+    sweep) in the shared cache, so any process can report them.
+    """
+    values = {**values, "updated_at": timezone.now().isoformat()}
+    cache.set(f"{METRICS_PREFIX}:gauge:{group}", values, None)
+    groups = cache.get(METRIC_GROUPS_KEY, set())
+    if group not in groups:
+        cache.set(METRIC_GROUPS_KEY, groups | {group}, None)
+    logger_info.info(f"Metrics {group} : {values}")
+
+
+def get_gauge(group):
+    """
+    Returns the latest values of one gauge group, or None.
+    """
+    return cache.get(f"{METRICS_PREFIX}:gauge:{group}")
+
+
+def get_gauges():
+    """
+    Returns the latest values of every gauge group.
+    """
+    groups = cache.get(METRIC_GROUPS_KEY, set())
+    values = cache.get_many([f"{METRICS_PREFIX}:gauge:{group}" for group in groups])
+    return {
+        key.rsplit(":", 1)[-1]: value for key, value in sorted(values.items())
+    }
+
+
+def observe(name, seconds):
+    """
+    Add one duration to the histogram `name`.
+    """
+    global _flushed_at
+    milliseconds = seconds * 1000
+    with _histograms_lock:
+        histogram = _histograms.setdefault(
+            name, [0] * (len(HISTOGRAM_BUCKETS_MS) + 1) + [0, 0]
+        )
+        histogram[bisect_left(HISTOGRAM_BUCKETS_MS, milliseconds)] += 1
+        histogram[-2] += 1
+        histogram[-1] += round(milliseconds * 1000)
+        due = time.monotonic() - _flushed_at >= HISTOGRAM_FLUSH_SECONDS
+        if due:
+            _flushed_at = time.monotonic()
+    if due:
+        flush_histograms()
+
+
+def flush_histograms():
+    """
+    Add the observations aggregated in this process to the shared cache.
+    """
+    global _histograms
+    with _histograms_lock:
+        histograms, _histograms = _histograms, {}
+    if not histograms:
+        return
+    names = cache.get(HISTOGRAMS_KEY, set())
+    if not names.issuperset(histograms):
+        cache.set(HISTOGRAMS_KEY, names | set(histograms), None)
+    for name, histogram in histograms.items():
+        for index, value in enumerate(histogram):
+            if value:
+                key = f"{METRICS_PREFIX}:histogram:{name}:{index}"
+                cache.add(key, 0, None)
+                cache.incr(key, value)
+
+
+def get_histograms():
+    """
+    Returns every histogram with its count, average, estimated percentiles
+    (bucket upper bounds) and bucket counts, in milliseconds.
+    """
+    names = sorted(cache.get(HISTOGRAMS_KEY, set()))
+    size = len(HISTOGRAM_BUCKETS_MS) + 3
+    keys = [
+        f"{METRICS_PREFIX}:histogram:{name}:{index}"
+        for name in names
+        for index in range(size)
+    ]
+    values = cache.get_many(keys)
+    bounds = [str(bound) for bound in HISTOGRAM_BUCKETS_MS] + ["+Inf"]
+    histograms = {}
+    for name in names:
+        histogram = [
+            values.get(f"{METRICS_PREFIX}:histogram:{name}:{index}", 0)
+            for index in range(size)
+        ]
+        buckets, count, total = histogram[:-2], histogram[-2], histogram[-1]
+        if not count:
+            continue
+        percentiles = {}
+        for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            seen = 0
+            for bound, bucket in zip(bounds, buckets):
+                seen += bucket
+                if seen >= count * fraction:
+                    percentiles[label] = bound
+                    break
+        histograms[name] = {
+            "count": count,
+            "avg_ms": round(total / count / 1000, 3),
+            **percentiles,
+            "buckets": dict(zip(bounds, buckets)),
+        }
+    return histograms
+
+
+@contextmanager
+def span(stage):
+    """
+    Time a stage into its histogram and into the timing breakdown of the
+    operation it runs in, if any.
+
+        with span("swap_eth_to_token.broadcast"):
+            tx_hash = w3.eth.send_raw_transaction(...)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(stage, elapsed)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown[stage] = breakdown.get(stage, 0) + elapsed
+
+
+@contextmanager
+def timing_breakdown(name, label=""):
+    """
+    Time a whole operation into the histogram `name`, collect the spans run
+    inside it and log them as one per-stage breakdown when it ends.
+    """
+    breakdown = {}
+    token = _breakdown.set(breakdown)
+    start = time.perf_counter()
+    try:
+        yield breakdown
+    finally:
+        elapsed = time.perf_counter() - start
+        _breakdown.reset(token)
+        observe(name, elapsed)
+        stages = ", ".join(
+            f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in breakdown.items()
+        )
+        label = f" {label}" if label else ""
+        logger_info.info(
+            f"{name}{label} timing : total {elapsed * 1000:.1f} ms | {stages}"
+        )
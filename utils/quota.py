@@ -0,0 +1,176 @@
+import logging
+import time
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+USER_LANE = "user"
+BACKGROUND_LANE = "background"
+
+# Longest single sleep between two attempts, so a waiter notices tokens
+# released by a refill without oversleeping.
+MAX_SLEEP_SECONDS = 1.0
+
+# A lane's queue depth is dropped when none of its waiters made an attempt
+# for this long, e.g. after a waiter was killed while queued.
+QUEUE_EXPIRY_SECONDS = 10.0
+
+
+class QuotaTimeout(Exception):
+    """
+    Exception raised when an API call waited longer than its lane allows.
+    """
+
+    pass
+
+
+class SharedQuota:
+    """
+    Token bucket scheduler of one third-party API (e.g. Etherscan, Covalent)
+    shared by every process through an ApiQuota row.
+
+    Calls in the user lane may drain the bucket down to zero, while calls in
+    the background lane (whale sweeps, Celery tasks) leave `user_reserve`
+    tokens untouched and back off whenever a user-facing call is waiting.
+    """
+
+    def __init__(self, name, rate, burst, user_reserve):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.user_reserve = user_reserve
+
+    def acquire(self, lane=USER_LANE, timeout=None):
+        """
+        Block until a token is available for the given lane.
+
+        Returns:
+            float: Seconds spent waiting for the token.
+
+        Raises:
+            QuotaTimeout: If no token was granted within `timeout` seconds.
+        """
+        start = time.monotonic()
+        queued = False
+        try:
+            while True:
+                waited = time.monotonic() - start
+                wait = self._try_take(lane, waited, queued)
+                if wait == 0:
+                    # Taking the token also took the call out of the queue.
+                    queued = False
+                    if waited:
+                        logger_info.info(
+                            f"{self.name} {lane} call waited {waited:.3f} seconds "
+                            "for quota."
+                        )
+                    return waited
+                queued = True
+                if timeout is not None and waited + wait > timeout:
+                    logger_error.error(
+                        f"{self.name} {lane} call gave up after waiting "
+                        f"{waited:.3f} seconds."
+                    )
+                    raise QuotaTimeout(
+                        f"{self.name.capitalize()} is busy right now. "
+                        "Kindly try again after some time."
+                    )
+                time.sleep(min(wait, MAX_SLEEP_SECONDS))
+        finally:
+            if queued:
+                self._leave_queue(lane)
+
+    def _try_take(self, lane, waited, queued):
+        """
+        Refill the bucket and take one token if the lane is allowed to.
+
+        Returns:
+            float: 0 when a token was taken, otherwise the seconds to sleep.
+        """
+        from accounts.models import ApiQuota
+
+        with transaction.atomic():
+            quota, _ = ApiQuota.objects.select_for_update().get_or_create(
+                name=self.name, defaults={"tokens": self.burst}
+            )
+            now = timezone.now()
+            elapsed = max((now - quota.refilled_at).total_seconds(), 0)
+            quota.tokens = min(self.burst, quota.tokens + elapsed * self.rate)
+            quota.refilled_at = now
+            update_fields = ["tokens", "refilled_at"]
+            for queue_lane in (USER_LANE, BACKGROUND_LANE):
+                queued_at = getattr(quota, f"{queue_lane}_queued_at")
+                if getattr(quota, f"{queue_lane}_queue_depth") > 0 and (
+                    queued_at is None
+                    or (now - queued_at).total_seconds() > QUEUE_EXPIRY_SECONDS
+                ):
+                    logger_error.error(
+                        f"{self.name} {queue_lane} queue expired with depth "
+                        f"{getattr(quota, f'{queue_lane}_queue_depth')}."
+                    )
+                    setattr(quota, f"{queue_lane}_queue_depth", 0)
+                    update_fields.append(f"{queue_lane}_queue_depth")
+
+            if lane == USER_LANE:
+                floor = 0
+                blocked = False
+            else:
+                floor = self.user_reserve
+                blocked = quota.user_queue_depth > 0
+
+            if not blocked and quota.tokens - 1 >= floor:
+                quota.tokens -= 1
+                setattr(
+                    quota,
+                    f"{lane}_requests",
+                    getattr(quota, f"{lane}_requests") + 1,
+                )
+                setattr(
+                    quota,
+                    f"{lane}_wait_seconds",
+                    getattr(quota, f"{lane}_wait_seconds") + waited,
+                )
+                quota.max_wait_seconds = max(quota.max_wait_seconds, waited)
+                update_fields += [
+                    f"{lane}_requests",
+                    f"{lane}_wait_seconds",
+                    "max_wait_seconds",
+                ]
+                if queued:
+                    setattr(
+                        quota,
+                        f"{lane}_queue_depth",
+                        max(getattr(quota, f"{lane}_queue_depth") - 1, 0),
+                    )
+                    update_fields.append(f"{lane}_queue_depth")
+                quota.save(update_fields=update_fields)
+                return 0
+
+            if not queued:
+                setattr(
+                    quota,
+                    f"{lane}_queue_depth",
+                    getattr(quota, f"{lane}_queue_depth") + 1,
+                )
+                update_fields.append(f"{lane}_queue_depth")
+            setattr(quota, f"{lane}_queued_at", now)
+            update_fields.append(f"{lane}_queued_at")
+            quota.save(update_fields=update_fields)
+
+        if blocked:
+            return 1 / self.rate
+        return max((floor + 1 - quota.tokens) / self.rate, 0.001)
+
+    def _leave_queue(self, lane):
+        """
+        Remove a waiter that gave up or failed from the lane's queue depth.
+        """
+        from accounts.models import ApiQuota
+
+        ApiQuota.objects.filter(
+            name=self.name, **{f"{lane}_queue_depth__gt": 0}
+        ).update(**{f"{lane}_queue_depth": F(f"{lane}_queue_depth") - 1})
@@ -0,0 +1,232 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+logger_info = logging.getLogger("info")
+logger_error = logging.getLogger("error")
+
+TELEGRAM_SEND_MESSAGE_URL = "https://api.telegram.org/bot{token}/sendMessage"
+
+
+async def read_body(response):
+    """
+    Returns the JSON body of a Telegram response, or the start of its text
+    when it is not a JSON object (e.g. an HTML error page from a proxy).
+    """
+    text = (await response.read()).decode(errors="replace")
+    try:
+        body = json.loads(text)
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {"description": text[:200]}
+    return body
+
+
+class AsyncRateLimiter:
+    """
+    Spaces out calls so that at most `rate` of them start per second.
+
+    `pause` pushes every following call back, which is how a Telegram
+    `retry_after` is applied to the whole broadcast rather than one chat.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_at = 0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        now = asyncio.get_running_loop().time()
+        self.next_at = max(self.next_at, now + seconds)
+
+
+class TelegramBroadcaster:
+    """
+    Sends Telegram messages to many chats concurrently.
+
+    A pooled aiohttp session is shared by `concurrency` workers fed from a
+    bounded queue, so recipients can be streamed from the database in chunks.
+    Telegram's global limit is enforced by an AsyncRateLimiter and its
+    per-chat limit by remembering when each chat was last messaged.
+    """
+
+    def __init__(
+        self,
+        token,
+        concurrency=None,
+        global_rate=None,
+        per_chat_interval=None,
+        max_retries=None,
+    ):
+        self.url = TELEGRAM_SEND_MESSAGE_URL.format(token=token)
+        self.concurrency = concurrency or settings.TELEGRAM_BROADCAST_CONCURRENCY
+        self.global_rate = global_rate or settings.TELEGRAM_GLOBAL_RATE
+        self.per_chat_interval = (
+            settings.TELEGRAM_PER_CHAT_INTERVAL
+            if per_chat_interval is None
+            else per_chat_interval
+        )
+        self.max_retries = (
+            settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        )
+
+    def broadcast(self, payload, recipient_chunks):
+        """
+        Send `payload` to every chat id yielded by `recipient_chunks`.
+
+        Args:
+            payload (dict): sendMessage body without the chat_id.
+            recipient_chunks (iterable): Lists of chat ids, read lazily.
+
+        Returns:
+            dict: Delivered, failed and throttled counts and the duration in seconds.
+        """
+        message_chunks = (
+            [(chat_id, {**payload, "chat_id": chat_id}) for chat_id in chunk]
+            for chunk in recipient_chunks
+        )
+        return asyncio.run(self._run(message_chunks))
+
+    def send_messages(self, messages):
+        """
+        Send a batch of different messages concurrently.
+
+        Args:
+            messages (list): (key, sendMessage body) pairs.
+
+        Returns:
+            tuple: The summary dict and a dict mapping each key to None when
+            delivered or to the error message when not.
+        """
+        outcomes = {}
+        summary = asyncio.run(self._run([messages], outcomes))
+        return summary, outcomes
+
+    async def _run(self, message_chunks, outcomes=None):
+        start = time.time()
+        self.limiter = AsyncRateLimiter(self.global_rate)
+        self.last_sent = {}
+        self.result = {"delivered": 0, "failed": 0, "throttled": 0}
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=settings.TELEGRAM_REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as session:
+            workers = [
+                asyncio.create_task(self._worker(session, queue, outcomes))
+                for _ in range(self.concurrency)
+            ]
+            chunks = iter(message_chunks)
+            next_chunk = sync_to_async(next, thread_sensitive=True)
+            while True:
+                chunk = await next_chunk(chunks, None)
+                if chunk is None:
+                    break
+                for message in chunk:
+                    await queue.put(message)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        self.result["duration"] = round(time.time() - start, 3)
+        return self.result
+
+    async def _worker(self, session, queue, outcomes):
+        while True:
+            message = await queue.get()
+            if message is None:
+                return
+            key, data = message
+            try:
+                error = await self._send(session, data)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                logger_error.error(
+                    f"Failed to send notification to user {data['chat_id']}: {error}"
+                )
+            self.result["failed" if error else "delivered"] += 1
+            if outcomes is not None:
+                outcomes[key] = error
+
+    async def _wait_for_chat(self, chat_id):
+        now = asyncio.get_running_loop().time()
+        ready_at = self.last_sent.get(chat_id, now - self.per_chat_interval)
+        ready_at += self.per_chat_interval
+        self.last_sent[chat_id] = max(now, ready_at)
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+    async def _send(self, session, data):
+        """
+        Send one message, retrying network errors, 429 and 5xx responses.
+
+        Returns:
+            str: None when delivered, otherwise the last error.
+        """
+        chat_id = data["chat_id"]
+        error = None
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_chat(chat_id)
+            await self.limiter.wait()
+            try:
+                async with session.post(self.url, json=data) as response:
+                    if response.status == 200:
+                        return None
+                    body = await read_body(response)
+                    error = f"{response.status} {body}"
+                    if response.status == 429:
+                        retry_after = body.get("parameters", {}).get("retry_after", 1)
+                        self.result["throttled"] += 1
+                        self.limiter.pause(retry_after)
+                        logger_info.info(
+                            f"Telegram throttled chat {chat_id}, retrying after {retry_after} seconds."
+                        )
+                        continue
+                    if response.status >= 500:
+                        logger_error.error(
+                            f"Failed to send notification to user {chat_id} (attempt {attempt + 1}): {error}"
+                        )
+                        continue
+                    logger_error.error(
+                        f"Failed to send notification to user {chat_id}: {error}"
+                    )
+                    return error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or e.__class__.__name__
+                logger_error.error(
+                    f"Failed to send notification to user {chat_id} (attempt {attempt + 1}): {error}"
+                )
+        return error
+
+
+def telegram_user_id_chunks(chunk_size=None):
+    """
+    Yield Telegram user ids in chunks using keyset pagination on the primary key.
+    """
+    from accounts.models import TelegramUser
+
+    chunk_size = chunk_size or settings.TELEGRAM_RECIPIENT_CHUNK
+    last_uuid = None
+    while True:
+        queryset = TelegramUser.objects.order_by("uuid")
+        if last_uuid is not None:
+            queryset = queryset.filter(uuid__gt=last_uuid)
+        rows = list(queryset.values_list("uuid", "telegram_user_id")[:chunk_size])
+        if not rows:
+            return
+        last_uuid = rows[-1][0]
+        yield [telegram_user_id for _, telegram_user_id in rows]
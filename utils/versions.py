@@ -0,0 +1,17 @@
+from django.core.cache import cache
+
+
+def bump_version(key):
+    """
+    Increments a version counter in the shared cache, so every process
+    holding an in-memory copy of the data it guards knows to reload it.
+    """
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_version(key):
+    return cache.get(key, 0)
@@ -1,18 +1,36 @@
 import json
 import logging
-import requests
+from datetime import datetime, timezone
+from functools import lru_cache
 from django.conf import settings
 from eth_account import Account
 from eth_utils import to_checksum_address
 from pathlib import Path
 from web3 import Web3
 
+from .balances import ETH_ASSET, BalanceCache
+from .etherscan import etherscan_get, USER_LANE
+from .exceptions import LogRangeTooLarge
+from .metrics import span
+
 logger = logging.getLogger(__name__)
 logger_info = logging.getLogger("info")
 logger_error = logging.getLogger("error")
 
 w3 = Web3(Web3.HTTPProvider(settings.WEB3_PROVIDER_URL))
 
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# eth_getLogs errors of nodes refusing a block range or result set as too
+# large: the "limit exceeded" JSON-RPC code, and the messages of the common
+# providers ("query returned more than 10000 results", "block range is too
+# wide", "Log response size exceeded", ...).
+LOG_LIMIT_ERROR_CODE = -32005
+LOG_RANGE_ERRORS = ("more than", "block range", "range is too", "too many", "exceed")
+
+USDT_ADDRESS = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+
 
 def load_erc20_contract(address):
     abi_path = Path(__file__).resolve().parent / "erc_20_abi.json"
@@ -48,6 +66,40 @@ def check_balance(address):
     return w3.from_wei(balance, "ether")
 
 
+def fetch_balance(wallet_address, asset):
+    """
+    Reads one balance of the balance cache from the node: the Ether balance,
+    or the (name, balance) of a token.
+    """
+    if asset == ETH_ASSET:
+        return check_balance(wallet_address)
+    name, balance = get_token_balance(asset, wallet_address)
+    if name is None:
+        raise ValueError(f"{asset} is not an ERC-20 token.")
+    return name, balance
+
+
+balance_cache = BalanceCache(fetch_balance, lambda: w3.eth.block_number)
+
+
+def get_cached_balance(address):
+    """
+    Ether balance of a wallet, from the balance cache.
+    """
+    return balance_cache.get(address, ETH_ASSET)
+
+
+def get_cached_token_balance(token_address, wallet_address):
+    """
+    (name, balance) of a token held by a wallet, from the balance cache.
+    """
+    try:
+        return balance_cache.get(wallet_address, token_address)
+    except ValueError as e:
+        logger_error.error(str(e))
+        return None, 0
+
+
 def transfer_token(private_key, wallet_address, receiver_address, amount):
     """
     Transfer Ether from one wallet to another.
@@ -55,8 +107,10 @@ def transfer_token(private_key, wallet_address, receiver_address, amount):
     Raises:
         ValueError: If there are insufficient funds to cover the transfer and gas fees.
     """
-    balance = check_balance(wallet_address)
-    gas_price = w3.eth.gas_price
+    with span("transfer_token.balance_check"):
+        balance = check_balance(wallet_address)
+    with span("transfer_token.gas_price"):
+        gas_price = w3.eth.gas_price
     gas_limit = 21000
 
     if amount == balance:
@@ -71,7 +125,8 @@ def transfer_token(private_key, wallet_address, receiver_address, amount):
                 f"Insufficient funds as available balance is {balance} ETH, but {amount} ETH was requested."
             )
 
-    nonce = w3.eth.get_transaction_count(wallet_address)
+    with span("transfer_token.nonce"):
+        nonce = w3.eth.get_transaction_count(wallet_address)
     logger_info.info(f"transfer token nonce for {wallet_address} : {nonce}")
     transaction = {
         "nonce": nonce,
@@ -81,8 +136,12 @@ def transfer_token(private_key, wallet_address, receiver_address, amount):
         "gas": gas_limit,
     }
     logger_info.info(f"Transfering {amount} eth to {receiver_address}")
-    signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    with span("transfer_token.sign"):
+        signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
+    with span("transfer_token.broadcast"):
+        tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    balance_cache.invalidate(wallet_address, ETH_ASSET)
+    balance_cache.invalidate(receiver_address, ETH_ASSET)
     logger_info.info(f"Transfered {amount} eth to {receiver_address}")
     return tx_hash.hex()
 
@@ -101,28 +160,37 @@ def transfer_erc20_token(
         token_address (str): The contract address of the ERC-20 token.
 
     """
-    contract = load_erc20_contract(token_address)
-    nonce = w3.eth.get_transaction_count(wallet_address)
-    gas_price = w3.eth.gas_price
+    with span("transfer_erc20_token.contract"):
+        contract = load_erc20_contract(token_address)
+    with span("transfer_erc20_token.nonce"):
+        nonce = w3.eth.get_transaction_count(wallet_address)
+    with span("transfer_erc20_token.gas_price"):
+        gas_price = w3.eth.gas_price
     gas_limit = 60000
 
     # Convert amount to smallest unit (e.g., wei for ETH, token's smallest unit for ERC-20)
-    decimals = contract.functions.decimals().call()
+    with span("transfer_erc20_token.decimals"):
+        decimals = contract.functions.decimals().call()
     value = int(amount * (10**decimals))
 
-    transaction = contract.functions.transfer(
-        w3.to_checksum_address(receiver_address), value
-    ).build_transaction(
-        {
-            "chainId": w3.eth.chain_id,
-            "gas": gas_limit,
-            "gasPrice": gas_price,
-            "nonce": nonce,
-        }
-    )
+    with span("transfer_erc20_token.build"):
+        transaction = contract.functions.transfer(
+            w3.to_checksum_address(receiver_address), value
+        ).build_transaction(
+            {
+                "chainId": w3.eth.chain_id,
+                "gas": gas_limit,
+                "gasPrice": gas_price,
+                "nonce": nonce,
+            }
+        )
 
-    signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    with span("transfer_erc20_token.sign"):
+        signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
+    with span("transfer_erc20_token.broadcast"):
+        tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    balance_cache.invalidate(wallet_address, ETH_ASSET, token_address)
+    balance_cache.invalidate(receiver_address, token_address)
     logger_info.info(f"Transferred {amount} tokens to {receiver_address}")
     return tx_hash.hex()
 
@@ -134,8 +202,10 @@ def transfer_tx_fee(private_key, wallet_address, receiver_address, tx_fee, nonce
     Raises:
         ValueError: If there are insufficient funds to cover the transfer and gas fees.
     """
-    balance = check_balance(wallet_address)
-    gas_price = w3.eth.gas_price
+    with span("transfer_tx_fee.balance_check"):
+        balance = check_balance(wallet_address)
+    with span("transfer_tx_fee.gas_price"):
+        gas_price = w3.eth.gas_price
     gas_limit = 21000
 
     if tx_fee == balance:
@@ -159,27 +229,28 @@ def transfer_tx_fee(private_key, wallet_address, receiver_address, tx_fee, nonce
         "gas": gas_limit,
     }
     logger_info.info(f"Transfering {tx_fee} eth to {receiver_address}")
-    signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    with span("transfer_tx_fee.sign"):
+        signed_transaction = w3.eth.account.sign_transaction(transaction, private_key)
+    with span("transfer_tx_fee.broadcast"):
+        tx_hash = w3.eth.send_raw_transaction(signed_transaction.rawTransaction)
+    balance_cache.invalidate(wallet_address, ETH_ASSET)
+    balance_cache.invalidate(receiver_address, ETH_ASSET)
     logger_info.info(f"Transfered {tx_fee} eth to {receiver_address}")
     return tx_hash.hex()
 
 
 def check_balance_eth_usdt(address):
     """
-    Check the Ether and USDT balance of an Ethereum wallet address.
+    Check the Ether and USDT balance of an Ethereum wallet address, from the
+    balance cache.
     """
-    usdt_contract_address = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
-    abi_path = Path(__file__).resolve().parent / "usdt_abi.json"
-    with open(abi_path) as abi_file:
-        usdt_abi = json.load(abi_file)
-    usdt_contract = w3.eth.contract(address=usdt_contract_address, abi=usdt_abi)
-    balance = w3.eth.get_balance(address)
-    usdt_balance = usdt_contract.functions.balanceOf(address).call()
-    return w3.from_wei(balance, "ether"), usdt_balance / (10**6)
+    _, usdt_balance = get_cached_token_balance(USDT_ADDRESS, address)
+    return get_cached_balance(address), usdt_balance
 
 
-def sell_eth_for_usdt(amount_eth, target_price, private_key, current_price):
+def sell_eth_for_usdt(
+    amount_eth, target_price, private_key, current_price, on_signed=None
+):
     """
     Function to sell ETH for USDT if the current price of ETH is greater than the target price of ETH.
     """
@@ -189,7 +260,9 @@ def sell_eth_for_usdt(amount_eth, target_price, private_key, current_price):
         )
         if current_price >= target_price:
             usdt_address = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
-            tx = swap_eth_to_token(private_key, amount_eth, usdt_address)
+            tx = swap_eth_to_token(
+                private_key, amount_eth, usdt_address, on_signed=on_signed
+            )
             return True, tx
         else:
             message = f"Current price {current_price} is less than target price {target_price}"
@@ -199,7 +272,9 @@ def sell_eth_for_usdt(amount_eth, target_price, private_key, current_price):
         return False, str(e)
 
 
-def buy_eth_from_usdt(amount_eth, target_price, private_key, current_price):
+def buy_eth_from_usdt(
+    amount_eth, target_price, private_key, current_price, on_signed=None
+):
     """
     Function to buy ETH from USDT if the current price of ETH is less than the target price of ETH.
     """
@@ -209,7 +284,9 @@ def buy_eth_from_usdt(amount_eth, target_price, private_key, current_price):
         )
         if current_price <= target_price:
             usdt_address = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
-            tx = swap_token_to_eth(private_key, amount_eth, usdt_address)
+            tx = swap_token_to_eth(
+                private_key, amount_eth, usdt_address, on_signed=on_signed
+            )
             return True, tx
         else:
             message = f"Current price {current_price} is higher than target price {target_price}"
@@ -263,7 +340,11 @@ def is_contract_address(address):
 
 
 def swap_eth_to_token(
-    private_key: str, amount_eth: float, token_address: str, is_transfer: bool = False
+    private_key: str,
+    amount_eth: float,
+    token_address: str,
+    is_transfer: bool = False,
+    on_signed=None,
 ):
     """
     Example usage for buy tokens using ETH
@@ -271,6 +352,9 @@ def swap_eth_to_token(
     amount_eth = 0.1
     token_address = "0xYourTokenContractAddress"
     router_address = "0xUniswapV2Router02"
+
+    `on_signed` is called with the hash of the swap transaction once it is
+    signed, before it is broadcast.
     """
     try:
         logger_info.info(
@@ -278,23 +362,26 @@ def swap_eth_to_token(
         )
         # Get the account address
         account = w3.eth.account.from_key(private_key).address
-        balance = check_balance(account)
+        with span("swap_eth_to_token.balance_check"):
+            balance = get_cached_balance(account)
         tx_fee = (amount_eth * 1) / 100
         if (amount_eth + tx_fee) > balance:
             raise ValueError(
                 "Insufficient ETH balance to cover the transaction amount."
             )
 
-        deadline = w3.eth.get_block("latest")["timestamp"] + 3600  # 1 hour from now
+        with span("swap_eth_to_token.deadline"):
+            deadline = w3.eth.get_block("latest")["timestamp"] + 3600  # 1 hour from now
         router_address = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D"
 
         # Define the router contract ABI (simplified for demonstration)
-        abi_path = Path(__file__).resolve().parent / "uniswap_abi_v2.json"
-        with open(abi_path) as abi_file:
-            router_abi = json.load(abi_file)
+        with span("swap_eth_to_token.contract"):
+            abi_path = Path(__file__).resolve().parent / "uniswap_abi_v2.json"
+            with open(abi_path) as abi_file:
+                router_abi = json.load(abi_file)
 
-        # Set up the contract instance
-        router_contract = w3.eth.contract(address=router_address, abi=router_abi)
+            # Set up the contract instance
+            router_contract = w3.eth.contract(address=router_address, abi=router_abi)
 
         # Convert ETH amount to Wei
         amount_eth_wei = w3.to_wei(amount_eth, "ether")
@@ -303,33 +390,43 @@ def swap_eth_to_token(
         min_tokens = 0
 
         # Build the transaction
-        nonce = w3.eth.get_transaction_count(account, "pending")
+        with span("swap_eth_to_token.nonce"):
+            nonce = w3.eth.get_transaction_count(account, "pending")
         logger_info.info(f"swap_eth_to_token nonce for {account} : {nonce}")
-        tx = router_contract.functions.swapExactETHForTokens(
-            min_tokens,
-            [
-                w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
-                w3.to_checksum_address(token_address),
-            ],
-            account,
-            deadline,
-        ).build_transaction(
-            {
-                "from": account,
-                "value": amount_eth_wei,
-                "gas": 250000,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": nonce,
-            }
-        )
+        with span("swap_eth_to_token.gas_price"):
+            gas_price = w3.eth.gas_price
+        with span("swap_eth_to_token.build"):
+            tx = router_contract.functions.swapExactETHForTokens(
+                min_tokens,
+                [
+                    w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
+                    w3.to_checksum_address(token_address),
+                ],
+                account,
+                deadline,
+            ).build_transaction(
+                {
+                    "from": account,
+                    "value": amount_eth_wei,
+                    "gas": 250000,
+                    "gasPrice": gas_price,
+                    "nonce": nonce,
+                }
+            )
 
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        with span("swap_eth_to_token.sign"):
+            signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+        if on_signed is not None:
+            on_signed(signed_tx.hash.hex())
+        with span("swap_eth_to_token.broadcast"):
+            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        balance_cache.invalidate(account, ETH_ASSET, token_address)
         if is_transfer:
             logger_info.info(f"Transfering fee {tx_fee} to Recifi whale wallet")
-            transfer_tx_fee(
-                private_key, account, settings.Recifi_WHALE_WALLET, tx_fee, nonce + 1
-            )
+            with span("swap_eth_to_token.fee_transfer"):
+                transfer_tx_fee(
+                    private_key, account, settings.Recifi_WHALE_WALLET, tx_fee, nonce + 1
+                )
             logger_info.info(f"Transfered fee {tx_fee} to Recifi whale wallet")
         return tx_hash.hex()
     except ValueError as e:
@@ -346,13 +443,20 @@ def swap_eth_to_token(
 
 
 def swap_token_to_eth(
-    private_key: str, amount_token: float, token_address: str, is_transfer: bool = False
+    private_key: str,
+    amount_token: float,
+    token_address: str,
+    is_transfer: bool = False,
+    on_signed=None,
 ):
     """
     Example usage for selling tokens for ETH
     private_key = "0xYourPrivateKey"
     amount_token = 50
     token_address = "0xYourTokenContractAddress"
+
+    `on_signed` is called with the hash of the swap transaction once it is
+    signed, before it is broadcast.
     """
     try:
         logger_info.info(
@@ -368,91 +472,106 @@ def swap_token_to_eth(
         ):
             raise ValueError("Minimum 1 USDT is required to proceed.")
 
-        name, balance = get_token_balance(token_address, account)
+        with span("swap_token_to_eth.balance_check"):
+            name, balance = get_cached_token_balance(token_address, account)
         if amount_token > balance:
             raise ValueError(
                 f"Insufficient {name} balance to cover the transaction amount."
             )
 
-        deadline = w3.eth.get_block("latest")["timestamp"] + 3600  # 1 hour from now
+        with span("swap_token_to_eth.deadline"):
+            deadline = w3.eth.get_block("latest")["timestamp"] + 3600  # 1 hour from now
         router_address = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D"
 
-        # Define the router contract ABI (simplified for demonstration)
-        abi_path = Path(__file__).resolve().parent / "uniswap_abi_v2.json"
-        with open(abi_path) as abi_file:
-            router_abi = json.load(abi_file)
-
-        # Simplified ERC20 ABI
-        erc_abi_path = Path(__file__).resolve().parent / "erc_20_abi.json"
-        with open(erc_abi_path) as abi_file:
-            token_abi = json.load(abi_file)
-
-        # Set up the contract instances
-        router_contract = w3.eth.contract(address=router_address, abi=router_abi)
-        token_contract = w3.eth.contract(address=token_address, abi=token_abi)
-
-        # Convert token amount to smallest unit (e.g., Wei)
-        amount_token_unit = token_contract.functions.decimals().call()
-        amount_token_wei = int(amount_token * (10**amount_token_unit))
-
-        eth_output = router_contract.functions.getAmountsOut(
-            amount_token_wei,
-            [
-                w3.to_checksum_address(token_address),
-                w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
-            ],
-        ).call()[-1]
+        with span("swap_token_to_eth.contract"):
+            # Define the router contract ABI (simplified for demonstration)
+            abi_path = Path(__file__).resolve().parent / "uniswap_abi_v2.json"
+            with open(abi_path) as abi_file:
+                router_abi = json.load(abi_file)
+
+            # Simplified ERC20 ABI
+            erc_abi_path = Path(__file__).resolve().parent / "erc_20_abi.json"
+            with open(erc_abi_path) as abi_file:
+                token_abi = json.load(abi_file)
+
+            # Set up the contract instances
+            router_contract = w3.eth.contract(address=router_address, abi=router_abi)
+            token_contract = w3.eth.contract(address=token_address, abi=token_abi)
+
+        with span("swap_token_to_eth.quote"):
+            # Convert token amount to smallest unit (e.g., Wei)
+            amount_token_unit = token_contract.functions.decimals().call()
+            amount_token_wei = int(amount_token * (10**amount_token_unit))
+
+            eth_output = router_contract.functions.getAmountsOut(
+                amount_token_wei,
+                [
+                    w3.to_checksum_address(token_address),
+                    w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
+                ],
+            ).call()[-1]
 
         eth_output_ether = w3.from_wei(eth_output, "ether")
 
         min_eth = 0
 
-        nonce = w3.eth.get_transaction_count(account, "pending")
+        with span("swap_token_to_eth.nonce"):
+            nonce = w3.eth.get_transaction_count(account, "pending")
         logger_info.info(f"swap_token_to_eth approve nonce for {account} : {nonce}")
-        approve_tx = token_contract.functions.approve(
-            router_address, amount_token_wei
-        ).build_transaction(
-            {
-                "from": account,
-                "gas": 100000,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": nonce,
-            }
-        )
-        signed_approve_tx = w3.eth.account.sign_transaction(approve_tx, private_key)
-        w3.eth.send_raw_transaction(signed_approve_tx.rawTransaction)
+        with span("swap_token_to_eth.gas_price"):
+            gas_price = w3.eth.gas_price
+        with span("swap_token_to_eth.approve"):
+            approve_tx = token_contract.functions.approve(
+                router_address, amount_token_wei
+            ).build_transaction(
+                {
+                    "from": account,
+                    "gas": 100000,
+                    "gasPrice": gas_price,
+                    "nonce": nonce,
+                }
+            )
+            signed_approve_tx = w3.eth.account.sign_transaction(approve_tx, private_key)
+            w3.eth.send_raw_transaction(signed_approve_tx.rawTransaction)
 
         # Build the transaction
         nonce += 1
         logger_info.info(f"swap_token_to_eth nonce for {account} : {nonce}")
-        tx = router_contract.functions.swapExactTokensForETH(
-            amount_token_wei,
-            min_eth,
-            [
-                w3.to_checksum_address(token_address),
-                w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
-            ],
-            account,
-            deadline,
-        ).build_transaction(
-            {
-                "from": account,
-                "gas": 250000,
-                "gasPrice": w3.eth.gas_price,
-                "nonce": nonce,
-            }
-        )
-
-        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        if is_transfer:
-            transfer_tx_fee(
-                private_key,
+        with span("swap_token_to_eth.build"):
+            tx = router_contract.functions.swapExactTokensForETH(
+                amount_token_wei,
+                min_eth,
+                [
+                    w3.to_checksum_address(token_address),
+                    w3.to_checksum_address("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"),
+                ],
                 account,
-                settings.Recifi_WHALE_WALLET,
-                ((eth_output_ether * 1) / 100),
-                nonce + 1,
+                deadline,
+            ).build_transaction(
+                {
+                    "from": account,
+                    "gas": 250000,
+                    "gasPrice": gas_price,
+                    "nonce": nonce,
+                }
             )
+
+        with span("swap_token_to_eth.sign"):
+            signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+        if on_signed is not None:
+            on_signed(signed_tx.hash.hex())
+        with span("swap_token_to_eth.broadcast"):
+            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        balance_cache.invalidate(account, ETH_ASSET, token_address)
+        if is_transfer:
+            with span("swap_token_to_eth.fee_transfer"):
+                transfer_tx_fee(
+                    private_key,
+                    account,
+                    settings.Recifi_WHALE_WALLET,
+                    ((eth_output_ether * 1) / 100),
+                    nonce + 1,
+                )
         return tx_hash.hex()
     except ValueError as e:
         logger_error.error(f"On calling swap_token_to_eth : {str(e)}")
@@ -486,6 +605,7 @@ def replace_pending_transaction(private_key: str, gas_price_in_gwei: int):
 
     signed_tx = w3.eth.account.sign_transaction(tx, private_key)
     tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    balance_cache.invalidate(account, ETH_ASSET)
 
     return tx_hash.hex()
 
@@ -518,12 +638,9 @@ def get_token_transactions(address):
         "startblock": 0,
         "endblock": 99999999,
         "sort": "asc",
-        "apikey": settings.ETHERSCAN_API_KEY,
     }
     try:
-        response = requests.get(settings.ETHERSCAN_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = etherscan_get(params, lane=USER_LANE)
         if data["status"] == "1":
             return data["result"]
         else:
@@ -556,17 +673,93 @@ def get_token_holding(wallet_address):
     }
 
 
+@lru_cache(maxsize=1024)
+def get_token_metadata(token_address):
+    """
+    Returns the (name, decimals) of a token, which never change.
+    """
+    token_contract = load_erc20_contract(token_address)
+    decimals = token_contract.functions.decimals().call()
+    return token_contract.functions.name().call(), decimals
+
+
 def get_token_balance(token_address, wallet_address):
     try:
-        token_contract = load_erc20_contract(token_address)
-        decimals = token_contract.functions.decimals().call()
+        name, decimals = get_token_metadata(token_address)
     except Exception as e:
         print(e)
         return None, 0
+    token_contract = load_erc20_contract(token_address)
     balance = token_contract.functions.balanceOf(wallet_address).call() / (10**decimals)
-    name = token_contract.functions.name().call()
     return name, balance
 
 
+def address_to_topic(address):
+    """
+    Left pad an address to the 32 byte topic format used by indexed event arguments.
+    """
+    return "0x" + address.lower().replace("0x", "").rjust(64, "0")
+
+
+def topic_to_address(topic):
+    """
+    Extract the address stored in the last 20 bytes of an indexed topic.
+    """
+    topic_hex = topic.hex() if hasattr(topic, "hex") else topic
+    return to_checksum_address("0x" + topic_hex[-40:])
+
+
+def get_erc20_transfers_to(addresses, from_block, to_block):
+    """
+    Fetch ERC-20 Transfer logs received by any of the given addresses with a
+    single eth_getLogs call, by OR-ing all recipients in the `to` topic.
+
+    Transfers with a fourth topic (ERC-721 token ids) are skipped.
+
+    Raises:
+        LogRangeTooLarge: If the node refuses the range or its result size.
+    """
+    try:
+        logs = w3.eth.get_logs(
+            {
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "topics": [
+                    TRANSFER_TOPIC,
+                    None,
+                    [address_to_topic(address) for address in addresses],
+                ],
+            }
+        )
+    except ValueError as e:
+        error = e.args[0] if e.args else ""
+        if isinstance(error, dict):
+            code, message = error.get("code"), str(error.get("message", ""))
+        else:
+            code, message = None, str(error)
+        if code == LOG_LIMIT_ERROR_CODE or any(
+            marker in message.lower() for marker in LOG_RANGE_ERRORS
+        ):
+            raise LogRangeTooLarge(message) from e
+        raise
+    return [log for log in logs if len(log["topics"]) == 3]
+
+
+def get_block_times(block_numbers):
+    """
+    Fetch the time of each block, with one eth_getBlockByNumber call per
+    distinct block.
+
+    Returns:
+        dict: block number -> aware UTC datetime.
+    """
+    return {
+        block_number: datetime.fromtimestamp(
+            w3.eth.get_block(block_number)["timestamp"], tz=timezone.utc
+        )
+        for block_number in set(block_numbers)
+    }
+
+
 def get_current_gwei():
     return w3.eth.gas_price / (10**9)